@@ -0,0 +1,113 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, sys, json, time, argparse, subprocess, tempfile
+
+# maximal time in milliseconds spent by importing modules when a script starts (measured with --help)
+DEFAULT_BUDGET = 100
+# number of the slowest imports printed for each script over its budget (all with verbose)
+DEFAULT_ROWS = 10
+
+
+class ImportTimer(object):
+    """ Measures imports of new modules like 'python -X importtime' (not available in python 2.7).
+
+    Each import statement which loads a module not loaded yet is recorded as (name, self time, cumulative time, depth),
+    the self time does not include the nested imports. """
+
+
+    def __init__(self):
+        self.imports = []
+        self._stack = [] # cumulative times of the nested imports of the running imports
+        self._import = __builtins__.__import__ if hasattr(__builtins__, '__import__') else __builtins__['__import__']
+
+
+    def __call__(self, name, globals=None, locals=None, fromlist=None, level=-1):
+        if name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        startTime = time.time()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.time() - startTime
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            self.imports.append((name, cumulative - nested, cumulative, len(self._stack)))
+
+
+def traceScript(scriptFileName, scriptArgs, outputFileName):
+    """Runs the script with the arguments and writes its imports (see ImportTimer) as json to the output file"""
+    import __builtin__, runpy
+    timer = ImportTimer()
+    sys.argv = [scriptFileName] + scriptArgs
+    sys.path.insert(0, os.path.dirname(os.path.abspath(scriptFileName)))
+    __builtin__.__import__ = timer
+    try:
+        runpy.run_path(scriptFileName, run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        __builtin__.__import__ = timer._import
+        with open(outputFileName, 'w') as outputFile:
+            json.dump(timer.imports, outputFile)
+
+
+def measureScript(scriptFileName, scriptArgs):
+    """Returns imports of the script started in a new interpreter [(name, self time, cumulative time, depth)] in the order they finished"""
+    handle, outputFileName = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        with open(os.devnull, 'w') as devnull:
+            subprocess.call([sys.executable, os.path.abspath(__file__), '--trace', outputFileName, scriptFileName] + scriptArgs, stdout=devnull, stderr=devnull)
+        with open(outputFileName, 'r') as outputFile:
+            return json.load(outputFile)
+    finally:
+        os.remove(outputFileName)
+
+
+def printImports(imports, rows=None):
+    """Prints the slowest imports (by cumulative time) or all imports in the order they finished (nested ones indented)"""
+    sys.stdout.write('import time: self [ms] | cumulative | imported module\n')
+    for name, selfTime, cumulative, depth in (sorted(imports, key=lambda item: -item[2])[:rows] if rows else imports):
+        sys.stdout.write('import time: %9.1f | %10.1f | %s%s\n' % (1000 * selfTime, 1000 * cumulative, '' if rows else '  ' * depth, name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--trace':
+        traceScript(sys.argv[3], sys.argv[4:], sys.argv[2])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description='Fails if importing modules takes longer than the budget when the scripts start (with --help, so only the imports are measured)', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('scripts', nargs='+', help='python scripts to check')
+    parser.add_argument('-b','--budget', required=False, type=float, default=DEFAULT_BUDGET, help='maximal import time of each script in milliseconds')
+    parser.add_argument('-r','--repeat', required=False, type=int, default=3, help='number of measurements of each script (the fastest one is used)')
+    parser.add_argument('-v','--verbose', required=False, help='print imports of all scripts', action='store_true')
+    args = parser.parse_args(sys.argv[1:])
+
+    failed = 0
+    for scriptFileName in args.scripts:
+        # the fastest run is the least affected by other processes
+        imports = min((measureScript(scriptFileName, ['--help']) for i in range(args.repeat)),
+                      key=lambda imports: sum(cumulative for name, selfTime, cumulative, depth in imports if depth == 0))
+        total = 1000 * sum(cumulative for name, selfTime, cumulative, depth in imports if depth == 0)
+        overBudget = total > args.budget
+        failed += overBudget
+        sys.stdout.write('%-40s %8.1f ms %s\n' % (os.path.basename(scriptFileName), total, 'OVER BUDGET' if overBudget else 'OK'))
+        if overBudget or args.verbose:
+            printImports(imports, None if args.verbose else DEFAULT_ROWS)
+    if failed:
+        sys.stderr.write('ERROR: Import time of %d script(s) is over the budget of %.0f ms\n' % (failed, args.budget))
+        sys.exit(1)
@@ -23,6 +23,12 @@ stopIfFailed()
     fi
 }
 
+echo "--------------------------------------------------------------------------------";
+echo "-- Import time of the scripts";
+echo "--------------------------------------------------------------------------------";
+python ci/import_time.py scripts/*.py;
+stopIfFailed $?;
+
 echo "--------------------------------------------------------------------------------";
 echo "-- Dialog, intents from XLS to XML, CSV";
 echo "--------------------------------------------------------------------------------";
@@ -0,0 +1,119 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, json, hashlib
+from wawCommons import eprintf, toEntityName, getNameNormalizer, EntityNameNormalizer
+from EntityTagger import EntityTagger
+
+# increase when the format of the cache file or the way the dictionary is compiled changes
+CACHE_VERSION = 1
+
+
+def getEntities(entityDir, NAME_POLICY, entitiesNameCheck=None):
+    """Retrieves entity value to entity name mapping from the directory with entity lists"""
+    entities = {}
+    for entityFileName in os.listdir(entityDir):
+        entityName = os.path.splitext(entityFileName)[0]
+        # system entities and patterns have no literal values to be tagged
+        if entityName == "system_entities": continue
+        entityName = toEntityName(NAME_POLICY, entitiesNameCheck, entityName)
+        with open(os.path.join(entityDir, entityFileName), "r") as entityFile:
+            for line in entityFile.readlines():
+                # remove comments
+                line = line.split('#')[0]
+                line = line.strip().lower()
+                if not line or line.startswith('~'): continue
+                for entity in line.split(';'):
+                    entity = entity.strip()
+                    if entity:
+                        entities[entity] = entityName
+    return entities
+
+
+def getEntityNames(entityDir, NAME_POLICY, entitiesNameCheck=None):
+    """Retrieves list of entity names (one for each file in the directory with entity lists)"""
+    entityNameNormalizer = getNameNormalizer(EntityNameNormalizer, NAME_POLICY, entitiesNameCheck)
+    entityNames = []
+    for entityName in entityNameNormalizer.normalize_many([os.path.splitext(entityFileName)[0] for entityFileName in os.listdir(entityDir)]):
+        if entityName not in entityNames:
+            entityNames.append(entityName)
+    return entityNames
+
+
+def getEntitiesKey(entityDir, NAME_POLICY, entitiesNameCheck=None):
+    """Returns hash of the content of the directory with entity lists and of the name check rules"""
+    keyHash = hashlib.sha1()
+    keyHash.update(json.dumps([CACHE_VERSION, NAME_POLICY, entitiesNameCheck]))
+    for entityFileName in sorted(os.listdir(entityDir)):
+        keyHash.update(b'\0' + entityFileName + b'\0')
+        with open(os.path.join(entityDir, entityFileName), "rb") as entityFile:
+            keyHash.update(entityFile.read())
+    return keyHash.hexdigest()
+
+
+class EntityDictionary(object):
+    """ Entity names and entity tagger compiled from the directory with entity lists.
+
+    If the cache file is given, the compiled dictionary is stored in it and loaded from it next time,
+    as long as no entity file and no name check rule has changed. """
+
+
+    def __init__(self, entityDir, NAME_POLICY, entitiesNameCheck=None, cacheFileName=None):
+        self._entityNames = None  # list of entity names
+        self._tagger = None  # EntityTagger with all entity values
+        key = getEntitiesKey(entityDir, NAME_POLICY, entitiesNameCheck) if cacheFileName else None # reads all entity files
+        if cacheFileName and self._loadCache(cacheFileName, key):
+            return
+        self._entityNames = getEntityNames(entityDir, NAME_POLICY, entitiesNameCheck)
+        self._tagger = EntityTagger(getEntities(entityDir, NAME_POLICY, entitiesNameCheck))
+        if cacheFileName:
+            self._saveCache(cacheFileName, key)
+
+
+    def getEntityNames(self):
+        return self._entityNames
+
+
+    def getTagger(self):
+        return self._tagger
+
+
+    def _loadCache(self, cacheFileName, key):
+        if not os.path.exists(cacheFileName):
+            return False
+        try:
+            with open(cacheFileName, 'r') as cacheFile:
+                cacheJSON = json.load(cacheFile)
+        except (IOError, ValueError):
+            eprintf("WARNING: Cannot load entities cache file '%s', rebuilding it\n", cacheFileName)
+            return False
+        if cacheJSON.get('key') != key:
+            return False
+        self._entityNames = [entityName.encode('utf-8') for entityName in cacheJSON['entityNames']]
+        self._tagger = EntityTagger()
+        self._tagger.setTrie(cacheJSON['trie'])
+        return True
+
+
+    def _saveCache(self, cacheFileName, key):
+        cacheJSON = {'key': key, 'entityNames': self._entityNames, 'trie': self._tagger.getTrie()}
+        try:
+            cacheDirectory = os.path.dirname(cacheFileName)
+            if cacheDirectory and not os.path.exists(cacheDirectory):
+                os.makedirs(cacheDirectory)
+            with open(cacheFileName, 'w') as cacheFile:
+                cacheFile.write(json.dumps(cacheJSON, separators=(',', ':')))
+        except IOError:
+            eprintf("WARNING: Cannot save entities cache file '%s'\n", cacheFileName)
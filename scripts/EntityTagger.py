@@ -0,0 +1,89 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re
+
+WORD_REGEX = re.compile(r'[\w-]+', re.UNICODE)
+# key of the trie node holding the name of the entity which ends in this node (words are never empty)
+ENTITY_KEY = u''
+
+
+class EntityTagger(object):
+    """ Tags entity values in the text in one left-to-right pass.
+
+    Entity values are stored in a trie of lowercased words, so that multi-word values can be matched,
+    matches are always aligned to whole words and the longest value starting at a given word wins. """
+
+
+    def __init__(self, entities=None):
+        self._trie = {}  # key: lowercased word, value: trie node (ENTITY_KEY holds the entity name)
+        if entities:
+            for entityValue, entityName in entities.iteritems():
+                self.addEntityValue(entityValue, entityName)
+
+
+    def addEntityValue(self, entityValue, entityName):
+        words = WORD_REGEX.findall(_toUnicode(entityValue).lower())
+        if not words:
+            return
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[ENTITY_KEY] = _toUnicode(entityName)
+
+
+    def getTrie(self):
+        return self._trie
+
+
+    def setTrie(self, trie):
+        self._trie = trie
+
+
+    def tag(self, line):
+        """ Returns the line with all entity values surrounded by <entity_name></entity_name> tags """
+        isStr = isinstance(line, str)
+        uLine = _toUnicode(line)
+        words = [(match.start(), match.end(), match.group().lower()) for match in WORD_REGEX.finditer(uLine)]
+        result = []
+        position = 0 # end of the text already copied to the result
+        i = 0
+        while i < len(words):
+            # find the longest entity value starting with the i-th word
+            node = self._trie
+            matchEnd = None
+            j = i
+            while j < len(words) and words[j][2] in node:
+                node = node[words[j][2]]
+                j += 1
+                if ENTITY_KEY in node:
+                    matchEnd = j
+                    entityName = node[ENTITY_KEY]
+            if matchEnd is None:
+                i += 1
+                continue
+            start = words[i][0]
+            end = words[matchEnd - 1][1]
+            result.append(uLine[position:start])
+            result.append(u'<' + entityName + u'>' + uLine[start:end] + u'</' + entityName + u'>')
+            position = end
+            i = matchEnd
+        result.append(uLine[position:])
+        uTagged = u''.join(result)
+        return uTagged.encode('utf-8') if isStr else uTagged
+
+
+def _toUnicode(text):
+    return text.decode('utf-8') if isinstance(text, str) else text
@@ -0,0 +1,112 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re, random, zlib, itertools
+from collections import defaultdict
+
+NOT_WORD_REGEX = re.compile(r'[^\w\s]', re.UNICODE)
+SPACES_REGEX = re.compile(r'\s+', re.UNICODE)
+# Mersenne prime used for the universal hash functions (small enough to keep a * hash + b in a machine int)
+MERSENNE_PRIME = (1 << 31) - 1
+# minimal probability that a pair with the similarity equal to the threshold becomes a candidate pair
+CANDIDATE_PROBABILITY = 0.95
+
+
+def normalizeText(text):
+    """Lowercases the text, removes punctuation and collapses whitespaces"""
+    text = NOT_WORD_REGEX.sub(u'', text.lower())
+    return SPACES_REGEX.sub(u' ', text).strip()
+
+
+def getShingles(text, shingleSize):
+    """Returns set of hashes of all character shingles of the normalized text (empty if nothing is left after the normalization)"""
+    text = normalizeText(text.decode('utf-8') if isinstance(text, str) else text)
+    if not text:
+        return frozenset()
+    if len(text) <= shingleSize:
+        return frozenset([zlib.crc32(text.encode('utf-8')) % MERSENNE_PRIME])
+    return frozenset(zlib.crc32(text[i:i + shingleSize].encode('utf-8')) % MERSENNE_PRIME for i in range(len(text) - shingleSize + 1))
+
+
+def getBands(numPermutations, threshold):
+    """Returns (number of bands, rows in band) for LSH, the most selective one which still makes
+    a pair with the threshold similarity a candidate with at least CANDIDATE_PROBABILITY"""
+    bestBands = (numPermutations, 1)
+    for rows in range(1, numPermutations + 1):
+        if numPermutations % rows: continue
+        bands = numPermutations // rows
+        if 1 - (1 - threshold ** rows) ** bands >= CANDIDATE_PROBABILITY:
+            bestBands = (bands, rows)
+    return bestBands
+
+
+class MinHashLSH(object):
+    """ Index of short texts which finds pairs of near-duplicate texts.
+
+    Texts are represented by sets of character shingles of their normalized form, MinHash signatures
+    of the sets are split into bands and texts sharing a band are candidates, so only the candidates
+    are compared (by Jaccard similarity of the shingle sets) instead of all pairs. Texts with the same
+    shingle set are indexed once with all their keys. """
+
+
+    def __init__(self, threshold=0.8, numPermutations=64, shingleSize=3, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold has to be in (0, 1]: %s' % threshold)
+        self._threshold = threshold
+        self._shingleSize = shingleSize
+        randomGenerator = random.Random(seed)
+        self._permutations = [(randomGenerator.randint(1, MERSENNE_PRIME - 1), randomGenerator.randint(0, MERSENNE_PRIME - 1)) for _ in range(numPermutations)]
+        self._bands, self._rows = getBands(numPermutations, threshold)
+        self._buckets = [defaultdict(list) for _ in range(self._bands)]  # for each band, key: band of signature, value: list of item indexes
+        self._items = []  # list of (keys, shingles)
+        self._itemIndexes = {}  # key: shingles, value: index of the item
+
+
+    def add(self, key, text):
+        """Adds the text to the index, texts without any word character (e.g. only punctuation) are not added"""
+        shingles = getShingles(text, self._shingleSize)
+        if not shingles: return
+        if shingles in self._itemIndexes:
+            self._items[self._itemIndexes[shingles]][0].append(key)
+            return
+        index = len(self._items)
+        self._itemIndexes[shingles] = index
+        self._items.append(([key], shingles))
+        signature = [min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) for a, b in self._permutations]
+        for band in range(self._bands):
+            self._buckets[band][tuple(signature[band * self._rows:(band + 1) * self._rows])].append(index)
+
+
+    def getNearDuplicates(self, isPair=None):
+        """ Returns list of (key, key, similarity) for all pairs with similarity above the threshold,
+        the most similar first, isPair(key, key) can reject pairs which should not be reported """
+        nearDuplicates = []
+        for keys, shingles in self._items: # texts with the same shingles
+            nearDuplicates.extend((key1, key2, 1.0) for key1, key2 in itertools.combinations(keys, 2) if not isPair or isPair(key1, key2))
+        candidates = set() # pairs of items sharing a band (an item pair can share several bands, it is compared once)
+        for buckets in self._buckets:
+            for indexes in buckets.itervalues():
+                if len(indexes) > 1:
+                    candidates.update(itertools.combinations(indexes, 2)) # indexes are ascending, so are the pairs
+        for i, j in sorted(candidates):
+            keys1, shingles1 = self._items[i]
+            keys2, shingles2 = self._items[j]
+            keyPairs = [(key1, key2) for key1 in keys1 for key2 in keys2 if not isPair or isPair(key1, key2)]
+            if not keyPairs: continue
+            similarity = float(len(shingles1 & shingles2)) / len(shingles1 | shingles2)
+            if similarity >= self._threshold:
+                nearDuplicates.extend((key1, key2, similarity) for key1, key2 in keyPairs)
+        nearDuplicates.sort(key=lambda nearDuplicate: -nearDuplicate[2])
+        return nearDuplicates
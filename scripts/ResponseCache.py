@@ -0,0 +1,82 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, json, threading
+from wawCommons import eprintf
+from workspaceCommons import getContentHash, COMPACT_SEPARATORS
+
+
+class CacheMissError(Exception):
+    """ Raised when a message has no recorded response and the cache is used without the service. """
+    pass
+
+
+class ResponseCache(object):
+    """ Responses of the service recorded for one version of the workspace.
+
+    Responses are stored under the hash of the request message (input and context), the cache file keeps
+    only the responses of the last workspace, so recorded responses are never used for a changed workspace.
+    If the workspace key is not given, the responses of the last recorded workspace are used (replay). """
+
+
+    def __init__(self, cacheFileName, workspaceKey=None):
+        self._cacheFileName = cacheFileName
+        self._workspaceKey = workspaceKey
+        self._responses = {}  # key: hash of the message, value: response json
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        if os.path.exists(cacheFileName):
+            try:
+                with open(cacheFileName, 'r') as cacheFile:
+                    cacheJSON = json.load(cacheFile)
+            except (IOError, ValueError):
+                eprintf("WARNING: Cannot load response cache file '%s', recording new responses\n", cacheFileName)
+                return
+            if workspaceKey is None or cacheJSON.get('workspace') == workspaceKey:
+                self._workspaceKey = cacheJSON.get('workspace')
+                self._responses = cacheJSON.get('responses', {})
+
+
+    def get(self, messageJSON):
+        """ Returns the recorded response to the message or None """
+        with self._lock:
+            response = self._responses.get(getContentHash(messageJSON))
+            if response is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return response
+
+
+    def put(self, messageJSON, response):
+        with self._lock:
+            self._responses[getContentHash(messageJSON)] = response
+
+
+    def getStatistics(self):
+        """ Returns (hits, misses) """
+        return self._hits, self._misses
+
+
+    def save(self):
+        try:
+            cacheDirectory = os.path.dirname(self._cacheFileName)
+            if cacheDirectory and not os.path.exists(cacheDirectory):
+                os.makedirs(cacheDirectory)
+            with open(self._cacheFileName, 'w') as cacheFile:
+                cacheFile.write(json.dumps({'workspace': self._workspaceKey, 'responses': self._responses}, separators=COMPACT_SEPARATORS))
+        except IOError:
+            eprintf("WARNING: Cannot save response cache file '%s'\n", self._cacheFileName)
@@ -14,8 +14,6 @@ limitations under the License.
 """
 
 import os, re
-import unidecode
-from openpyxl import load_workbook
 from wawCommons import printf, eprintf, toIntentName
 from zipfile import BadZipfile
 import DialogData as Dialog
@@ -72,6 +70,7 @@ class XLSXHandler(object):
     
         try:
             domainName = unicode(toIntentName(NAME_POLICY, None, os.path.splitext(os.path.split(filename)[1])[0]), 'utf-8')
+            from openpyxl import load_workbook # the spreadsheet library is loaded only when there is a spreadsheet
             workbook = load_workbook(filename=filename, read_only=True)
         except (IOError, BadZipfile):
             eprintf('Error: File does not seem to be a valid Excel spreadsheet: %s\n', filename)
@@ -151,7 +150,7 @@ class XLSXHandler(object):
                 intent = firstCell[1:] 
             else:
                 # Create fully qualified intent name
-                intent = toIntentName(NAME_POLICY, domain + '_' + prefix + '_' + intent)
+                intent = unicode(toIntentName(NAME_POLICY, None, domain + '_' + prefix + '_' + intent), 'utf-8')
 
         self._dialogData.getIntentData(intent, domain)
         self._dataBlocks.append((domain, prefix, intent, block))
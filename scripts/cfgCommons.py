@@ -13,9 +13,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import logging, configparser
+import sys, json, hashlib, logging, configparser
 from wawCommons import printf, eprintf
 
+# config files with this extension are resolved configurations (merged options saved by saveResolvedConfiguration)
+RESOLVED_CONFIG_EXTENSION = '.json'
+# options which are not part of the resolved configuration (they describe where the configuration is, not what it is)
+RESOLVED_CONFIG_EXCLUDED = ['common_configFilePaths', 'common_resolved_config']
+
 class Cfg:
 
     sectionDelimiter = '_'
@@ -27,6 +32,7 @@ class Cfg:
         logging.basicConfig(filename='log.log', level=logging.INFO)
         logging.info('cfg.__init__')
         self.config = {}
+        resolved = False # loaded from a resolved config file
 
         # Sections (names can not contain '_')
         commonSection = 'common'
@@ -48,6 +54,12 @@ class Cfg:
                 for common_configFilePath in args.common_configFilePaths: # go over all the config files and collect all parameters
                     logging.info("Processing config file:" + common_configFilePath)
                     print("Processing config file:" + common_configFilePath)
+                    if common_configFilePath.endswith(RESOLVED_CONFIG_EXTENSION): # already merged, values are set as they are
+                        resolved = True
+                        with open(common_configFilePath, 'r') as resolvedFile:
+                            for optionUniqueName, value in json.load(resolvedFile).items():
+                                setattr(self, optionUniqueName, value)
+                        continue
                     configPart = configparser.ConfigParser()
                     configPart.read(common_configFilePath)
                     # Collect all attributes from all sections
@@ -75,20 +87,51 @@ class Cfg:
                                     setattr(self, optionUniqueName, [newValue])
                                 else: # set value
                                     setattr(self, optionUniqueName, newValue)
-            except IOError:
-                eprintf('ERROR: Cannot load config file %s\n', args.configFileName)
+            except IOError as error:
+                eprintf('ERROR: Cannot load config file %s\n', error.filename)
+                sys.exit(1)
+            except ValueError as error:
+                eprintf('ERROR: Invalid resolved config file: %s\n', error)
                 sys.exit(1)
 
         # Set command line parameters
         # command line parameters are having precedence, therefore they are set the last
+        overridden = False
         for arg in vars(args):
             if hasattr(args, arg) and getattr(args, arg): # attribute is present and not empty
                 if hasattr(self, arg):
+                    if getattr(self, arg) == getattr(args, arg): continue
                     eprintf("WARNING: Overwriting config file parameter '%s' with value '%s' from comman line argumets.\n", arg, getattr(args, arg))
+                overridden = overridden or arg not in RESOLVED_CONFIG_EXCLUDED
                 setattr(self, arg, getattr(args, arg))
-        if hasattr(self, 'common_output_config'):
+        if getattr(args, 'common_resolved_config', None):
+            self.saveResolvedConfiguration(args.common_resolved_config)
+        # output config was saved when the configuration was resolved (unless the command line changed it)
+        if hasattr(self, 'common_output_config') and (overridden or not resolved):
             self.saveConfiguration(getattr(self, 'common_output_config'))
 
+    def getOptions(self):
+        """Returns dict of all options of the configuration (key: section and option name, value: string or list)"""
+        return {optionUniqueName: value for optionUniqueName, value in self.__dict__.items()
+                if Cfg.sectionDelimiter in optionUniqueName and optionUniqueName not in RESOLVED_CONFIG_EXCLUDED}
+
+    def saveResolvedConfiguration(self, resolvedFileName):
+        """Saves all options as compact json with sorted keys (loaded by Cfg when given as a config file),
+        the same options give the same file, so its hash (see getResolvedHash) can be used as a cache key"""
+        try:
+            with open(resolvedFileName, 'w') as resolvedFile:
+                resolvedFile.write(self.getResolvedJson())
+        except IOError:
+            eprintf('ERROR: Cannot save resolved config file %s\n', resolvedFileName)
+            sys.exit(1)
+
+    def getResolvedJson(self):
+        return json.dumps(self.getOptions(), sort_keys=True, separators=(',', ':'))
+
+    def getResolvedHash(self):
+        """Returns hash of the resolved configuration (sha1 of the resolved config file)"""
+        return hashlib.sha1(self.getResolvedJson()).hexdigest()
+
     def saveConfiguration(self, configFileName):
         outputConfig = configparser.ConfigParser()
         for optionUniqueName in self.__dict__:
@@ -16,10 +16,11 @@ limitations under the License.
 import sys, argparse, os
 import wawCommons
 from cfgCommons import Cfg
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
 import shutil
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Clean generated directories.',formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -15,9 +15,10 @@ limitations under the License.
 
 import json,sys,argparse, re
 import lxml.etree as LET
-from wawCommons import printf, eprintf, toCode
+from wawCommons import printf, eprintf, toCode, initStreams
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Replaces codes in text tags with sentences specified in the resource file.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('dialog', help='dialog nodes in xml format.')
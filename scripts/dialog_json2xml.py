@@ -15,7 +15,7 @@ limitations under the License.
 
 import json, sys, argparse, os
 import lxml.etree as LET
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
 
 def convertDialog(dialogNodesJSON):
     dialogXML = LET.Element("nodes")
@@ -132,6 +132,7 @@ def getValue(dict, key):
         return None
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Decompose Bluemix conversation service dialog in .json format to dialog files in .xml format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('dialog', nargs='?', type=argparse.FileType('r'), default=sys.stdin, help='file with dialog in .json format, if not specified, dialog is read from standard input')
@@ -20,7 +20,7 @@ from wawCommons import printf
 from XLSXHandler import XLSXHandler
 from XMLHandler import XMLHandler
 
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
 
 def saveDialogDataToFileSystem(dialogData, handler, config):
     if hasattr(config, 'common_generated_dialogs') and not os.path.exists(getattr(config, 'common_generated_dialogs')[0]):
@@ -55,6 +55,7 @@ def saveDialogDataToFileSystem(dialogData, handler, config):
                 entityFile.write(entityList.encode('utf8') + '\n')
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Creates dialog nodes with answers to intents .', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # optional arguments
@@ -16,7 +16,7 @@ limitations under the License.
 import json,sys,argparse,os,re,csv,io,copy
 import lxml.etree as LET
 from cfgCommons import Cfg
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
 import time
 import datetime
 
@@ -718,6 +718,7 @@ def convertAll(upperNodeJson, nodeXml):
 
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Converts dialog nodes from .xml format to Bluemix conversation service workspace .json format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-dm','--common_dialog_main', required=False, help='main dialog file with dialogue nodes in xml format')
@@ -14,11 +14,71 @@ limitations under the License.
 """
 
 import json,sys,argparse,os
+from functools import partial
 
 from cfgCommons import Cfg
-from wawCommons import printf, eprintf, toEntityName, getFilesAtPath
+from wawCommons import printf, eprintf, toEntityName, getFilesAtPath, mapFiles, initStreams
+
+def processEntityFile(NAME_POLICY, entitiesNameCheck, entityFileName):
+    """Converts one entity csv file to the list of entity jsons (system entities file contains more entities)"""
+    entitiesJSON = []
+    with open(entityFileName, "r") as entityFile:
+
+        entityName = os.path.splitext(os.path.basename(entityFileName))[0]
+
+        # system entities
+        if entityName == "system_entities":
+            for line in entityFile.readlines():
+                # remove comments
+                line = line.split('#')[0]
+                line = line.rstrip().lower()
+                if line:
+                    # create new system entity
+                    entityJSON = {}
+                    entityJSON['entity'] = line
+                    entityJSON['values'] = []
+                    entitiesJSON.append(entityJSON)
+
+        # other entities
+        else:
+            entityName = toEntityName(NAME_POLICY, entitiesNameCheck, entityName)
+
+            # create new entity
+            entityJSON = {}
+            entityJSON['entity'] = entityName
+            valuesJSON = []
+            # add all values
+            for line in entityFile.readlines():
+                # remove comments
+                line = line.split('#')[0]
+                line = line.strip()
+                if line:
+                    rawSynonyms = line.split(';')
+                    # strip and lower all items in line
+                    [x.strip().lower() for x in rawSynonyms]
+                    representativeValue = rawSynonyms[0]
+                    synonyms = sorted(list(set(rawSynonyms[1:])))
+                    valueJSON = {}
+                    if representativeValue[0] is '~':
+                        # all patterns are represented by the first value without first char (~)
+                        valueJSON['type'] = 'patterns'
+                        valueJSON['value'] = representativeValue[1:]
+                        # add all patterns
+                        if len(synonyms) > 0:
+                            valueJSON['patterns'] = synonyms
+                    else:
+                        # all synonyms are represented by the first value
+                        valueJSON['value'] = representativeValue
+                        # add all synonyms
+                        if len(synonyms) > 0:
+                            valueJSON['synonyms'] = synonyms
+                    valuesJSON.append(valueJSON)
+            entityJSON['values'] = valuesJSON
+            entitiesJSON.append(entityJSON)
+    return entitiesJSON
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Conversion entity csv files to .json.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -28,6 +88,7 @@ if __name__ == '__main__':
     parser.add_argument('-od', '--common_outputs_directory', required=False, help='directory where the otputs will be stored (outputs is default)')
     parser.add_argument('-oe', '--common_outputs_entities', help='file with output json with all the entities')
     parser.add_argument('-ne', '--common_entities_nameCheck', action='append', nargs=2, help="regex and replacement for entity name check, e.g. '-' '_' for to replace hyphens for underscores or '$special' '\L' for lowercase")
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of processes converting entity files in parallel')
     parser.add_argument('-v','--common_verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('-s', '--common_soft', required=False, help='soft name policy - change intents and entities names without error.', action='store_true', default="")
     args = parser.parse_args(sys.argv[1:])
@@ -53,61 +114,9 @@ if __name__ == '__main__':
         pathList = pathList + getattr(config, 'common_generated_entities')
 
     filesAtPath = getFilesAtPath(pathList)
-    for entityFileName in sorted(filesAtPath):
-
-        with open(entityFileName, "r") as entityFile:
-
-            entityName = os.path.splitext(os.path.basename(entityFileName))[0]
-
-            # system entities
-            if entityName == "system_entities":
-                for line in entityFile.readlines():
-                    # remove comments
-                    line = line.split('#')[0]
-                    line = line.rstrip().lower()
-                    if line:
-                        # create new system entity
-                        entityJSON = {}
-                        entityJSON['entity'] = line
-                        entityJSON['values'] = []
-                        entitiesJSON.append(entityJSON)
-
-            # other entities
-            else:
-                entityName = toEntityName(NAME_POLICY, getattr(config, 'common_entities_nameCheck') if hasattr(config, 'common_entities_nameCheck') else None, entityName)
-
-                # create new entity
-                entityJSON = {}
-                entityJSON['entity'] = entityName
-                valuesJSON = []
-                # add all values
-                for line in entityFile.readlines():
-                    # remove comments
-                    line = line.split('#')[0]
-                    line = line.strip()
-                    if line:
-                        rawSynonyms = line.split(';')
-                        # strip and lower all items in line
-                        [x.strip().lower() for x in rawSynonyms]
-                        representativeValue = rawSynonyms[0]
-                        synonyms = sorted(list(set(rawSynonyms[1:])))
-                        valueJSON = {}
-                        if representativeValue[0] is '~':
-                            # all patterns are represented by the first value without first char (~)
-                            valueJSON['type'] = 'patterns'
-                            valueJSON['value'] = representativeValue[1:]
-                            # add all patterns
-                            if len(synonyms) > 0:
-                                valueJSON['patterns'] = synonyms
-                        else:
-                            # all synonyms are represented by the first value
-                            valueJSON['value'] = representativeValue
-                            # add all synonyms
-                            if len(synonyms) > 0:
-                                valueJSON['synonyms'] = synonyms
-                        valuesJSON.append(valueJSON)
-                entityJSON['values'] = valuesJSON
-                entitiesJSON.append(entityJSON)
+    for entityJSONs in mapFiles(partial(processEntityFile, NAME_POLICY, getattr(config, 'common_entities_nameCheck') if hasattr(config, 'common_entities_nameCheck') else None),
+                                sorted(filesAtPath), getattr(config, 'common_jobs', None)):
+        entitiesJSON.extend(entityJSONs)
 
     if getattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_entities'):
         if not os.path.exists(getattr(config, 'common_outputs_directory')):
@@ -15,9 +15,11 @@ limitations under the License.
 
 import sys, argparse, os, re
 from collections import defaultdict
-from wawCommons import printf, eprintf, toIntentName, toEntityName
+from wawCommons import printf, eprintf, toIntentName, initStreams
+from EntityDictionary import getEntityNames
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='convert NLU tsv files into domain-entity and intent-entity mappings.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('entitiesDir', help='directory with entities files - all of them will be included in output list if specified')
@@ -74,11 +76,7 @@ if __name__ == '__main__':
     if args.list:
         with open(args.list, 'w') as listFile:
             # process entities
-            entityNames = []
-            for entityFileName in os.listdir(args.entitiesDir):
-                entityName = toEntityName(NAME_POLICY, args.common_entities_nameCheck , os.path.splitext(entityFileName)[0])
-                if entityName not in entityNames:
-                    entityNames.append(entityName)
+            entityNames = getEntityNames(args.entitiesDir, NAME_POLICY, args.common_entities_nameCheck)
             for entityName in entityNames:
                 listFile.write(entityName + ";\n")
         if VERBOSE: printf("Entities list '%s' was successfully created\n", args.list)
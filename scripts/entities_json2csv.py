@@ -14,9 +14,10 @@ limitations under the License.
 """
 
 import json, sys, argparse, os
-from wawCommons import printf, eprintf, toEntityName
+from wawCommons import printf, eprintf, toEntityName, initStreams
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Decompose Bluemix conversation service entities in .json format to entity files in .csv format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('entities', help='file with entities in .json format')
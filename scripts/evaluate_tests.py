@@ -13,241 +13,201 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import json, sys, argparse, requests, os, time, datetime, re
+import json, sys, argparse, os, time, datetime, re, StringIO
 import lxml.etree as LET
-from wawCommons import printf, eprintf
-
-
-def areSame(expectedOutputJson, receivedOutputJson, failureData, parentPath):
-
-    printf("ARE SAME: %s and %s\n", expectedOutputJson, receivedOutputJson)
-
-    if isinstance(expectedOutputJson, basestring):
-        if not isinstance(receivedOutputJson, basestring):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type string (" + expectedOutputJson + ")"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            printf("Different type: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        if expectedOutputJson != receivedOutputJson:
-            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = expectedOutputJson
-            failureData['receivedElement'] = receivedOutputJson
-            printf("NOT SAME: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        else:
-            printf('SAME: basestring %s and %s are same\n', expectedOutputJson, receivedOutputJson)
-            return True
-
-    if isinstance(expectedOutputJson, int):
-        if not isinstance(receivedOutputJson, int):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type int (" + str(expectedOutputJson) + ")"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            printf("Different type: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        if expectedOutputJson != receivedOutputJson:
-            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = str(expectedOutputJson)
-            failureData['receivedElement'] = str(receivedOutputJson)
-            printf("NOT SAME: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        else:
-            printf('SAME: int %s and %s are same\n', expectedOutputJson, receivedOutputJson)
-            return True
-
-    elif isinstance(expectedOutputJson, list):
-        if not isinstance(receivedOutputJson, list):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type list"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            printf("Different type: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        if len(expectedOutputJson) != len(receivedOutputJson):
-            failureData['message'] = 'List in received output differs in length from list in expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "List of the length " + str(len(expectedOutputJson))
-            failureData['receivedElement'] = "List of the length " + str(len(receivedOutputJson))
-            printf('ERROR: Different list length!\n')
-            printf('expected %s\n', expectedOutputJson)
-            printf('received %s\n', receivedOutputJson)
-            return False
-        else:
-            for i in range(len(expectedOutputJson)):
-                printf("STEP: Item %d\n", i)
-                if not areSame(expectedOutputJson[i], receivedOutputJson[i], failureData, parentPath + " - " + str(i) + "th item in list"):
-                    printf('ERROR: Different list items in positon %d!\n', i)
-                    return False
-            return True
-
-    elif isinstance(expectedOutputJson, dict):
-        if not isinstance(receivedOutputJson, dict):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type dict"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            printf("Different type: %s and %s\n", expectedOutputJson, receivedOutputJson)
-            return False
-        for elementKey in expectedOutputJson:
-            printf("STEP: Element key %s\n", elementKey)
-            if expectedOutputJson[elementKey] is None:
-                printf("NONE: Element with key %s is none\n", elementKey)
-                continue
-            if elementKey not in receivedOutputJson or receivedOutputJson[elementKey] is None:
-                failureData['message'] = 'Received output has no key ' + elementKey + '.' + " (" + parentPath + ")"
-                failureData['expectedElement'] = "Dict with key " + elementKey
-                failureData['receivedElement'] = "None"
-                printf('ERROR: Missing key in received json!\n')
-                return False
-            else:
-                if not areSame(expectedOutputJson[elementKey], receivedOutputJson[elementKey], failureData, parentPath + " - " + elementKey):
-                    printf('ERROR: Different dict items for key %s!\n', elementKey)
-                    return False
-        return True
-
-    else:
-        eprintf('ERROR: Unsupported type of element %s, type %s!\n', str(expectedOutputJson), expectedOutputJson.__class__.__name__)
-        return False
-
-def createLineFailureXML(failureData):
-    lineFailureXml = LET.Element('failure')
-    lineFailureXml.attrib['message'] = failureData['message']
-    # expected element
-    lineFailureExpectedXml = LET.Element('expected')
-    lineFailureExpectedXml.text = failureData['expectedElement']
-    lineFailureXml.append(lineFailureExpectedXml)
-    # received element
-    lineFailureReceivedXml = LET.Element('received')
-    lineFailureReceivedXml.text = failureData['receivedElement']
-    lineFailureXml.append(lineFailureReceivedXml)
-    return lineFailureXml
+from functools import partial
+from wawCommons import printf, eprintf, mapFiles, initStreams
+from testCommons import compareJson, compileMatchers, isTestLine, createDialogResult, addLineResult, checkDialogBudget, getTurnBudget, CHECK_MESSAGES_TIME_MAX, ReportXMLWriter, getTimingsFileName, printLineResult, printDialogResult, printSummary, SEPARATOR
+
+def evaluateDialogs(expectedJsonFile, receivedJsonFile, receivedFileName, verbose=False, timingsFile=None, defaultMaxMs=None):
+    """Compares expected and received lines, yields results of dialogs (consecutive lines with the same dialog_id)
+    (see createDialogResult), only failed lines are printed (all lines if verbose),
+    times of the lines are latencies of the responses from the timings file (if given) which are checked against
+    the budgets of the lines (max_ms or defaultMaxMs) and of the dialogs (dialog_max_ms), lines of the expected file which are not turns of dialogs have no received line, they can declare matchers
+    ({"matchers": {path: matcher}}, see compileMatchers) of the following lines"""
+    dialogResult = None
+    dialogMaxMs = None
+    matchersJSON = {}
+    matchers = None
+    line = 0
+    for expectedJsonLine in expectedJsonFile:
+        expectedData = json.loads(expectedJsonLine)
+        if not isTestLine(expectedData):
+            if 'matchers' in expectedData:
+                if line:
+                    eprintf('ERROR: Matchers have to be declared before the first test line\n')
+                    sys.exit(1)
+                try:
+                    compileMatchers(expectedData['matchers']) # validates the declaration before it is merged
+                    matchersJSON.update(expectedData['matchers'])
+                    matchers = compileMatchers(matchersJSON)
+                except ValueError as error:
+                    eprintf('ERROR: Invalid matchers: %s\n', error)
+                    sys.exit(1)
+            continue
+        line += 1
+        receivedJsonLine = receivedJsonFile.readline()
+        if not receivedJsonLine: # no more received line
+            eprintf('ERROR: Missing output JSON in file %s, line %d\n', receivedFileName, line)
+            sys.exit(1)
+        expectedJson = expectedData['output_message']
+        receivedJson = json.loads(receivedJsonLine)
+        timingsLine = timingsFile.readline() if timingsFile else None
+        latency = (json.loads(timingsLine).get('latency') or 0) if timingsLine and timingsLine.strip() else 0
+
+        if dialogResult is None or dialogResult['dialog_id'] != expectedData['dialog_id']:
+            if dialogResult is not None:
+                checkDialogBudget(dialogResult, dialogMaxMs)
+                yield dialogResult
+            dialogResult = createDialogResult(expectedData['dialog_id'])
+            dialogMaxMs = None
+        dialogMaxMs = expectedData.get('dialog_max_ms', dialogMaxMs)
+
+        differences = addLineResult(dialogResult, line, compareJson(expectedJson, receivedJson, None, matchers), latency, maxMs=getTurnBudget(expectedData, defaultMaxMs))
+        printLineResult(line, differences, expectedJson, receivedJson, verbose)
+
+    if dialogResult is not None:
+        checkDialogBudget(dialogResult, dialogMaxMs)
+        yield dialogResult
+    if receivedJsonFile.readline(): eprintf('ERROR: More than expected lines in file %s, line %d\n', receivedFileName, line)
+
+def openTimingsFile(receivedFileName):
+    """Returns the opened file with latencies of the received responses or None if there is no such file"""
+    timingsFileName = getTimingsFileName(receivedFileName)
+    return open(timingsFileName, 'r') if os.path.exists(timingsFileName) else None
+
+def getTestName(expectedFileName):
+    return re.sub(r"\.[^\.]*$", "", os.path.basename(expectedFileName))
+
+def getTestFilePairs(expectedDirectory, receivedDirectory, receivedExtension):
+    """Returns sorted list of (expected file, received file) for all .test files in the directory,
+    received file has the same name with the received extension"""
+    testFilePairs = []
+    for expectedFileName in sorted(os.listdir(expectedDirectory)):
+        if not expectedFileName.endswith('.test'): continue
+        receivedFileName = os.path.join(receivedDirectory, getTestName(expectedFileName) + receivedExtension)
+        testFilePairs.append((os.path.join(expectedDirectory, expectedFileName), receivedFileName))
+    return testFilePairs
+
+def evaluateTestFile(verbose, defaultMaxMs, testFilePair):
+    """Evaluates one pair of files, returns {'name', 'dialogs': [dialog results], 'dialogs_failed', 'lines_failed', 'time', 'output'},
+    printed output is returned instead of printed, so the files can be evaluated in parallel"""
+    expectedFileName, receivedFileName = testFilePair
+    fileResult = {'name': getTestName(expectedFileName), 'dialogs': [], 'dialogs_failed': 0, 'lines_failed': 0}
+    timeStart = time.time()
+    timingsFile = None
+    stdout = sys.stdout
+    sys.stdout = StringIO.StringIO()
+    try:
+        printf(SEPARATOR)
+        printf('-- TEST: ' + fileResult['name'] + '\n')
+        printf(SEPARATOR)
+        timingsFile = openTimingsFile(receivedFileName)
+        with open(expectedFileName, "r") as expectedJsonFile:
+            with open(receivedFileName, "r") as receivedJsonFile:
+                for dialogResult in evaluateDialogs(expectedJsonFile, receivedJsonFile, receivedFileName, verbose, timingsFile, defaultMaxMs):
+                    if dialogResult['failures']:
+                        fileResult['dialogs_failed'] += 1
+                        fileResult['lines_failed'] += dialogResult['failures']
+                    printDialogResult(dialogResult, verbose)
+                    fileResult['dialogs'].append(dialogResult)
+    except IOError as ioError:
+        eprintf('ERROR: Cannot open test file %s\n', ioError.filename)
+        sys.exit(1)
+    finally:
+        if timingsFile: timingsFile.close()
+        fileResult['output'] = sys.stdout.getvalue()
+        sys.stdout = stdout
+    fileResult['time'] = time.time() - timeStart
+    return fileResult
+
+def evaluateDirectories(expectedDirectory, receivedDirectory, receivedExtension, outputFileName, summaryFileName=None, jobs=None, verbose=False, defaultMaxMs=None):
+    """Evaluates all test files of the directory in 'jobs' processes, writes one xml report with testsuite for each dialog of each file
+    and prints (and optionally saves as json) summary of the files"""
+    testFilePairs = getTestFilePairs(expectedDirectory, receivedDirectory, receivedExtension)
+    if not testFilePairs:
+        eprintf('ERROR: No .test files in directory %s\n', expectedDirectory)
+        sys.exit(1)
+    fileResults = mapFiles(partial(evaluateTestFile, verbose, defaultMaxMs), testFilePairs, jobs)
+
+    outputXmlWriter = ReportXMLWriter(outputFileName, os.path.basename(os.path.normpath(expectedDirectory)))
+    nDialogs = 0
+    nDialogsFailed = 0
+    for fileResult in fileResults:
+        sys.stdout.write(fileResult['output'])
+        for dialogResult in fileResult['dialogs']:
+            outputXmlWriter.writeDialog(dialogResult, fileResult['name'])
+        nDialogs += len(fileResult['dialogs'])
+        nDialogsFailed += fileResult['dialogs_failed']
+    outputXmlWriter.close()
+    sys.stdout.flush()
+
+    printf('\n' + SEPARATOR)
+    for fileResult in fileResults:
+        printf('-- FILE: %s, DIALOGS: %d, FAILED DIALOGS: %d, FAILED LINES: %d, TIME: %.3f s\n', fileResult['name'],
+               len(fileResult['dialogs']), fileResult['dialogs_failed'], fileResult['lines_failed'], fileResult['time'])
+    printSummary(nDialogs, nDialogsFailed)
+
+    if summaryFileName:
+        summaryJSON = [{'name': fileResult['name'], 'dialogs': len(fileResult['dialogs']), 'dialogs_failed': fileResult['dialogs_failed'],
+                        'lines_failed': fileResult['lines_failed'], 'time': round(fileResult['time'], 3)} for fileResult in fileResults]
+        with open(summaryFileName, 'w') as summaryFile:
+            summaryFile.write(json.dumps(summaryJSON, indent=4))
+    return nDialogsFailed
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Compares all dialog flows from given files and generate xml report', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
-    parser.add_argument('expectedFileName', help='file with expected JSONs (One at each line at key \'output_message\')')
-    parser.add_argument('receivedFileName', help='file with received JSONs')
+    parser.add_argument('expectedFileName', help='file with expected JSONs (One at each line at key \'output_message\') or directory with .test files')
+    parser.add_argument('receivedFileName', help='file with received JSONs or directory with received files (named as the .test files)')
     # optional arguments
     parser.add_argument('-o','--output', required=False, help='name of generated xml file', default='test.junit.xml')
-    parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
+    parser.add_argument('-re','--received_extension', required=False, help='extension of the received files in the directory', default='.out')
+    parser.add_argument('-s','--summary', required=False, help='name of generated json file with the summary of each test file (directories only)')
+    parser.add_argument('-j','--jobs', required=False, help='number of processes evaluating test files in parallel (directories only)')
+    parser.add_argument('-mm','--max_ms', required=False, type=float, default=CHECK_MESSAGES_TIME_MAX * 1000, help='latency budget in milliseconds of the turns without max_ms (0 for no budget)')
+    parser.add_argument('-v','--verbose', required=False, help='verbosity (prints also passed lines and whole outputs of failed lines)', action='store_true')
     args = parser.parse_args(sys.argv[1:])
 
     VERBOSE = args.verbose
 
-    testName = re.sub(r"\.[^\.]*$", "", os.path.basename(args.expectedFileName))
-
-    # expected JSON
-    with open(args.expectedFileName, "r") as expectedJsonFile:
-        # received JSON
-        with open(args.receivedFileName, "r") as receivedJsonFile:
-
-            # init whole test
-            nDialogs = 0
-            nDialogsFailed = 0
-            firstFailedLine = None
-            timeStart = time.time()
-
-            # XML (whole test)
-            outputXml = LET.Element('testsuites')
-
-            # print (whole test)
-            printf('--------------------------------------------------------------------------------\n')
-            printf('-- TEST: ' + testName + '\n')
-            printf('--------------------------------------------------------------------------------\n')
-
-            # XML (new dialouge)
-            dialogXml = LET.Element('testsuite')
-
-            expectedJsonLine = expectedJsonFile.readline()
-            receivedJsonLine = receivedJsonFile.readline()
-
-            line = 0
-            dialogId = 0
-            # for every line
-            while expectedJsonLine:
-                line += 1;
-                if not receivedJsonLine: # no more received line
-                    eprintf('ERROR: Missing output JSON in file %s, line %d', args.receivedFileName, line)
-                    sys.exit(1)
-                expectedData = json.loads(expectedJsonLine)
-                expectedJson = expectedData['output_message']
-                receivedJson = json.loads(receivedJsonLine)
-
-                if (dialogId == 0 or dialogId != expectedData['dialog_id']):
-
-                    if nDialogs > 0:
-                        # end previous dialog
-                        printf('--------------------------------------------------------------------------------\n')
-                        if nFailuresInDialog: # at least one failure in this dialog
-                            printf('-- TEST RESULT: FAILED, TOTAL FAILURES: %d, LINE OF THE FIRST FAILURE: %d\n', nFailuresInDialog, firstFailedLine)
-                            nDialogsFailed += 1
-                        else:
-                            printf('-- TEST RESULT: OK\n')
-                        printf('--------------------------------------------------------------------------------\n')
-
-                        # XML previous dialog
-                        dialogXml.attrib['name'] = 'dialog ' + str(dialogId)
-                        dialogXml.attrib['tests'] = str(nTestsinDialog)
-                        dialogXml.attrib['failures'] = str(nFailuresInDialog)
-                        dialogXml.attrib['time'] = str(time.time() - timeDialogStart)
-                        outputXml.append(dialogXml)
-
-                    # init new dialog
+    if os.path.isdir(args.expectedFileName):
+        if not os.path.isdir(args.receivedFileName):
+            eprintf('ERROR: %s is not a directory\n', args.receivedFileName)
+            sys.exit(1)
+        evaluateDirectories(args.expectedFileName, args.receivedFileName, args.received_extension, args.output, args.summary, args.jobs, VERBOSE, args.max_ms or None)
+        sys.exit(0)
+
+    testName = getTestName(args.expectedFileName)
+
+    # init whole test
+    nDialogs = 0
+    nDialogsFailed = 0
+
+    # print (whole test)
+    printf(SEPARATOR)
+    printf('-- TEST: ' + testName + '\n')
+    printf(SEPARATOR)
+
+    try:
+        # expected JSON
+        with open(args.expectedFileName, "r") as expectedJsonFile:
+            # received JSON
+            with open(args.receivedFileName, "r") as receivedJsonFile:
+                # XML (whole test), dialogs are written as they are evaluated
+                outputXmlWriter = ReportXMLWriter(args.output, testName)
+                timingsFile = openTimingsFile(args.receivedFileName)
+                for dialogResult in evaluateDialogs(expectedJsonFile, receivedJsonFile, args.receivedFileName, VERBOSE, timingsFile, args.max_ms or None):
                     nDialogs += 1
-                    nTestsinDialog = 0
-                    nFailuresInDialog = 0
-                    timeDialogStart = time.time()
-                    dialogId = expectedData['dialog_id']
-
-                    # XML (new dialouge)
-                    dialogXml = LET.Element('testsuite')
-
-                nTestsinDialog += 1
-                timeLineStart = time.time()
-                checkMessagesTime = 0
-                failureData = {'expectedElement': "", 'receivedElement': ""}
-
-                # XML
-                lineXml = LET.Element('testcase')
-                lineXml.attrib['name'] = 'line ' + str(line)
-                lineXml.attrib['time'] = str(time.time() - timeLineStart)
-                dialogXml.append(lineXml)
-
-                if not areSame(expectedJson, receivedJson, failureData, "root"):
-                    # line failure
-                    lineXml.append(createLineFailureXML(failureData))
-
-                    nFailuresInDialog += 1 # in this file
-                    if firstFailedLine is None:
-                        firstFailedLine = line
-
-                    printf('EXPECTED OUTPUT: ' + json.dumps(expectedJson, indent=4, ensure_ascii=False).encode('utf8') + '\n')
-                    printf('RECEIVED OUTPUT: ' + json.dumps(receivedJson, indent=4, ensure_ascii=False).encode('utf8') + '\n')
-                    resultText = 'FAILED'
-
-                else:
-                    resultText = 'OK'
-
-                printf('  LINE: %d, RESULT: %s, TIME: %.2f sec\n', line, resultText, checkMessagesTime)
-
-                expectedJsonLine = expectedJsonFile.readline()
-                receivedJsonLine = receivedJsonFile.readline()
-
-            # end for each line
-
-            if receivedJsonLine: eprintf('ERROR: More than expected lines in file %s, line %d', receivedFileName, line)
-
-        # close files
-
-    printf('\n--------------------------------------------------------------------------------\n')
-    printf('--------------------------------------------------------------------------------\n')
-    if nDialogsFailed: printf('-- SUMMARY - DIALOUGES: %s, RESULT: FAILED, FAILED DIALOGS: %d\n', nDialogs, nDialogsFailed)
-    else: printf('-- SUMMARY - DIALOUGES: %s, RESULT: OK\n', nDialogs)
-    printf('--------------------------------------------------------------------------------\n')
-
-    outputXml.attrib['name'] = testName
-    outputXml.attrib['tests'] = str(nDialogs)
-    outputXml.attrib['failures'] = str(nDialogsFailed)
-    outputXml.attrib['timestamp'] = '{0:%Y-%b-%d %H:%M:%S}'.format(datetime.datetime.now())
-    outputXml.attrib['time'] = str(time.time() - timeStart)
-
-    with open(args.output, "w") as outputFile:
-        outputFile.write(LET.tostring(outputXml, pretty_print=True, encoding='utf8'))
+                    if dialogResult['failures']:
+                        nDialogsFailed += 1
+                    printDialogResult(dialogResult, VERBOSE)
+                    outputXmlWriter.writeDialog(dialogResult)
+                outputXmlWriter.close()
+                if timingsFile: timingsFile.close()
+    except IOError as ioError:
+        eprintf('ERROR: Cannot open test file %s\n', ioError.filename)
+        sys.exit(1)
+
+    printSummary(nDialogs, nDialogsFailed)
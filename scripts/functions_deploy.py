@@ -13,14 +13,84 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import os, json, sys, argparse, requests
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
+import os, json, sys, argparse, urllib
+from multiprocessing.pool import ThreadPool
 from cfgCommons import Cfg
-from wawCommons import printf, eprintf, getFilesAtPath
-import urllib3
+from httpCommons import HttpClient, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+from wawCommons import printf, eprintf, getFilesAtPath, initStreams
+from workspaceCommons import getContentHash
+
+DEFAULT_CLOUDFUNCTIONS_URL = 'https://openwhisk.ng.bluemix.net/api/v1/namespaces'
+# number of actions uploaded in parallel
+FUNCTIONS_JOBS = 8
+
+def _quote(name):
+    return urllib.quote(name.encode('utf8') if isinstance(name, unicode) else name, safe='')
+
+def getPackageUrl(namespacesUrl, namespace, package):
+    return '/'.join([namespacesUrl, _quote(namespace), 'packages', _quote(package)])
+
+def getActionUrl(namespacesUrl, namespace, package, actionName):
+    return '/'.join([namespacesUrl, _quote(namespace), 'actions', _quote(package), _quote(actionName)])
+
+def loadManifest(manifestFileName):
+    """Returns dict {url of the deployed package or action: hash of its content} or empty dict if there is no manifest"""
+    if not manifestFileName or not os.path.exists(manifestFileName):
+        return {}
+    try:
+        with open(manifestFileName, 'r') as manifestFile:
+            return json.load(manifestFile)
+    except (IOError, ValueError):
+        eprintf('WARNING: Cannot load functions manifest %s, deploying all functions\n', manifestFileName)
+        return {}
+
+def saveManifest(manifestFileName, manifest):
+    manifestDirectory = os.path.dirname(manifestFileName)
+    if manifestDirectory and not os.path.exists(manifestDirectory):
+        os.makedirs(manifestDirectory)
+    with open(manifestFileName, 'w') as manifestFile:
+        manifestFile.write(json.dumps(manifest, indent=4, sort_keys=True))
+
+def loadFunction(functionFileName):
+    """Returns body of the request creating the action from the file"""
+    with open(functionFileName, 'r') as functionFile:
+        return {"exec": {"kind": "nodejs:default", "code": functionFile.read()}}
+
+def deployFunction(client, url, payload):
+    """Creates or replaces the package or action, returns error message or None"""
+    response = client.put(url, params={'overwrite': 'true'}, headers={'Content-Type': 'application/json'}, data=json.dumps(payload), verify=False)
+    try:
+        responseJson = response.json()
+    except ValueError:
+        responseJson = {'error': '%d %s' % (response.status_code, response.text)}
+    return responseJson['error'] if 'error' in responseJson else None
+
+def deployFunctions(client, actions, manifest, jobs=FUNCTIONS_JOBS):
+    """Uploads actions [(url, payload)] whose content differs from the manifest in 'jobs' parallel requests,
+    updates the manifest with the uploaded actions, returns (list of uploaded urls, list of (url, error) of failed uploads)"""
+    changedActions = [(url, payload) for url, payload in actions if manifest.get(url) != getContentHash(payload)]
+    if not changedActions:
+        return [], []
+    pool = ThreadPool(min(jobs, len(changedActions)))
+    try:
+        errors = pool.map(lambda action: deployFunction(client, action[0], action[1]), changedActions)
+    finally:
+        pool.close()
+        pool.join()
+    uploaded = []
+    failed = []
+    for (url, payload), error in zip(changedActions, errors):
+        if error:
+            manifest.pop(url, None)
+            failed.append((url, error))
+        else:
+            manifest[url] = getContentHash(payload)
+            uploaded.append(url)
+    return uploaded, failed
 
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: '+ os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Concatenate intents, entities and dialogue jsons to Watson Conversation Service workspace .json format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -30,6 +100,11 @@ if __name__ == '__main__':
     parser.add_argument('-cfname', '--cloudfunctions_username', required=False, help='cloud functions user name')
     parser.add_argument('-cfpswd', '--cloudfunctions_password', required=False, help='cloud functions password')
     parser.add_argument('-cfpack', '--cloudfunctions_package', required=False, help='package name')
+    parser.add_argument('-cfurl', '--cloudfunctions_url', required=False, help='url of the cloud functions namespaces API (default %s)' % DEFAULT_CLOUDFUNCTIONS_URL)
+    parser.add_argument('-cfm', '--cloudfunctions_manifest', required=False, help='file with hashes of the deployed package and actions, unchanged actions are not uploaded again')
+    parser.add_argument('-cfj', '--cloudfunctions_jobs', required=False, help='number of actions uploaded in parallel (default %d)' % FUNCTIONS_JOBS)
+    parser.add_argument('-ht','--http_timeout', required=False, help='timeout of the requests to the service in seconds (default %d)' % DEFAULT_TIMEOUT)
+    parser.add_argument('-hr','--http_retries', required=False, help='number of retries of the requests which failed to connect or were rejected by the service as too many or unavailable (default %d)' % DEFAULT_RETRIES)
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
     config = Cfg(args);
@@ -50,33 +125,49 @@ if __name__ == '__main__':
         printf('ERROR: common_functions  not specified.')
         exit(1)
 
-    requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
-    package_url='https://openwhisk.ng.bluemix.net/api/v1/namespaces/' + config.cloudfunctions_namespace.replace('@', '%40') + '/packages/' + config.cloudfunctions_package+ '?overwrite=true'
-    response = requests.put(package_url, auth=(config.cloudfunctions_username, config.cloudfunctions_password), headers={'Content-Type': 'application/json'}, data='{}')
-    responseJson = response.json()
-    if 'error' in responseJson:
-        eprintf('\nCannot create cloud functions package\nERROR: %s\n', responseJson['error'])
-        if VERBOSE: printf("%s", responseJson)
-        sys.exit(1)
+    # actions are uploaded without verifying the certificate (see deployFunction)
+    client = HttpClient((config.cloudfunctions_username, config.cloudfunctions_password), getattr(config, 'http_timeout', None), getattr(config, 'http_retries', None), warnInsecure=False)
+    namespacesUrl = getattr(config, 'cloudfunctions_url', DEFAULT_CLOUDFUNCTIONS_URL)
+    manifestFileName = getattr(config, 'cloudfunctions_manifest', None)
+    manifest = loadManifest(manifestFileName)
+
+    package_url = getPackageUrl(namespacesUrl, config.cloudfunctions_namespace, config.cloudfunctions_package)
+    if manifest.get(package_url) == getContentHash({}):
+        printf('\nCloud functions package not changed since the last deploy\n')
     else:
-        printf('\nCloud functions package successfully uploaded\n')
+        error = deployFunction(client, package_url, {})
+        if error:
+            eprintf('\nCannot create cloud functions package\nERROR: %s\n', error)
+            sys.exit(1)
+        else:
+            manifest[package_url] = getContentHash({})
+            printf('\nCloud functions package successfully uploaded\n')
 
     filesAtPath = getFilesAtPath(config.common_functions)
 
+    functionFileNames = {} # key: url of the action, value: file name
+    actions = []
     for functionFileName in filesAtPath:
-        fname=os.path.basename(functionFileName);
-        function_url = 'https://openwhisk.ng.bluemix.net/api/v1/namespaces/' + config.cloudfunctions_namespace + '/actions/' + config.cloudfunctions_package + '/' + fname + '?overwrite=true'
-        code = open(os.path.join(config.common_functions, functionFileName), 'r').read()
-        payload = {"exec": {"kind": "nodejs:default", "code": code}}
-
-        response = requests.put(function_url, auth=(config.cloudfunctions_username, config.cloudfunctions_password),
-                                headers={'Content-Type': 'application/json'}, data=json.dumps(payload), verify=False)
-        responseJson = response.json()
-        if 'error' in responseJson:
-            eprintf('Cannot create cloud function\nERROR: %s\n', responseJson['error'])
-            if VERBOSE: printf("%s", responseJson)
+        function_url = getActionUrl(namespacesUrl, config.cloudfunctions_namespace, config.cloudfunctions_package, os.path.basename(functionFileName))
+        try:
+            actions.append((function_url, loadFunction(functionFileName)))
+        except IOError:
+            eprintf('ERROR: Cannot read cloud function file %s\n', functionFileName)
             sys.exit(1)
-        else:
-            printf('Cloud functions %s successfully uploaded.\n', functionFileName)
+        functionFileNames[function_url] = functionFileName
+
+    jobs = int(getattr(config, 'cloudfunctions_jobs')) if hasattr(config, 'cloudfunctions_jobs') else FUNCTIONS_JOBS
+    uploaded, failed = deployFunctions(client, actions, manifest, jobs)
+    for function_url in uploaded:
+        printf('Cloud functions %s successfully uploaded.\n', functionFileNames[function_url])
+    if VERBOSE: printf('%d cloud functions not changed since the last deploy\n', len(actions) - len(uploaded) - len(failed))
+    # uploaded actions are kept in the manifest even if other uploads fail
+    if manifestFileName: saveManifest(manifestFileName, manifest)
+    if failed:
+        for function_url, error in failed:
+            eprintf('Cannot create cloud function %s\nERROR: %s\n', functionFileNames[function_url], error)
+        sys.exit(1)
+
+    if VERBOSE: client.printStatistics()
 
     printf('\nFINISHING: ' + os.path.basename(__file__) + '\n')
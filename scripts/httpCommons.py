@@ -0,0 +1,257 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time, random, threading, urlparse, email.utils
+from wawCommons import printf, eprintf
+
+DEFAULT_TIMEOUT = 60 # in seconds, for connecting and for each read
+DEFAULT_RETRIES = 3
+# status codes of responses which are sent again (rate limiting and temporary errors of the service)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# methods of requests which can be sent again after a server error (sending them twice has the same effect as once),
+# messages (POST to .../message) are answered again without changes of the workspace
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+RETRY_DELAY_INITIAL = 1 # in seconds
+RETRY_DELAY_MAX = 60 # in seconds
+# maximal number of kept open connections per host (should be at least the number of parallel requests)
+POOL_SIZE = 32
+# rate limiting (rate is multiplied by the slowdown after each throttled request and increased by the recovery
+# fraction of the maximal rate after each successful request)
+RATE_SLOWDOWN = 0.5
+RATE_RECOVERY = 0.05
+RATE_MIN = 0.1 # in requests per second
+# maximal number of re-sends of a throttled request when the rate is limited (rate limiter slows down, so it converges)
+THROTTLED_RETRIES_MAX = 20
+
+
+def getRetryAfter(response):
+    """Returns delay in seconds requested by the Retry-After header of the response or None"""
+    retryAfter = response.headers.get('Retry-After')
+    if not retryAfter:
+        return None
+    try:
+        return max(float(retryAfter), 0)
+    except ValueError:
+        retryDate = email.utils.parsedate_tz(retryAfter)
+        if retryDate is None:
+            return None
+        return max(email.utils.mktime_tz(retryDate) - time.time(), 0)
+
+
+def isIdempotent(method, url):
+    """Returns True if sending the request twice has the same effect as sending it once (IDEMPOTENT_METHODS and messages)"""
+    return method.upper() in IDEMPOTENT_METHODS or (method.upper() == 'POST' and urlparse.urlparse(url).path.rstrip('/').endswith('/message'))
+
+
+def isRetried(method, url, response):
+    """Returns True if the request answered by the response (with one of RETRY_STATUS_CODES) can be sent again,
+    server errors are retried only for idempotent requests, other requests only when throttled (429 or 503 with Retry-After)"""
+    if response.status_code not in RETRY_STATUS_CODES:
+        return False
+    if response.status_code == 429 or (response.status_code == 503 and response.headers.get('Retry-After')):
+        return True
+    return isIdempotent(method, url)
+
+
+def isErrorRetried(method, url, error):
+    """Returns True if the request which failed with the connection error or the read timeout can be sent again,
+    idempotent requests are always retried, other requests only if the connection was not established (nothing was sent)"""
+    if isIdempotent(method, url):
+        return True
+    import requests
+    from requests.packages.urllib3.exceptions import NewConnectionError
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class RateLimiter(object):
+    """ Token bucket limiting the rate of requests of all threads.
+
+    Tokens are added with the rate (requests per second) up to the burst size and each request takes one token.
+    The rate is lowered when the service throttles a request and slowly recovers to the maximal rate. """
+
+
+    def __init__(self, rate, burst=None):
+        self._maxRate = float(rate)
+        self._rate = self._maxRate
+        self._burst = float(burst) if burst else max(1.0, self._maxRate)
+        self._tokens = self._burst
+        self._time = time.time()
+        self._lock = threading.Lock()
+
+
+    def acquire(self):
+        """ Waits until a request can be sent """
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self._tokens + (now - self._time) * self._rate, self._burst)
+                self._time = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self._rate
+            time.sleep(delay)
+
+
+    def slowDown(self):
+        with self._lock:
+            self._rate = max(self._rate * RATE_SLOWDOWN, RATE_MIN)
+            self._tokens = min(self._tokens, 0) # no more bursts until the rate recovers
+
+
+    def speedUp(self):
+        with self._lock:
+            self._rate = min(self._rate + self._maxRate * RATE_RECOVERY, self._maxRate)
+
+
+    def getRate(self):
+        return self._rate
+
+
+class HttpClient(object):
+    """ Client of a service shared by all requests of a script.
+
+    Keeps the connections open (one session with a connection pool), sends the credentials and the timeout
+    with every request, sends again requests which failed to connect, timed out or were answered by RETRY_STATUS_CODES
+    (after the delay from the Retry-After header or an exponentially growing randomized delay, server errors and
+    timeouts only of idempotent requests, see isRetried and isErrorRetried) and counts the requests, their sizes and latencies.
+    Can be used from several threads.
+
+    If the rate limiter is given, each request waits for it and the throttled requests (429) are sent again
+    until they succeed (at most THROTTLED_RETRIES_MAX times), while the limiter lowers the rate.
+
+    The session (and the requests module) is created with the first request, scripts which have nothing
+    to send do not load it. """
+
+
+    def __init__(self, auth=None, timeout=None, retries=None, verify=True, rateLimiter=None, poolSize=POOL_SIZE, warnInsecure=True):
+        self._session = None
+        self._auth = auth
+        self._verify = verify
+        self._poolSize = poolSize
+        self._warnInsecure = warnInsecure
+        self._timeout = float(timeout) if timeout else DEFAULT_TIMEOUT
+        self._retries = int(retries) if retries is not None else DEFAULT_RETRIES
+        self._rateLimiter = rateLimiter
+        self._lock = threading.Lock()
+        self._statistics = {'requests': 0, 'retries': 0, 'sent_bytes': 0, 'received_bytes': 0, 'latency': 0.0, 'max_latency': 0.0}
+
+
+    def _getSession(self):
+        if self._session is not None:
+            return self._session
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                if not self._warnInsecure:
+                    requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self._poolSize, pool_maxsize=self._poolSize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.auth = self._auth
+                session.verify = self._verify
+                self._retriedErrors = (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout)
+                self._session = session
+            return self._session
+
+
+    def request(self, method, url, **kwargs):
+        """ Sends the request (arguments are the same as of requests.request), returns the last response,
+        the response has attributes latency (in seconds, of all answered attempts without retry delays) and attempts """
+        session = self._getSession()
+        kwargs.setdefault('timeout', self._timeout)
+        data = kwargs.get('data')
+        sentBytes = len(data) if isinstance(data, (str, bytes)) else 0
+        delay = RETRY_DELAY_INITIAL
+        attempt = 0
+        throttledAttempts = 0
+        latency = 0.0
+        while True:
+            attempt += 1
+            if self._rateLimiter:
+                self._rateLimiter.acquire()
+            startTime = time.time()
+            try:
+                response = session.request(method, url, **kwargs)
+            except self._retriedErrors as connectionError:
+                self._count(sentBytes, 0, time.time() - startTime, attempt > 1)
+                if attempt - throttledAttempts > self._retries or not isErrorRetried(method, url, connectionError):
+                    raise
+                eprintf('WARNING: %s %s failed (%s), sending again\n', method, url, connectionError)
+                retryDelay = None
+            else:
+                attemptLatency = time.time() - startTime
+                latency += attemptLatency
+                self._count(sentBytes, len(response.content), attemptLatency, attempt > 1)
+                if self._rateLimiter:
+                    if response.status_code == 429:
+                        self._rateLimiter.slowDown()
+                        throttledAttempts += 1 # throttled attempts are not counted as retries
+                    elif response.status_code < 400:
+                        self._rateLimiter.speedUp()
+                if not isRetried(method, url, response) or attempt - throttledAttempts > self._retries or throttledAttempts > THROTTLED_RETRIES_MAX:
+                    response.latency = latency
+                    response.attempts = attempt
+                    return response
+                retryDelay = getRetryAfter(response)
+                if retryDelay is None and self._rateLimiter and response.status_code == 429:
+                    retryDelay = 0 # the rate limiter already slowed down
+            if retryDelay is None:
+                retryDelay = random.uniform(delay / 2.0, delay)
+                delay = min(delay * 2, RETRY_DELAY_MAX)
+            time.sleep(retryDelay)
+
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+    def getStatistics(self):
+        with self._lock:
+            return dict(self._statistics)
+
+
+    def printStatistics(self):
+        statistics = self.getStatistics()
+        printf('HTTP REQUESTS: %d (retries: %d), sent: %d B, received: %d B, average latency: %.1f ms, max latency: %.1f ms\n',
+               statistics['requests'], statistics['retries'], statistics['sent_bytes'], statistics['received_bytes'],
+               1000 * statistics['latency'] / statistics['requests'] if statistics['requests'] else 0, 1000 * statistics['max_latency'])
+
+
+    def _count(self, sentBytes, receivedBytes, latency, isRetry):
+        with self._lock:
+            self._statistics['requests'] += 1
+            self._statistics['retries'] += 1 if isRetry else 0
+            self._statistics['sent_bytes'] += sentBytes
+            self._statistics['received_bytes'] += receivedBytes
+            self._statistics['latency'] += latency
+            self._statistics['max_latency'] = max(self._statistics['max_latency'], latency)
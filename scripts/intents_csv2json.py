@@ -14,10 +14,45 @@ limitations under the License.
 """
 
 import json, sys, argparse, os, glob, codecs
-from wawCommons import printf, eprintf, getFilesAtPath, toIntentName
+from functools import partial
+from wawCommons import printf, eprintf, getFilesAtPath, toIntentName, mapFiles, initStreams
 from cfgCommons import Cfg
+from NearDuplicates import MinHashLSH
+
+def processIntentFile(NAME_POLICY, intentsNameCheck, intentFileName):
+    """Converts one intent csv file to the intent json"""
+    intentName = toIntentName(NAME_POLICY, intentsNameCheck, os.path.splitext(os.path.basename(intentFileName))[0])
+    with codecs.open(intentFileName, 'r', encoding='utf8') as intentFile:
+        intent = {}
+        intent['intent'] = intentName
+        examples = []
+        examplesSet = set()
+        for line in intentFile:
+            # remove comments
+            line = line.split('#')[0]
+            line = line.rstrip().lower()
+            if line and not line in examplesSet:
+                examples.append(line)
+                examplesSet.add(line)
+            elif line in examplesSet:
+                printf('Example used twice for the intent %s, omitting:%s /n', intentName, line )
+        intent['examples'] = [{'text':i} for i in examples]
+    return intent
+
+def findNearDuplicates(intents, threshold):
+    """Returns report of near-duplicate examples from different intents (the most similar first)"""
+    index = MinHashLSH(threshold)
+    for intent in intents:
+        for example in intent['examples']:
+            index.add((intent['intent'], example['text']), example['text'])
+    nearDuplicatesJSON = []
+    for example1, example2, similarity in index.getNearDuplicates(lambda example1, example2: example1[0] != example2[0]):
+        nearDuplicatesJSON.append({'similarity': round(similarity, 3),
+                                   'examples': [{'intent': example[0], 'text': example[1]} for example in (example1, example2)]})
+    return nearDuplicatesJSON
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Converts intent csv files to .json format of Watson Conversation Service', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -27,6 +62,8 @@ if __name__ == '__main__':
     parser.add_argument('-od', '--common_outputs_directory', required=False, help='directory where the otputs will be stored (outputs is default)')
     parser.add_argument('-oi', '--common_outputs_intents', help='file with output json with all the intents')
     parser.add_argument('-ni', '--common_intents_nameCheck', action='append', nargs=2, help="regex and replacement for intent name check, e.g. '-' '_' for to replace hyphens for underscores or '$special' '\L' for lowercase")
+    parser.add_argument('-nd', '--common_intents_nearDuplicates', required=False, help='report pairs of examples from different intents with similarity (0-1) at least this threshold, e.g. 0.8 (report is stored next to the output json)')
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of processes converting intent files in parallel')
     parser.add_argument('-s', '--soft', required=False, help='soft name policy - change intents and entities names without error.', action='store_true', default="")
     parser.add_argument('-v','--common_verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
@@ -42,30 +79,22 @@ if __name__ == '__main__':
     if not hasattr(config, 'common_outputs_intents'):
         print('Outputs_intents parameter is not defined, output will be generated to console.')
 
-    intents = []
+    nearDuplicatesThreshold = None
+    if hasattr(config, 'common_intents_nearDuplicates'):
+        try:
+            nearDuplicatesThreshold = float(getattr(config, 'common_intents_nearDuplicates'))
+        except ValueError:
+            pass
+        if nearDuplicatesThreshold is None or not 0 < nearDuplicatesThreshold <= 1:
+            eprintf('ERROR: Near-duplicates threshold has to be a number in (0, 1]: %s\n', getattr(config, 'common_intents_nearDuplicates'))
+            sys.exit(1)
 
     pathList = getattr(config, 'common_intents')
     if hasattr(config, 'common_generated_intents'):
         pathList = pathList + getattr(config, 'common_generated_intents')
 
     filesAtPath = getFilesAtPath(pathList)
-    for intentFileName in sorted(filesAtPath):
-        intentName = toIntentName(NAME_POLICY, args.common_intents_nameCheck, os.path.splitext(os.path.basename(intentFileName))[0])
-        with codecs.open(intentFileName, 'r', encoding='utf8') as intentFile:
-            intent = {}
-            intent['intent'] = intentName
-            examples = []
-            for line in intentFile:
-                # remove comments
-                line = line.split('#')[0]
-                line = line.rstrip().lower()
-                if line and not line in examples:
-                    examples.append(line)
-                elif line in examples:
-                    printf('Example used twice for the intent %s, omitting:%s /n', intentName, line )
-            intent['examples'] = [{'text':i} for i in examples]
-            intents.append(intent)
-
+    intents = mapFiles(partial(processIntentFile, NAME_POLICY, args.common_intents_nameCheck), sorted(filesAtPath), getattr(config, 'common_jobs', None))
 
     if hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_intents'):
         if not os.path.exists(getattr(config, 'common_outputs_directory')):
@@ -76,4 +105,15 @@ if __name__ == '__main__':
     else:
         print(json.dumps(intents, indent=4, ensure_ascii=False, encoding='utf8'))
 
+    if nearDuplicatesThreshold is not None:
+        nearDuplicatesJSON = findNearDuplicates(intents, nearDuplicatesThreshold)
+        printf('Found %d pairs of near-duplicate examples in different intents\n', len(nearDuplicatesJSON))
+        if hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_intents'):
+            nearDuplicatesFileName = os.path.join(getattr(config, 'common_outputs_directory'), os.path.splitext(getattr(config, 'common_outputs_intents'))[0] + '_near_duplicates.json')
+            with codecs.open(nearDuplicatesFileName, 'w', encoding='utf8') as nearDuplicatesFile:
+                nearDuplicatesFile.write(json.dumps(nearDuplicatesJSON, indent=4, ensure_ascii=False, encoding='utf8'))
+            if VERBOSE: printf("Near-duplicates report '%s' was successfully created\n", nearDuplicatesFileName)
+        else:
+            print(json.dumps(nearDuplicatesJSON, indent=4, ensure_ascii=False, encoding='utf8'))
+
     printf('\nFINISHING: ' + os.path.basename(__file__) + '\n')
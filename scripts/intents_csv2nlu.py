@@ -13,39 +13,19 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import sys, argparse, os, re
-from wawCommons import printf, eprintf, toIntentName, toEntityName
-
-def getEntities(entityDir, NAME_POLICY):
-    """Retrieves entity value to entity name mapping from the directory with entity lists"""
-    entities = {}
-    for entityFileName in os.listdir(entityDir):
-        entityName = toEntityName(NAME_POLICY, args.common_entities_nameCheck, os.path.splitext(entityFileName)[0])
-        with open(os.path.join(args.entityDir, entityFileName), "r") as entityFile:
-            for line in entityFile.readlines():
-                # remove comments
-                line = line.split('#')[0]
-                line = line.rstrip().lower()
-                for entity in line.split(';'):
-                    entities[entity] = entityName
-    return entities
-
-def tagEntities(line, entities):
-    """Tags entities in the text using names from the entities (entity value to entity name) dictionary"""
-    newline = ""
-    words = re.findall('[\w-]+', line, re.UNICODE)
-    for word in words:
-        if word.lower() in entities:
-            line = re.sub(word, "<" + entities[word.lower()] + ">" + word + "</" + entities[word.lower()] + ">", line, re.UNICODE)
-    return line
+import sys, argparse, os
+from wawCommons import printf, eprintf, toIntentName, initStreams
+from EntityDictionary import EntityDictionary
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Converts intents files to one file in NLU tsv format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('intentsDir', help='directory with intents files - all of them will be included in output file')
     parser.add_argument('output', help='file with output intents in NLU data .tsv format')
     # optional arguments
     parser.add_argument('-e', '--entityDir', required=False, help='directory with lists of entities in csv files (file names = entity names), used to tag those entities in output')
+    parser.add_argument('-ec', '--entitiesCache', required=False, help='file with compiled entities, it is created if it does not exist and rebuilt if any entity file changes')
     parser.add_argument('-l', '--list', required=False, help='file with list of all intents (if it should be generated)')
     parser.add_argument('-m', '--map', required=False, help='file with domain to intents map (if it should be generated)')
     parser.add_argument('-p', '--prefix', required=False, help='prefix for all generated intents (if it should be added)')
@@ -60,7 +40,7 @@ if __name__ == '__main__':
     PREFIX = toIntentName(NAME_POLICY, args.common_intents_nameCheck, args.prefix)
 
     if args.entityDir:
-        entities = getEntities(args.entityDir, NAME_POLICY)
+        entityTagger = EntityDictionary(args.entityDir, NAME_POLICY, args.common_entities_nameCheck, args.entitiesCache).getTagger()
 
     with open(args.output, 'w') as outputFile:
         # process intents
@@ -74,7 +54,7 @@ if __name__ == '__main__':
                     # remove comments
                     line = line.split('#')[0]
                     if args.entityDir:
-                        line = tagEntities(line, entities)
+                        line = entityTagger.tag(line)
                     if line:
                         outputFile.write("1\t" + intentName + "\t" + line)
     if VERBOSE: printf("Intents file '%s' was successfully created\n", args.output)
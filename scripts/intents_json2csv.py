@@ -14,9 +14,10 @@ limitations under the License.
 """
 
 import json, sys, argparse, os
-from wawCommons import printf, eprintf, toIntentName
+from wawCommons import printf, eprintf, toIntentName, initStreams
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Decompose Bluemix conversation service intents in .json format to intent files in .csv format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('intents', help='file with intents in .json format')
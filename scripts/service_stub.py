@@ -0,0 +1,276 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, json, sys, time, random, uuid, urllib, urlparse, argparse, threading, gzip, io
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from wawCommons import printf, eprintf, initStreams
+from workspaceCommons import getContentHash, WORKSPACE_ITEMS
+
+DEFAULT_PORT = 8080
+# seconds requested in the Retry-After header of the injected throttled responses
+RETRY_AFTER = 1
+
+
+class StubService(object):
+    """ Local stand-in for the conversation and cloud functions services used by the scripts.
+
+    Keeps workspaces in memory (whole workspace and item endpoints), reports them as Training for the given time
+    after each change, answers messages with responses recorded in .test files (by the whole input message
+    or by the input text) and can delay the responses and inject errors and throttled (429) responses. """
+
+
+    def __init__(self, latency=0, latencyJitter=0, errorRate=0, throttleRate=0, trainingTime=0, seed=None):
+        self._latency = latency # in seconds
+        self._latencyJitter = latencyJitter # in seconds
+        self._errorRate = errorRate
+        self._throttleRate = throttleRate
+        self._trainingTime = trainingTime # in seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.workspaces = {} # key: workspace id, value: workspace json
+        self.functions = {} # key: path of the package or action, value: json
+        self._trainedTimes = {} # key: workspace id, value: time when the training ends
+        self._responses = {} # key: hash of the input message, value: output message
+        self._textResponses = {} # key: input text, value: output message
+        self.statistics = {'requests': 0, 'messages': 0, 'errors': 0, 'throttled': 0}
+
+
+    def loadTests(self, testFileName):
+        """ Adds responses recorded in the test file (lines with input_message and output_message) """
+        with open(testFileName, 'r') as testFile:
+            for line in testFile:
+                if not line.strip(): continue
+                testJSON = json.loads(line)
+                if 'input_message' not in testJSON or 'output_message' not in testJSON: continue
+                inputJSON = testJSON['input_message']
+                self._responses[getContentHash(inputJSON)] = testJSON['output_message']
+                self._textResponses.setdefault(inputJSON.get('input', {}).get('text', u''), testJSON['output_message'])
+
+
+    def getDelay(self):
+        return max(self._latency + self._random.uniform(-self._latencyJitter, self._latencyJitter), 0)
+
+
+    def handle(self, method, path, query, body):
+        """ Returns (status code, response json, headers) of the request """
+        with self._lock:
+            self.statistics['requests'] += 1
+            injection = self._random.random()
+            if injection < self._throttleRate:
+                self.statistics['throttled'] += 1
+                return 429, {'error': 'Rate limit exceeded', 'code': 429}, {'Retry-After': str(RETRY_AFTER)}
+            if injection < self._throttleRate + self._errorRate:
+                self.statistics['errors'] += 1
+                return 500, {'error': 'Internal server error', 'code': 500}, {}
+            segments = [urllib.unquote(segment).decode('utf8') for segment in path.strip('/').split('/')]
+            if 'workspaces' in segments:
+                return self._handleWorkspaces(method, segments[segments.index('workspaces') + 1:], query, body) + ({},)
+            if 'namespaces' in segments:
+                return self._handleFunctions(method, segments[segments.index('namespaces') + 1:], body) + ({},)
+            return 404, {'error': 'Resource not found', 'code': 404}, {}
+
+
+    def _handleWorkspaces(self, method, segments, query, body):
+        if not segments:
+            if method != 'POST':
+                return 405, {'error': 'Method not allowed', 'code': 405}
+            workspaceId = unicode(uuid.uuid4())
+            self._setWorkspace(workspaceId, body or {})
+            return 201, self._getWorkspaceStatus(workspaceId)
+        workspaceId = segments[0]
+        if workspaceId not in self.workspaces:
+            return 404, {'error': 'Resource not found', 'code': 404}
+        if len(segments) == 1:
+            if method == 'GET':
+                if query.get('export') == ['true']:
+                    return 200, dict(self.workspaces[workspaceId], **self._getWorkspaceStatus(workspaceId))
+                return 200, self._getWorkspaceStatus(workspaceId)
+            if method == 'POST':
+                workspace = dict(self.workspaces[workspaceId])
+                workspace.update(body or {})
+                self._setWorkspace(workspaceId, workspace)
+                return 200, self._getWorkspaceStatus(workspaceId)
+            if method == 'DELETE':
+                del self.workspaces[workspaceId]
+                return 200, {}
+        elif segments[1] == 'message' and method == 'POST':
+            return 200, self._getMessageResponse(body or {})
+        else:
+            return self._handleItems(workspaceId, method, segments[1:], body or {})
+        return 405, {'error': 'Method not allowed', 'code': 405}
+
+
+    def _handleItems(self, workspaceId, method, segments, body):
+        itemKeys = dict(WORKSPACE_ITEMS)
+        section = segments[0]
+        if section not in itemKeys:
+            return 404, {'error': 'Resource not found', 'code': 404}
+        itemKey = itemKeys[section]
+        workspace = self.workspaces[workspaceId]
+        items = workspace.setdefault(section, [])
+        if len(segments) == 1 and method == 'POST':
+            if any(item[itemKey] == body.get(itemKey) for item in items):
+                return 409, {'error': 'Item already exists', 'code': 409}
+            items.append(body)
+            self._setWorkspace(workspaceId, workspace)
+            return 201, body
+        indexes = [index for index, item in enumerate(items) if len(segments) == 2 and item[itemKey] == segments[1]]
+        if not indexes:
+            return 404, {'error': 'Resource not found', 'code': 404}
+        if method == 'POST':
+            item = dict(items[indexes[0]])
+            if section == 'counterexamples': # updated by the text without the prefix
+                body = {'new_text': body.get('text', item['text'])}
+            for key, value in body.items():
+                if not key.startswith('new_'): continue
+                if value is None:
+                    item.pop(key[len('new_'):], None)
+                else:
+                    item[key[len('new_'):]] = value
+            items[indexes[0]] = item
+            self._setWorkspace(workspaceId, workspace)
+            return 200, item
+        if method == 'DELETE':
+            del items[indexes[0]]
+            self._setWorkspace(workspaceId, workspace)
+            return 200, {}
+        return 405, {'error': 'Method not allowed', 'code': 405}
+
+
+    def _handleFunctions(self, method, segments, body):
+        if method != 'PUT':
+            return 405, {'error': 'Method not allowed', 'code': 405}
+        self.functions['/'.join(segments)] = body
+        return 200, {'name': segments[-1], 'namespace': segments[0]}
+
+
+    def _setWorkspace(self, workspaceId, workspace):
+        workspace['workspace_id'] = workspaceId
+        self.workspaces[workspaceId] = workspace
+        self._trainedTimes[workspaceId] = time.time() + self._trainingTime
+
+
+    def _getWorkspaceStatus(self, workspaceId):
+        return {'workspace_id': workspaceId, 'name': self.workspaces[workspaceId].get('name'),
+                'status': 'Available' if time.time() >= self._trainedTimes[workspaceId] else 'Training'}
+
+
+    def _getMessageResponse(self, inputJSON):
+        self.statistics['messages'] += 1
+        outputJSON = self._responses.get(getContentHash(inputJSON))
+        if outputJSON is None:
+            outputJSON = self._textResponses.get(inputJSON.get('input', {}).get('text', u''))
+        if outputJSON is None:
+            outputJSON = {'input': inputJSON.get('input', {}), 'intents': [], 'entities': [],
+                          'output': {'text': [], 'log_messages': [], 'nodes_visited': []}, 'context': inputJSON.get('context', {})}
+        elif not outputJSON.get('context'):
+            # the service always answers with a context, the recording may lack it
+            outputJSON = dict(outputJSON, context=inputJSON.get('context', {}))
+        return outputJSON
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+    def __init__(self, serverAddress, service):
+        HTTPServer.__init__(self, serverAddress, StubRequestHandler)
+        self.service = service
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keeps the connections open
+    wbufsize = -1 # headers and body are sent together (flushed after each request)
+    disable_nagle_algorithm = True
+
+
+    def _handle(self):
+        url = urlparse.urlparse(self.path)
+        length = int(self.headers.getheader('Content-Length') or 0)
+        data = self.rfile.read(length) if length else None
+        try:
+            if data and self.headers.getheader('Content-Encoding') == 'gzip':
+                data = gzip.GzipFile(fileobj=io.BytesIO(data)).read()
+            body = json.loads(data) if data else None
+        except (ValueError, IOError):
+            self._respond(400, {'error': 'Invalid json', 'code': 400}, {})
+            return
+        time.sleep(self.server.service.getDelay())
+        status, responseJSON, headers = self.server.service.handle(self.command, url.path, urlparse.parse_qs(url.query), body)
+        self._respond(status, responseJSON, headers)
+
+
+    def _respond(self, status, responseJSON, headers):
+        data = json.dumps(responseJSON, ensure_ascii=False).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_DELETE = _handle
+
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def startServer(service, host='127.0.0.1', port=0, verbose=False):
+    """ Starts the server of the service in a background thread, returns the server (server_port is the used port) """
+    server = StubServer((host, port), service)
+    server.verbose = verbose
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    initStreams()
+    parser = argparse.ArgumentParser(description='Runs local stand-in for the conversation service (workspaces, workspace items, status and messages) and the cloud functions service.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('tests', nargs='*', help='test files (.test) with recorded responses to the messages')
+    parser.add_argument('-ho','--host', required=False, default='127.0.0.1', help='host name the server listens on')
+    parser.add_argument('-p','--port', required=False, type=int, default=DEFAULT_PORT, help='port the server listens on')
+    parser.add_argument('-l','--latency', required=False, type=float, default=0, help='delay of each response in milliseconds')
+    parser.add_argument('-lj','--latency_jitter', required=False, type=float, default=0, help='maximal random change of the delay in milliseconds')
+    parser.add_argument('-er','--error_rate', required=False, type=float, default=0, help='fraction of requests answered with status 500')
+    parser.add_argument('-tr','--throttle_rate', required=False, type=float, default=0, help='fraction of requests answered with status 429')
+    parser.add_argument('-tt','--training_time', required=False, type=float, default=0, help='time in seconds the workspace is in the Training status after each change')
+    parser.add_argument('-s','--seed', required=False, type=int, help='seed of the random latency and injected errors')
+    parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
+    args = parser.parse_args(sys.argv[1:])
+
+    service = StubService(args.latency / 1000.0, args.latency_jitter / 1000.0, args.error_rate, args.throttle_rate, args.training_time, args.seed)
+    for testFileName in args.tests:
+        try:
+            service.loadTests(testFileName)
+        except IOError:
+            eprintf('ERROR: Cannot open test file %s\n', testFileName)
+            sys.exit(1)
+    server = StubServer((args.host, args.port), service)
+    server.verbose = args.verbose
+    printf('Conversation url: http://%s:%d/v1/workspaces\n', args.host, server.server_port)
+    printf('Cloud functions url: http://%s:%d/api/v1/namespaces\n', args.host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        printf('REQUESTS: %(requests)d, MESSAGES: %(messages)d, ERRORS: %(errors)d, THROTTLED: %(throttled)d\n', service.statistics)
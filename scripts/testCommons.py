@@ -0,0 +1,468 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re, json, bisect, datetime
+from collections import OrderedDict
+import lxml.etree as LET
+from wawCommons import printf
+
+# maximal length of the expected and received elements in the short description of the difference
+SHORT_ELEMENT_LENGTH = 80
+SEPARATOR = '--------------------------------------------------------------------------------\n'
+# types of the matchers declared in the test files
+MATCHER_TYPES = ('ignore', 'regex', 'tolerance', 'unordered')
+NUMBER_TYPES = (int, long, float)
+# extension of the file with the latencies of the received responses (one json line for each line of the received file)
+TIMINGS_EXTENSION = '.timings.jsonl'
+# upper bounds of the latency histogram buckets in milliseconds (the last bucket is unbounded)
+LATENCY_BUCKETS = [50, 100, 200, 500, 1000, 2000, 5000]
+# default latency budget of each turn in seconds (-mm of the scripts, turns can declare their own budget in max_ms),
+# it is not the timeout of the request, a slow turn is reported as a failure of the budget instead of an error
+CHECK_MESSAGES_TIME_MAX = 5
+
+
+def _toText(element):
+    if isinstance(element, basestring):
+        return element
+    return json.dumps(element, ensure_ascii=False)
+
+
+def _shorten(text):
+    return text if len(text) <= SHORT_ELEMENT_LENGTH else text[:SHORT_ELEMENT_LENGTH - 3] + u'...'
+
+
+class Difference(object):
+    """ The first difference between the expected and the received json.
+
+    Path is a list of dict keys and list indexes leading to the different element. """
+
+
+    def __init__(self, path, message, expectedElement, receivedElement):
+        self.path = path
+        self.message = message
+        self.expectedElement = expectedElement
+        self.receivedElement = receivedElement
+
+
+    def getPathText(self):
+        """ Returns path in the form output.text[0] """
+        pathText = u''
+        for step in self.path:
+            if isinstance(step, int):
+                pathText += u'[%d]' % step
+            else:
+                pathText += (u'.' if pathText else u'') + step
+        return pathText or u'root'
+
+
+    def getFailureMessage(self):
+        return u'%s (%s)' % (self.message, self.getPathText())
+
+
+    def __unicode__(self):
+        return u'%s: %s, expected: %s, received: %s' % (self.getPathText(), self.message.rstrip(u'.'), _shorten(self.expectedElement), _shorten(self.receivedElement))
+
+
+class MatcherNode(object):
+    """ Node of the matcher tree compiled from the matchers declared in a test file.
+
+    Children are indexed by dict keys and list indexes, the child '*' matches any key or index. """
+
+
+    def __init__(self):
+        self.type = None # one of MATCHER_TYPES or None if only the children have matchers
+        self.tolerance = 0
+        self.children = {}
+        self._patterns = {} # key: regex from expected output, value: compiled regex
+
+
+    def getChild(self, step):
+        child = self.children.get(step)
+        return child if child is not None else self.children.get('*')
+
+
+    def getPattern(self, pattern):
+        """ Returns the compiled regex matching the whole received string """
+        compiledPattern = self._patterns.get(pattern)
+        if compiledPattern is None:
+            compiledPattern = self._patterns[pattern] = re.compile(u'(?:%s)\\Z' % pattern, re.UNICODE)
+        return compiledPattern
+
+
+_PATH_STEP = re.compile(r'(?:^|\.)([^.\[\]]+)|\[(\d+|\*)\]')
+
+
+def _parsePath(pathText):
+    """ Returns list of steps of the path in the form output.text[0] (or context.system.* or intents[*]) """
+    steps = []
+    position = 0
+    for match in _PATH_STEP.finditer(pathText):
+        if match.start() != position:
+            break
+        if match.group(1) is not None:
+            steps.append(match.group(1))
+        else:
+            steps.append('*' if match.group(2) == '*' else int(match.group(2)))
+        position = match.end()
+    if not steps or position != len(pathText):
+        raise ValueError(u'Invalid matcher path: ' + pathText)
+    return steps
+
+
+def compileMatchers(matchersJSON):
+    """ Returns root of the matcher tree compiled from the dict {path: matcher}, matcher is one of
+    "ignore", "regex" (expected string is a regular expression), "unordered" (list in any order) or {"tolerance": number}
+    (raises ValueError if the declaration is invalid) """
+    if not isinstance(matchersJSON, dict):
+        raise ValueError(u'Matchers have to be declared as a dict of paths and matchers')
+    root = MatcherNode()
+    for pathText, matcherJSON in matchersJSON.items():
+        node = root
+        for step in _parsePath(pathText):
+            node = node.children.setdefault(step, MatcherNode())
+        if isinstance(matcherJSON, dict) and matcherJSON.keys() == ['tolerance'] and isinstance(matcherJSON['tolerance'], NUMBER_TYPES):
+            node.type = 'tolerance'
+            node.tolerance = matcherJSON['tolerance']
+        elif matcherJSON in MATCHER_TYPES and matcherJSON != 'tolerance':
+            node.type = matcherJSON
+        else:
+            raise ValueError(u'Invalid matcher of the path %s: %s' % (pathText, json.dumps(matcherJSON)))
+    return root
+
+
+def isTestLine(testJSON):
+    """ Returns True if the line of the test file is a turn of a dialog (not e.g. declaration of matchers) """
+    return 'input_message' in testJSON or 'output_message' in testJSON
+
+
+def getLatencyDifference(latency, maxMs, budgetKey, what):
+    """ Returns Difference if the latency (in seconds) exceeds the budget (in milliseconds) declared by the key, None otherwise """
+    if maxMs is None or 1000 * latency <= maxMs:
+        return None
+    return Difference([budgetKey], u'Latency of the %s exceeds the budget.' % what, u'at most %g ms' % maxMs, u'%.0f ms' % (1000 * latency))
+
+
+def _getTypeDifference(path, typeName, expectedText, receivedElement):
+    return Difference(path, u'Received output differs in type from expected output.',
+                      u'Element of the type %s%s' % (typeName, u' (' + expectedText + u')' if expectedText is not None else u''),
+                      u'Element of the type ' + receivedElement.__class__.__name__)
+
+
+def _getHashable(element):
+    return json.dumps(element, sort_keys=True) if isinstance(element, (dict, list)) else element
+
+
+def _getKeyFields(expectedElement, elementMatchers):
+    """ Returns fields identifying the dict element of an unordered list (values compared exactly),
+    None if the whole element is compared exactly or False if the element cannot be identified by hash """
+    if isinstance(expectedElement, dict):
+        return tuple(sorted(key for key, value in expectedElement.items() if value is not None and not isinstance(value, (dict, list))
+                            and (elementMatchers is None or elementMatchers.getChild(key) is None)))
+    if elementMatchers is not None and elementMatchers.type is not None:
+        return False
+    return None
+
+
+def _getElementKey(element, keyFields):
+    if keyFields is False:
+        return None
+    if keyFields is None or not isinstance(element, dict):
+        return _getHashable(element)
+    return tuple(_getHashable(element.get(key)) for key in keyFields)
+
+
+def _compareUnordered(expectedList, receivedList, path, elementMatchers):
+    """ Returns the first Difference of lists compared in any order, received elements are indexed by hash of their key fields,
+    so only elements with the same key fields are compared """
+    receivedIndexes = {} # key: key fields, value: dict {element key: list of indexes of the received elements}
+    usedIndexes = set()
+    for i, expectedElement in enumerate(expectedList):
+        keyFields = _getKeyFields(expectedElement, elementMatchers)
+        receivedIndex = receivedIndexes.get(keyFields)
+        if receivedIndex is None:
+            receivedIndex = receivedIndexes[keyFields] = {}
+            for j, receivedElement in enumerate(receivedList):
+                receivedIndex.setdefault(_getElementKey(receivedElement, keyFields), []).append(j)
+        firstDifference = None
+        candidates = receivedIndex.get(_getElementKey(expectedElement, keyFields), [])
+        for n, j in enumerate(candidates):
+            if j in usedIndexes:
+                continue
+            difference = compareJson(expectedElement, receivedList[j], path + [j], elementMatchers)
+            if difference is None:
+                usedIndexes.add(j)
+                del candidates[n]
+                break
+            firstDifference = firstDifference or difference
+        else:
+            return firstDifference or Difference(path + [i], u'Received list has no element matching the expected element.', _toText(expectedElement), u'None')
+    return None
+
+
+def compareJson(expectedJson, receivedJson, path=None, matchers=None):
+    """ Returns the first Difference of the received json from the expected json or None if it matches
+    (all expected dict keys have to be in the received dict, except of keys with null value, lists have to be the same),
+    matchers is the node of the compiled matcher tree (see compileMatchers) for the compared element """
+    path = path or []
+    if matchers is not None:
+        if matchers.type == 'ignore':
+            return None
+        if matchers.type == 'regex' and isinstance(expectedJson, basestring):
+            if not isinstance(receivedJson, basestring):
+                return _getTypeDifference(path, u'string', expectedJson, receivedJson)
+            try:
+                pattern = matchers.getPattern(expectedJson)
+            except re.error:
+                return Difference(path, u'Expected output is not a valid regular expression.', expectedJson, receivedJson)
+            if not pattern.match(receivedJson):
+                return Difference(path, u'Received output does not match expected pattern.', expectedJson, receivedJson)
+            return None
+        if matchers.type == 'tolerance' and isinstance(expectedJson, NUMBER_TYPES):
+            if not isinstance(receivedJson, NUMBER_TYPES):
+                return _getTypeDifference(path, u'number', unicode(expectedJson), receivedJson)
+            if abs(expectedJson - receivedJson) > matchers.tolerance:
+                return Difference(path, u'Received output differs from expected output by more than %s.' % matchers.tolerance, unicode(expectedJson), unicode(receivedJson))
+            return None
+
+    if isinstance(expectedJson, basestring):
+        if not isinstance(receivedJson, basestring):
+            return _getTypeDifference(path, u'string', expectedJson, receivedJson)
+        if expectedJson != receivedJson:
+            return Difference(path, u'Received output differs from expected output.', expectedJson, receivedJson)
+        return None
+
+    if isinstance(expectedJson, NUMBER_TYPES):
+        if not isinstance(receivedJson, NUMBER_TYPES):
+            return _getTypeDifference(path, expectedJson.__class__.__name__, unicode(expectedJson), receivedJson)
+        if expectedJson != receivedJson:
+            return Difference(path, u'Received output differs from expected output.', unicode(expectedJson), unicode(receivedJson))
+        return None
+
+    if isinstance(expectedJson, list):
+        if not isinstance(receivedJson, list):
+            return _getTypeDifference(path, u'list', None, receivedJson)
+        if len(expectedJson) != len(receivedJson):
+            return Difference(path, u'List in received output differs in length from list in expected output.',
+                              u'List of the length %d' % len(expectedJson), u'List of the length %d' % len(receivedJson))
+        if matchers is not None and matchers.type == 'unordered':
+            return _compareUnordered(expectedJson, receivedJson, path, matchers.getChild('*'))
+        for i in range(len(expectedJson)):
+            difference = compareJson(expectedJson[i], receivedJson[i], path + [i], matchers.getChild(i) if matchers is not None else None)
+            if difference:
+                return difference
+        return None
+
+    if isinstance(expectedJson, dict):
+        if not isinstance(receivedJson, dict):
+            return _getTypeDifference(path, u'dict', None, receivedJson)
+        for elementKey in expectedJson:
+            if expectedJson[elementKey] is None:
+                continue
+            elementMatchers = matchers.getChild(elementKey) if matchers is not None else None
+            if elementMatchers is not None and elementMatchers.type == 'ignore':
+                continue
+            if elementKey not in receivedJson or receivedJson[elementKey] is None:
+                return Difference(path + [elementKey], u'Received output has no key %s.' % elementKey, u'Dict with key ' + elementKey, u'None')
+            difference = compareJson(expectedJson[elementKey], receivedJson[elementKey], path + [elementKey], elementMatchers)
+            if difference:
+                return difference
+        return None
+
+    return Difference(path, u'Unsupported type of expected element.', u'Element of the type ' + expectedJson.__class__.__name__, _toText(receivedJson))
+
+
+def createDialogResult(dialogId):
+    """Returns empty result of the dialog
+    {'dialog_id', 'failures', 'first_failed_line', 'time', 'max_ms', 'budget_difference', 'lines': [{'line', 'time', 'differences', 'skipped'}]}"""
+    return {'dialog_id': dialogId, 'failures': 0, 'first_failed_line': None, 'time': 0, 'max_ms': None, 'budget_difference': None, 'lines': []}
+
+
+def addLineResult(dialogResult, line, difference, time=0, skipped=False, maxMs=None):
+    """Adds result of the line, time is the latency of the response in seconds (time of the dialog is the sum of its lines),
+    the line fails for the difference of the content and for the latency over the budget maxMs (in milliseconds, not checked if None)"""
+    differences = [lineDifference for lineDifference in (difference, None if skipped or maxMs is None else getLatencyDifference(time, maxMs, u'max_ms', u'turn')) if lineDifference]
+    dialogResult['lines'].append({'line': line, 'time': time, 'differences': differences, 'skipped': skipped})
+    dialogResult['time'] += time
+    if differences:
+        dialogResult['failures'] += 1
+        if dialogResult['first_failed_line'] is None:
+            dialogResult['first_failed_line'] = line
+    return differences
+
+
+def checkDialogBudget(dialogResult, maxMs):
+    """Checks the latency of the whole dialog (sum of the latencies of its lines) against the budget maxMs (in milliseconds),
+    the dialog with the budget has an additional test case which fails when the budget is exceeded"""
+    if maxMs is None: return
+    dialogResult['max_ms'] = maxMs
+    dialogResult['budget_difference'] = getLatencyDifference(dialogResult['time'], maxMs, u'dialog_max_ms', u'dialog')
+    if dialogResult['budget_difference']:
+        dialogResult['failures'] += 1
+
+
+def getTurnBudget(testJSON, defaultMaxMs=None):
+    """Returns the latency budget of the turn in milliseconds (max_ms of the test line or the default one) or None"""
+    return testJSON.get('max_ms', defaultMaxMs)
+
+
+def getDialogBudget(dialog):
+    """Returns the latency budget of the dialog in milliseconds (dialog_max_ms of any of its lines) or None"""
+    for loadedJson in dialog:
+        if 'dialog_max_ms' in loadedJson:
+            return loadedJson['dialog_max_ms']
+    return None
+
+
+def createLineFailureXML(difference):
+    lineFailureXml = LET.Element('failure')
+    lineFailureXml.attrib['message'] = difference.getFailureMessage()
+    # expected element
+    lineFailureExpectedXml = LET.Element('expected')
+    lineFailureExpectedXml.text = difference.expectedElement
+    lineFailureXml.append(lineFailureExpectedXml)
+    # received element
+    lineFailureReceivedXml = LET.Element('received')
+    lineFailureReceivedXml.text = difference.receivedElement
+    lineFailureXml.append(lineFailureReceivedXml)
+    return lineFailureXml
+
+
+def createDialogXML(dialogResult):
+    dialogXml = LET.Element('testsuite')
+    dialogXml.attrib['name'] = 'dialog ' + str(dialogResult['dialog_id'])
+    dialogXml.attrib['tests'] = str(len(dialogResult['lines']) + (dialogResult['max_ms'] is not None))
+    dialogXml.attrib['failures'] = str(dialogResult['failures'])
+    skipped = sum(1 for lineResult in dialogResult['lines'] if lineResult['skipped'])
+    if skipped:
+        dialogXml.attrib['skipped'] = str(skipped)
+    dialogXml.attrib['time'] = str(dialogResult['time'])
+    for lineResult in dialogResult['lines']:
+        lineXml = LET.Element('testcase')
+        lineXml.attrib['name'] = 'line ' + str(lineResult['line'])
+        lineXml.attrib['time'] = str(lineResult['time'])
+        for difference in lineResult['differences']:
+            lineXml.append(createLineFailureXML(difference))
+        if lineResult['skipped']:
+            lineXml.append(LET.Element('skipped'))
+        dialogXml.append(lineXml)
+    if dialogResult['max_ms'] is not None:
+        budgetXml = LET.Element('testcase')
+        budgetXml.attrib['name'] = 'dialog latency'
+        budgetXml.attrib['time'] = str(dialogResult['time'])
+        if dialogResult['budget_difference']:
+            budgetXml.append(createLineFailureXML(dialogResult['budget_difference']))
+        dialogXml.append(budgetXml)
+    return dialogXml
+
+
+def getTimingsFileName(receivedFileName):
+    return receivedFileName + TIMINGS_EXTENSION
+
+
+class ReportXMLWriter(object):
+    """ Writes the xml report incrementally, each dialog is written (and flushed) as soon as it is evaluated,
+    so the report of a long test is never held in memory. """
+
+
+    def __init__(self, outputFileName, testName):
+        self._outputFile = open(outputFileName, 'w')
+        self._contexts = []
+        self._xmlFile = self._enter(LET.xmlfile(self._outputFile, encoding='utf8'))
+        self._xmlFile.write_declaration()
+        self._enter(self._xmlFile.element('testsuites', OrderedDict([('name', testName), ('timestamp', '{0:%Y-%b-%d %H:%M:%S}'.format(datetime.datetime.now()))])))
+        self._xmlFile.write('\n')
+
+
+    def _enter(self, context):
+        self._contexts.append(context)
+        return context.__enter__()
+
+
+    def writeDialog(self, dialogResult, testName=None):
+        """ Writes testsuite of the dialog (named with the test name if the report contains more tests) """
+        dialogXml = createDialogXML(dialogResult)
+        if testName:
+            dialogXml.attrib['name'] = testName + ' ' + dialogXml.attrib['name']
+            dialogXml.attrib['package'] = testName
+        self._xmlFile.write(dialogXml, pretty_print=True)
+        self._xmlFile.flush()
+
+
+    def close(self):
+        while self._contexts:
+            self._contexts.pop().__exit__(None, None, None)
+        self._outputFile.close()
+
+
+def printLineResult(line, differences, expectedJson, receivedJson, verbose=False):
+    """Prints the differences of the failed line (also passed lines and whole outputs if verbose)"""
+    if differences:
+        for difference in differences:
+            printf(u'  LINE: %d, RESULT: FAILED, %s\n', line, unicode(difference))
+        if verbose:
+            printf(u'EXPECTED OUTPUT: ' + json.dumps(expectedJson, indent=4, ensure_ascii=False) + u'\n')
+            printf(u'RECEIVED OUTPUT: ' + json.dumps(receivedJson, indent=4, ensure_ascii=False) + u'\n')
+    elif verbose:
+        printf('  LINE: %d, RESULT: OK\n', line)
+
+
+def printDialogResult(dialogResult, verbose=False):
+    """Prints result of the failed dialog (of every dialog if verbose)"""
+    if dialogResult['failures']: # at least one failure in this dialog
+        if dialogResult['budget_difference']:
+            printf(u'  DIALOG: %s, RESULT: FAILED, %s\n', dialogResult['dialog_id'], unicode(dialogResult['budget_difference']))
+        printf(SEPARATOR)
+        printf('-- DIALOG: %s, TEST RESULT: FAILED, TOTAL FAILURES: %d, LINE OF THE FIRST FAILURE: %s\n', dialogResult['dialog_id'], dialogResult['failures'], dialogResult['first_failed_line'] or '-')
+        printf(SEPARATOR)
+    elif verbose:
+        printf(SEPARATOR)
+        printf('-- DIALOG: %s, TEST RESULT: OK\n', dialogResult['dialog_id'])
+        printf(SEPARATOR)
+
+
+def printSummary(nDialogs, nDialogsFailed):
+    printf('\n' + SEPARATOR)
+    printf(SEPARATOR)
+    if nDialogsFailed: printf('-- SUMMARY - DIALOUGES: %s, RESULT: FAILED, FAILED DIALOGS: %d\n', nDialogs, nDialogsFailed)
+    else: printf('-- SUMMARY - DIALOUGES: %s, RESULT: OK\n', nDialogs)
+    printf(SEPARATOR)
+
+
+def getPercentile(sortedValues, percentile):
+    """Returns the nearest-rank percentile of the sorted values (0 if there are no values)"""
+    if not sortedValues:
+        return 0
+    return sortedValues[max(int(round(percentile / 100.0 * len(sortedValues))) - 1, 0)]
+
+
+def getLatencyHistogram(latencies):
+    """Returns numbers of the latencies (in seconds) below each of LATENCY_BUCKETS (and of the rest)"""
+    histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+    for latency in latencies:
+        histogram[bisect.bisect_right(LATENCY_BUCKETS, 1000 * latency)] += 1
+    return histogram
+
+
+def printLatencyHistograms(title, latencies, rows=None):
+    """Prints number of turns, p50, p95, maximum and histogram of the latencies {name: list of latencies in seconds},
+    the slowest first (by the maximum), at most rows if given"""
+    bucketNames = ['<%d ms' % bucket for bucket in LATENCY_BUCKETS] + ['>=%d ms' % LATENCY_BUCKETS[-1]]
+    printf(('%-32s %6s %9s %9s %9s' + ' %8s' * len(bucketNames) + '\n'), title, 'TURNS', 'P50 [ms]', 'P95 [ms]', 'MAX [ms]', *bucketNames)
+    latencies = sorted(((name, sorted(nameLatencies)) for name, nameLatencies in latencies.items() if nameLatencies), key=lambda item: -item[1][-1])
+    for name, nameLatencies in latencies[:rows]:
+        printf(('%-32s %6d %9.1f %9.1f %9.1f' + ' %8d' * len(bucketNames) + '\n'), name, len(nameLatencies), 1000 * getPercentile(nameLatencies, 50),
+               1000 * getPercentile(nameLatencies, 95), 1000 * nameLatencies[-1], *getLatencyHistogram(nameLatencies))
+    if rows is not None and len(latencies) > rows:
+        printf('... %d more\n', len(latencies) - rows)
@@ -15,9 +15,11 @@ limitations under the License.
 
 import os, sys, logging
 import subprocess, argparse
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
+from cfgCommons import Cfg
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     printf('\nUsing WAW directory: ' + os.path.dirname(__file__) + '\n')
     scriptsPath=os.path.dirname(__file__)
@@ -26,16 +28,17 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='This script executes all the steps needed for building and deployment of the WeatherFrog application.',
                                      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--config', help='configuaration file', action='append')
+    parser.add_argument('-r', '--resolved_config', required=False, default='resolved_config.json', help='file where the configuration merged from all configuration files is saved once and passed to all the steps')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
     VERBOSE = args.verbose
 
-    #Assemble command line parameters out of parameters or defaults
-    paramsAll=''
+    #Assemble list of configuration files out of parameters or defaults
+    configFilePaths=[]
     if hasattr(args, 'config') and args.config!=None: # if config files provided - ignore defaults
         for strParamsItem in args.config:
             if os.path.isfile(strParamsItem):
-                paramsAll+= ' -c '+strParamsItem
+                configFilePaths.append(strParamsItem)
             else:
                 print('ERROR: Configuration file %s not found.', strParamsItem)
                 exit(1)
@@ -43,12 +46,18 @@ if __name__ == '__main__':
         # create list of default config files
         for strParamsItem in defaultParamList:
             if os.path.isfile(strParamsItem):
-                paramsAll += ' -c ' + strParamsItem
+                configFilePaths.append(strParamsItem)
             else:
                 print('WARNING: Default configuration file %s was not found, ignoring.', strParamsItem)
-    if len(paramsAll)==0:
+    if len(configFilePaths)==0:
         print('ERROR: Please provide at least one configuration file.', strParamsItem)
         exit(1)
+
+    #Resolve the configuration files once, all steps load the resolved file
+    resolveArgs = argparse.Namespace(common_configFilePaths=configFilePaths, common_resolved_config=args.resolved_config, common_verbose=VERBOSE)
+    config = Cfg(resolveArgs)
+    if VERBOSE: printf('Resolved configuration %s (hash %s)\n', args.resolved_config, config.getResolvedHash())
+    paramsAll=' -c '+args.resolved_config
     if VERBOSE:
         paramsAll+=' -v'
 
@@ -16,13 +16,18 @@ limitations under the License.
 """
 
 import sys, re, codecs, os
-import unicodedata, unidecode
-import lxml.etree as Xml
+import unicodedata
+from collections import OrderedDict
 
 restrictionTextNamePolicy = "NAME_POLICY can be only set to either 'soft', 'soft_verbose' or 'hard'"
 
-sys.stdout = codecs.getwriter('utf8')(sys.stdout)
-sys.stderr = codecs.getwriter('utf8')(sys.stderr)
+def initStreams():
+    """Wraps stdout and stderr to write unicode as utf-8, called when a script starts (importing the module does not change the streams)"""
+    # streams are wrapped only once (the module can be imported under more names, e.g. by tests)
+    if not isinstance(sys.stdout, codecs.StreamWriter):
+        sys.stdout = codecs.getwriter('utf8')(sys.stdout)
+    if not isinstance(sys.stderr, codecs.StreamWriter):
+        sys.stderr = codecs.getwriter('utf8')(sys.stderr)
 
 def printf(format, *args):
     sys.stdout.write(format % args)
@@ -32,165 +37,207 @@ def eprintf(format, *args):
     sys.stderr.write(format % args)
     sys.stderr.flush()
 
-def toCode(NAME_POLICY, code):
-    global restrictionTextNamePolicy
-    restrictionTextCode = "The code can only contain uppercase letters (in Unicode), numbers, underscores, and hyphens."
-    code = code.strip()
-    newCode = re.sub(' ', '_', code, re.UNICODE).upper()
-    if isinstance(newCode, str):
-        newIntentSubname = newCode.decode('utf-8')
-        # use unidecode.unidecode ?
-        newCode = unicodedata.normalize('NFKD', newCode).encode('ASCII', 'ignore')  # remove accents
-    # remove everything that is not unicode letter or hyphen
-    newCode = re.sub('[^\w-]', '', newCode, re.UNICODE)
-    if newCode != code:
-        if NAME_POLICY == 'soft_verbose':
-            eprintf("WARNING: Illegal value of the code: '%s'\n%s\n", code, restrictionTextCode)
-            eprintf("WARNING: Code \'%s\' changed to: '%s'\n", code, newCode)
-        elif NAME_POLICY == 'hard':
-            eprintf("ERROR: Illegal value of the code: '%s'\n%s\n", code, restrictionTextCode)
-            exit(1)
-        elif NAME_POLICY != 'soft':
+# maximal number of normalized names remembered by each name normalizer
+NAME_CACHE_SIZE = 4096
+
+def _toUnicode(text):
+    return text.decode('utf-8') if isinstance(text, str) else text
+
+class NameNormalizer(object):
+    """ Normalizes names (of intents, entities, codes) according to the restrictions given by WA and user.
+
+    All regular expressions (including user-defined replacements) are compiled once when the normalizer is created
+    and the normalized names are memoized (the last NAME_CACHE_SIZE names), so warnings about a changed name
+    are printed only once for every name. The base normalizer only strips the name and applies the user replacements,
+    subclasses add the restrictions of the service in _normalize method. """
+
+    def __init__(self, NAME_POLICY, userReplacements=None):
+        if NAME_POLICY not in ('soft', 'soft_verbose', 'hard'):
             eprintf("ERROR: Unknown value of the NAME_POLICY: '%s'\n%s\n", NAME_POLICY, restrictionTextNamePolicy)
             exit(1)
-    return newCode
+        self._namePolicy = NAME_POLICY
+        self._userReplacements = [] # list of (compiled regex or None for special operation, replacement, description)
+        for replacementPair in userReplacements or []:
+            #special case
+            if replacementPair[0].startswith('$'):
+                if replacementPair[1] not in ('\L', '\U', '\A'):
+                    eprintf("ERROR: unsupported special regex opperation '" + _toUnicode(replacementPair[1]) + "'\n")
+                    exit(1)
+                self._userReplacements.append((None, replacementPair[1], None))
+            # use regex
+            else:
+                self._userReplacements.append((re.compile(_toUnicode(replacementPair[0]), re.UNICODE), _toUnicode(replacementPair[1]),
+                                               replacementPair[0] + "' should be replaced with '" + replacementPair[1]))
+        self._cache = OrderedDict() # key: name, value: normalized name (the most recently used at the end)
 
-def normalizeIntentName(intentName):
-    """Normalizes intent name to uppercase, with no dashes or underscores"""
-    return re.sub('[-_]', '', intentName).upper()
+    def normalize(self, name):
+        """ Returns normalized name (utf-8 encoded) """
+        try:
+            normalizedName = self._cache.pop(name)
+        except KeyError:
+            normalizedName = self._normalize(name)
+            if len(self._cache) >= NAME_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        self._cache[name] = normalizedName
+        return normalizedName
 
-def toIntentName(NAME_POLICY, userReplacements, *intentSubnames):
-    """Concatenates intent names with underscores,
-    checks if the intent name satisfies all restrictions given by WA and user.
+    def normalize_many(self, names):
+        """ Returns list of normalized names in the same order """
+        return [self.normalize(name) for name in names]
+
+    def _applyUserReplacements(self, uName, nameKind):
+        """ Applies user-defined replacements, returns new name and list of triggered replacements """
+        triggeredUserRegex = []
+        for regex, replacement, description in self._userReplacements:
+            if regex is None:
+                if replacement == '\L':
+                    uNewName = uName.lower()
+                    description = nameKind + " name should be lowercase"
+                elif replacement == '\U':
+                    uNewName = uName.upper()
+                    description = nameKind + " name should be uppercase"
+                else:
+                    import unidecode # only the user replacement '\A' needs it
+                    uNewName = unidecode.unidecode(uName)
+                    description = nameKind + " name cannot contain accented letters"
+            else:
+                uNewName = regex.sub(replacement, uName)
+            # this replacement pair triggered
+            if uNewName != uName:
+                triggeredUserRegex.append(description)
+            uName = uNewName
+        return uName, triggeredUserRegex
+
+    def _normalize(self, name):
+        uName, triggeredUserRegex = self._applyUserReplacements(_toUnicode(name.strip()), "")
+        return uName.encode('utf-8')
+
+class IntentNameNormalizer(NameNormalizer):
+    """Checks if the intent name satisfies all restrictions given by WA and user.
     WA replacements:
      - replace spaces with uderscores
      - remove everything that is not unicode letter, hyphen or period
     User defined replacements:
      e.g. userReplacements = [['$special', '\L'], ['-', '_']] which change all letters to lowercase and replace all hyphens for underscores
-    If the name does not satisfy all restrictions, this function will return corrected name and print warning (NAME_POLICY soft)
+    If the name does not satisfy all restrictions, normalize will return corrected name and print warning (NAME_POLICY soft)
     or it will end up with an error (NAME_POLICY hard)"""
-    """Removes all unexpected characters from the intent names, normalize them to upper case and concatenate them with the underscores"""
-    global restrictionTextNamePolicy
-    restrictionTextIntentName = []
-    uNewIntentName = u""
-    for intentSubname in intentSubnames:
-        if not intentSubname: continue
-        intentSubname = intentSubname.strip()
-        uIntentSubname = intentSubname.decode('utf-8') if isinstance(intentSubname, str) else intentSubname
-        # apply WA restrictions (https://console.bluemix.net/docs/services/conversation/intents.html#defining-intents)
-        uIntentSubnameWA = re.sub(' ', '_', uIntentSubname, re.UNICODE) # replace space by underscore
-        uIntentSubnameWA = re.sub(u'[^\wÀ-ÖØ-öø-ÿĀ-ž-\.]', '', uIntentSubnameWA, re.UNICODE) # remove everything that is not unicode letter, hyphen or period
+
+    SPACE_REGEX = re.compile(u' ', re.UNICODE)
+    # (https://console.bluemix.net/docs/services/conversation/intents.html#defining-intents)
+    NOT_ALLOWED_REGEX = re.compile(u'[^\wÀ-ÖØ-öø-ÿĀ-ž-\.]', re.UNICODE)
+
+    def _normalize(self, intentSubname):
+        restrictionTextIntentName = []
+        uIntentSubname = _toUnicode(intentSubname.strip())
+        # apply WA restrictions
+        uIntentSubnameWA = IntentNameNormalizer.SPACE_REGEX.sub(u'_', uIntentSubname) # replace space by underscore
+        uIntentSubnameWA = IntentNameNormalizer.NOT_ALLOWED_REGEX.sub(u'', uIntentSubnameWA) # remove everything that is not unicode letter, hyphen or period
         if uIntentSubnameWA != uIntentSubname: # WA restriction triggered
             restrictionTextIntentName.append("The intent name can only contain letters (in Unicode), numbers, underscores, hyphens, and periods.")
         # apply user-defined restrictions
-        uIntentSubnameUser = uIntentSubnameWA
-        if userReplacements:
-            triggeredUserRegex = []
-            # re.sub for all pairs (regex, replacement)
-            for replacementPair in userReplacements:
-                #special case
-                if replacementPair[0].startswith('$'):
-                    if replacementPair[1] == '\L':
-                        uNewIntentSubnameUser = uIntentSubnameUser.lower()
-                        triggeredUserRegexToAppend = "intent name should be lowercase"
-                    elif replacementPair[1] == '\U':
-                        uNewIntentSubnameUser = uIntentSubnameUser.upper()
-                        triggeredUserRegexToAppend = "intent name should be uppercase"
-                    elif replacementPair[1] == '\A':
-                        uNewIntentSubnameUser = unidecode.unidecode(uIntentSubnameUser)
-                        triggeredUserRegexToAppend = "intent name cannot contain accented letters"
-                    else:
-                        eprintf("ERROR: unsupported special regex opperation '" + replacementPair[1].decode('utf-8') + "'\n")
-                        exit(1)
-                # use regex
-                else:
-                    uNewIntentSubnameUser = re.sub(replacementPair[0].decode('utf-8'), replacementPair[1].decode('utf-8'), uIntentSubnameUser, re.UNICODE)
-                    triggeredUserRegexToAppend = replacementPair[0] + "' should be replaced with '" + replacementPair[1]
-                # this replacement pair triggered
-                if uNewIntentSubnameUser != uIntentSubnameUser:
-                    triggeredUserRegex.append(triggeredUserRegexToAppend)
-                uIntentSubnameUser = uNewIntentSubnameUser
-            if uIntentSubnameUser != uIntentSubnameWA: # user restriction triggered
-                restrictionTextIntentName.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
+        uIntentSubnameUser, triggeredUserRegex = self._applyUserReplacements(uIntentSubnameWA, "intent")
+        if uIntentSubnameUser != uIntentSubnameWA: # user restriction triggered
+            restrictionTextIntentName.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
         if uIntentSubnameUser != uIntentSubname:
-            if NAME_POLICY == 'soft':
-                eprintf("WARNING: Illegal value of the intent name: '%s'\n%s\n", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
-                eprintf("WARNING: Intent name \'%s\' changed to: '%s'\n", uIntentSubname, uIntentSubnameUser)
-            elif NAME_POLICY == 'hard':
-                eprintf("ERROR: Illegal value of the intent name: '%s'\n%s\n", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
+            if self._namePolicy == 'hard':
+                eprintf("ERROR: Illegal value of the intent name: '%s'\n%s\n", uIntentSubname, _toUnicode(' '.join(restrictionTextIntentName)))
                 exit(1)
             else:
-                eprintf("ERROR: Unknown value of the NAME_POLICY: '%s'\n%s\n", NAME_POLICY, restrictionTextNamePolicy)
-                exit(1)
+                eprintf("WARNING: Illegal value of the intent name: '%s'\n%s\n", uIntentSubname, _toUnicode(' '.join(restrictionTextIntentName)))
+                eprintf("WARNING: Intent name \'%s\' changed to: '%s'\n", uIntentSubname, uIntentSubnameUser)
         if not uIntentSubnameUser:
             eprintf("ERROR: empty intent name\n")
             exit(1)
-        uNewIntentName = uNewIntentName + u'_' + uIntentSubnameUser if uNewIntentName else uIntentSubnameUser
-    return uNewIntentName.encode('utf-8')
+        return uIntentSubnameUser.encode('utf-8')
 
-def toEntityName(NAME_POLICY, userReplacements, entityName):
+class EntityNameNormalizer(NameNormalizer):
     """Checks if the entity name satisfies all restrictions given by WA and user.
     WA replacements:
      - replace spaces with uderscores
      - remove everything that is not unicode letter or hyphen
     User defined replacements:
      e.g. userReplacements = [['$special', '\L'], ['-', '_']] which change all letters to lowercase and replace all hyphens for underscores
-    If the name does not satisfy all restrictions, this function will return corrected name and print warning (NAME_POLICY soft)
+    If the name does not satisfy all restrictions, normalize will return corrected name and print warning (NAME_POLICY soft)
     or it will end up with an error (NAME_POLICY hard)"""
-    global restrictionTextNamePolicy
-    restrictionTextEntityName = []
-    entityName = entityName.strip()
-    uEntityName = entityName.decode('utf-8') if isinstance(entityName, str) else entityName
-    # apply WA restrictions (https://console.bluemix.net/docs/services/conversation/entities.html#defining-entities)
-    uEntityNameWA = re.sub(' ', '_', uEntityName, re.UNICODE) # replace spaces with underscores
-    uEntityNameWA = re.sub(u'[^\wÀ-ÖØ-öø-ÿĀ-ž-]', '', uEntityNameWA, re.UNICODE) # remove everything that is not unicode letter or hyphen
-    if uEntityNameWA != uEntityName: # WA restriction triggered
-        restrictionTextEntityName.append("The entity name can only contain letters (in Unicode), numbers, underscores, and hyphens.")
-    # apply user-defined restrictions
-    uEntityNameUser = uEntityNameWA
-    if userReplacements:
-        triggeredUserRegex = []
-        # re.sub for all pairs (regex, replacement)
-        for replacementPair in userReplacements:
-            #special case
-            if replacementPair[0].startswith('$'):
-                if replacementPair[1] == '\L':
-                    uNewEntityNameUser = uEntityNameUser.lower()
-                    triggeredUserRegexToAppend = "entity name should be lowercase"
-                elif replacementPair[1] == '\U':
-                    uNewEntityNameUser = uEntityNameUser.upper()
-                    triggeredUserRegexToAppend = "entity name should be uppercase"
-                elif replacementPair[1] == '\A':
-                    uNewIntentSubnameUser = unidecode.unidecode(uEntityNameUser)
-                    triggeredUserRegexToAppend = "entity name cannot contain accented letters"
-                else:
-                    eprintf("ERROR: unsupported special regex opperation '" + replacementPair[1].decode('utf-8') + "'\n")
-                    exit(1)
-            # use regex
-            else:
-                uNewEntityNameUser = re.sub(replacementPair[0].decode('utf-8'), replacementPair[1].decode('utf-8'), uEntityNameUser, re.UNICODE)
-                triggeredUserRegexToAppend = replacementPair[0] + "' should be replaced with '" + replacementPair[1]
-            # this replacement pair triggered
-            if uNewEntityNameUser != uEntityNameUser:
-                triggeredUserRegex.append(triggeredUserRegexToAppend)
-            uEntityNameUser = uNewEntityNameUser
+
+    SPACE_REGEX = re.compile(u' ', re.UNICODE)
+    # (https://console.bluemix.net/docs/services/conversation/entities.html#defining-entities)
+    NOT_ALLOWED_REGEX = re.compile(u'[^\wÀ-ÖØ-öø-ÿĀ-ž-]', re.UNICODE)
+
+    def _normalize(self, entityName):
+        restrictionTextEntityName = []
+        uEntityName = _toUnicode(entityName.strip())
+        # apply WA restrictions
+        uEntityNameWA = EntityNameNormalizer.SPACE_REGEX.sub(u'_', uEntityName) # replace spaces with underscores
+        uEntityNameWA = EntityNameNormalizer.NOT_ALLOWED_REGEX.sub(u'', uEntityNameWA) # remove everything that is not unicode letter or hyphen
+        if uEntityNameWA != uEntityName: # WA restriction triggered
+            restrictionTextEntityName.append("The entity name can only contain letters (in Unicode), numbers, underscores, and hyphens.")
+        # apply user-defined restrictions
+        uEntityNameUser, triggeredUserRegex = self._applyUserReplacements(uEntityNameWA, "entity")
         if uEntityNameUser != uEntityNameWA: # user restriction triggered
             restrictionTextEntityName.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
-    # return error or name
-    if uEntityNameUser != uEntityName: # allowed name differs from the given one
-        if NAME_POLICY == 'soft':
-            eprintf("WARNING: Illegal value of the entity name: '%s'\n%s\n", uEntityName, " ".join(restrictionTextEntityName).decode('utf-8'))
-            eprintf("WARNING: Entity name \'%s\' was changed to: '%s'\n", uEntityName, uEntityNameUser)
-        elif NAME_POLICY == 'hard':
-            eprintf("ERROR: Illegal value of the entity name: '%s'\n%s\n", uEntityName, " ".join(restrictionTextEntityName).decode('utf-8'))
-            exit(1)
-        else:
-            eprintf("ERROR: Unknown value of the NAME_POLICY: '%s'\n%s\n", NAME_POLICY, restrictionTextNamePolicy)
+        # return error or name
+        if uEntityNameUser != uEntityName: # allowed name differs from the given one
+            if self._namePolicy == 'hard':
+                eprintf("ERROR: Illegal value of the entity name: '%s'\n%s\n", uEntityName, _toUnicode(" ".join(restrictionTextEntityName)))
+                exit(1)
+            else:
+                eprintf("WARNING: Illegal value of the entity name: '%s'\n%s\n", uEntityName, _toUnicode(" ".join(restrictionTextEntityName)))
+                eprintf("WARNING: Entity name \'%s\' was changed to: '%s'\n", uEntityName, uEntityNameUser)
+        if not uEntityNameUser:
+            eprintf("ERROR: empty entity name\n")
             exit(1)
-    if not uEntityNameUser:
-        eprintf("ERROR: empty entity name\n")
-        exit(1)
-    return uEntityNameUser.encode('utf-8')
+        return uEntityNameUser.encode('utf-8')
+
+class CodeNormalizer(NameNormalizer):
+    """Checks if the code satisfies all restrictions - it can only contain uppercase letters without accents, numbers, underscores, and hyphens.
+    Spaces are replaced by underscores, accents are removed and all other characters are removed.
+    Warnings are printed only for NAME_POLICY soft_verbose."""
+
+    SPACE_REGEX = re.compile(u' ', re.UNICODE)
+    NOT_ALLOWED_REGEX = re.compile(r'[^\w-]')
+
+    def _normalize(self, code):
+        restrictionTextCode = "The code can only contain uppercase letters (in Unicode), numbers, underscores, and hyphens."
+        uCode = _toUnicode(code.strip())
+        uNewCode = CodeNormalizer.SPACE_REGEX.sub(u'_', uCode).upper()
+        newCode = unicodedata.normalize('NFKD', uNewCode).encode('ASCII', 'ignore')  # remove accents
+        # remove everything that is not letter or hyphen
+        newCode = CodeNormalizer.NOT_ALLOWED_REGEX.sub('', newCode)
+        if newCode != uCode:
+            if self._namePolicy == 'soft_verbose':
+                eprintf("WARNING: Illegal value of the code: '%s'\n%s\n", uCode, restrictionTextCode)
+                eprintf("WARNING: Code \'%s\' changed to: '%s'\n", uCode, newCode)
+            elif self._namePolicy == 'hard':
+                eprintf("ERROR: Illegal value of the code: '%s'\n%s\n", uCode, restrictionTextCode)
+                exit(1)
+        return newCode
+
+_nameNormalizers = {} # key: (normalizer class, NAME_POLICY, user replacements), value: normalizer
+
+def getNameNormalizer(normalizerClass, NAME_POLICY, userReplacements=None):
+    """Returns normalizer of the given class for the name policy and user replacements (it is created only once)"""
+    key = (normalizerClass, NAME_POLICY, tuple(tuple(replacementPair) for replacementPair in userReplacements or []))
+    if key not in _nameNormalizers:
+        _nameNormalizers[key] = normalizerClass(NAME_POLICY, userReplacements)
+    return _nameNormalizers[key]
+
+def toCode(NAME_POLICY, code):
+    return getNameNormalizer(CodeNormalizer, NAME_POLICY).normalize(code)
+
+def normalizeIntentName(intentName):
+    """Normalizes intent name to uppercase, with no dashes or underscores"""
+    return re.sub('[-_]', '', intentName).upper()
+
+def toIntentName(NAME_POLICY, userReplacements, *intentSubnames):
+    """Concatenates intent names with underscores,
+    checks if the intent name satisfies all restrictions given by WA and user (see IntentNameNormalizer)"""
+    intentNameNormalizer = getNameNormalizer(IntentNameNormalizer, NAME_POLICY, userReplacements)
+    return '_'.join(intentNameNormalizer.normalize_many([intentSubname for intentSubname in intentSubnames if intentSubname]))
+
+def toEntityName(NAME_POLICY, userReplacements, entityName):
+    """Checks if the entity name satisfies all restrictions given by WA and user (see EntityNameNormalizer)"""
+    return getNameNormalizer(EntityNameNormalizer, NAME_POLICY, userReplacements).normalize(entityName)
 
 def getFilesAtPath(pathList):
     filesAtPath = []
@@ -210,3 +257,33 @@ def absoluteFilePaths(directory):
    for dirpath,_,filenames in os.walk(directory):
        for f in filenames:
            yield os.path.abspath(os.path.join(dirpath, f))
+
+class _ProcessCall(object):
+    """Calls function in a pool process, exit of the function is returned as a result to be handled by the main process"""
+
+    def __init__(self, function):
+        self._function = function
+
+    def __call__(self, item):
+        try:
+            return (True, self._function(item))
+        except SystemExit as e:
+            return (False, e.code)
+
+def mapFiles(function, items, jobs=None):
+    """Returns list of function results for all items (in the same order),
+    if more than one job is requested, items are processed in a pool of 'jobs' processes"""
+    jobs = int(jobs) if jobs else 1
+    if jobs < 2 or len(items) < 2:
+        return [function(item) for item in items]
+    import multiprocessing
+    pool = multiprocessing.Pool(min(jobs, len(items)))
+    try:
+        results = pool.map(_ProcessCall(function), items)
+    finally:
+        pool.close()
+        pool.join()
+    for succeeded, result in results:
+        if not succeeded:
+            sys.exit(result)
+    return [result for succeeded, result in results]
@@ -0,0 +1,292 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, sys, json, gzip, io, hashlib, urllib, time, random, datetime
+from multiprocessing.pool import ThreadPool
+from wawCommons import printf, eprintf
+
+# workspace sections reported in the minimization summary
+WORKSPACE_SECTIONS = ['intents', 'entities', 'dialog_nodes', 'counterexamples']
+# values of dialog node fields which are used by the service when the field is missing
+DIALOG_NODE_DEFAULTS = {'type': 'standard'}
+# values of go_to fields which are used by the service when the field is missing
+GO_TO_DEFAULTS = {'selector': 'user_input'}
+COMPACT_SEPARATORS = (',', ':')
+# (workspace section, key of the item) of the sections which can be deployed item by item (in the order of deployment)
+WORKSPACE_ITEMS = [('intents', 'intent'), ('entities', 'entity'), ('counterexamples', 'text'), ('dialog_nodes', 'dialog_node')]
+# number of item requests sent to the service in parallel
+DEPLOY_JOBS = 8
+# fields set by the service which do not change the behavior of the workspace (removed from the workspace, its items
+# and the examples and values of the items, fields of the same name in the user content, e.g. context.status, are kept)
+SERVICE_FIELDS = ['created', 'updated', 'status', 'workspace_id']
+# (workspace section, key of the list) of the item lists which are objects of the service with service fields
+WORKSPACE_ITEM_LISTS = [('intents', 'examples'), ('entities', 'values')]
+# polling of the workspace status until the training is done (delays grow exponentially up to the maximum)
+WAIT_DELAY_INITIAL = 1 # in seconds
+WAIT_DELAY_MAX = 30 # in seconds
+WAIT_TIME_MAX = 5 * 60 # in seconds
+
+def _isEmpty(value):
+    return value is None or value == {} or value == []
+
+def _toUtf8(text):
+    return text.encode('utf8') if isinstance(text, unicode) else text
+
+def _minimizeFields(objectJSON, defaults):
+    """Returns copy of the object without empty fields and fields with default values
+    (only top level fields are removed, null values inside e.g. context are meaningful)"""
+    return {key: value for key, value in objectJSON.items() if not _isEmpty(value) and not (key in defaults and defaults[key] == value)}
+
+def minimizeDialogNode(nodeJSON):
+    """Returns copy of the dialog node without fields the service treats as defaults"""
+    nodeJSON = _minimizeFields(nodeJSON, DIALOG_NODE_DEFAULTS)
+    if 'go_to' in nodeJSON:
+        nodeJSON['go_to'] = _minimizeFields(nodeJSON['go_to'], GO_TO_DEFAULTS)
+    return nodeJSON
+
+def minimizeWorkspace(workspace):
+    """Returns copy of the workspace without fields the service treats as defaults,
+    only fields of the items are removed (a missing top level field keeps its old content when the workspace is updated)"""
+    workspace = dict(workspace)
+    if 'intents' in workspace:
+        workspace['intents'] = [_minimizeFields(intentJSON, {}) for intentJSON in workspace['intents']]
+    if 'entities' in workspace:
+        workspace['entities'] = [_minimizeFields(entityJSON, {}) for entityJSON in workspace['entities']]
+    if 'dialog_nodes' in workspace:
+        workspace['dialog_nodes'] = [minimizeDialogNode(nodeJSON) for nodeJSON in workspace['dialog_nodes']]
+    return workspace
+
+def serializeWorkspace(workspace, minimize=False):
+    """Returns workspace json as utf-8 encoded string, compact if minimized"""
+    if minimize:
+        return _toUtf8(json.dumps(workspace, separators=COMPACT_SEPARATORS, ensure_ascii=False))
+    return _toUtf8(json.dumps(workspace, indent=4, ensure_ascii=False))
+
+def getSectionSizes(workspace, minimize=False):
+    """Returns dictionary with sizes of serialized workspace sections (other fields are in the section 'other')"""
+    sizes = {}
+    for section in WORKSPACE_SECTIONS:
+        sizes[section] = len(serializeWorkspace(workspace[section], minimize)) if section in workspace else 0
+    sizes['other'] = len(serializeWorkspace({key: value for key, value in workspace.items() if key not in WORKSPACE_SECTIONS}, minimize))
+    return sizes
+
+def printMinimizationSummary(workspace, minimizedWorkspace):
+    """Prints bytes saved by minimization for each section of the workspace"""
+    originalSizes = getSectionSizes(workspace)
+    minimizedSizes = getSectionSizes(minimizedWorkspace, True)
+    printf('%-16s %12s %12s %12s\n', 'SECTION', 'ORIGINAL', 'MINIMIZED', 'SAVED')
+    for section in WORKSPACE_SECTIONS + ['other']:
+        printf('%-16s %12d %12d %12d\n', section, originalSizes[section], minimizedSizes[section], originalSizes[section] - minimizedSizes[section])
+
+def gzipData(data):
+    """Returns gzip compressed data"""
+    compressedData = io.BytesIO()
+    with gzip.GzipFile(fileobj=compressedData, mode='wb') as gzipFile:
+        gzipFile.write(data)
+    return compressedData.getvalue()
+
+def getContentHash(content):
+    """Returns hash of the json content (independent on the order of keys)"""
+    return hashlib.sha1(json.dumps(content, sort_keys=True, separators=COMPACT_SEPARATORS)).hexdigest()
+
+def _removeFields(value, fields):
+    return {key: item for key, item in value.items() if key not in fields} if isinstance(value, dict) else value
+
+def _removeServiceFields(workspace):
+    """Returns copy of the workspace without SERVICE_FIELDS of the workspace, of its items and of their examples and values"""
+    workspace = _removeFields(workspace, SERVICE_FIELDS)
+    itemLists = dict(WORKSPACE_ITEM_LISTS)
+    for section, key in WORKSPACE_ITEMS:
+        if not isinstance(workspace.get(section), list): continue
+        items = [_removeFields(item, SERVICE_FIELDS) for item in workspace[section]]
+        if section in itemLists:
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get(itemLists[section]), list):
+                    item[itemLists[section]] = [_removeFields(listItem, SERVICE_FIELDS) for listItem in item[itemLists[section]]]
+        workspace[section] = items
+    return workspace
+
+def getWorkspaceKey(workspace):
+    """Returns hash of the workspace content (without default values and fields set by the service)"""
+    return getContentHash(minimizeWorkspace(_removeServiceFields(workspace)))
+
+def getDeployedWorkspace(client, workspaceUrl, version):
+    """Returns the whole workspace exported from the service"""
+    response = client.get(workspaceUrl, params={'version': version, 'export': 'true'})
+    responseJson = response.json()
+    if 'error' in responseJson:
+        eprintf('ERROR: Cannot export workspace: %s\n', responseJson['error'])
+        sys.exit(1)
+    return responseJson
+
+def getSnapshotFileName(snapshotDirectory, workspaceId):
+    return os.path.join(snapshotDirectory, workspaceId + '.json')
+
+def loadSnapshot(snapshotDirectory, workspaceId):
+    """Returns the workspace last deployed to the workspace id or None if there is no snapshot"""
+    snapshotFileName = getSnapshotFileName(snapshotDirectory, workspaceId)
+    if not os.path.exists(snapshotFileName):
+        return None
+    try:
+        with open(snapshotFileName, 'r') as snapshotFile:
+            return json.load(snapshotFile)
+    except (IOError, ValueError):
+        eprintf('WARNING: Cannot load workspace snapshot %s, deploying whole workspace\n', snapshotFileName)
+        return None
+
+def saveSnapshot(snapshotDirectory, workspaceId, workspace):
+    """Stores the workspace deployed to the workspace id"""
+    if not os.path.exists(snapshotDirectory):
+        os.makedirs(snapshotDirectory)
+    with open(getSnapshotFileName(snapshotDirectory, workspaceId), 'w') as snapshotFile:
+        snapshotFile.write(serializeWorkspace(workspace, True))
+
+def deleteSnapshot(snapshotDirectory, workspaceId):
+    snapshotFileName = getSnapshotFileName(snapshotDirectory, workspaceId)
+    if os.path.exists(snapshotFileName):
+        os.remove(snapshotFileName)
+
+def diffWorkspaces(previousWorkspace, workspace):
+    """Returns changes between the previously deployed and the new workspace
+    {'metadata': changed workspace fields, section: {'create': [item], 'update': [(previous item, item)], 'delete': [key]}}
+    items are compared by the hash of their content, created items are in the workspace order"""
+    changes = {'metadata': {}}
+    sections = [section for section, itemKey in WORKSPACE_ITEMS]
+    for key, value in workspace.items():
+        if key not in sections and (key not in previousWorkspace or getContentHash(previousWorkspace[key]) != getContentHash(value)):
+            changes['metadata'][key] = value
+    for key in previousWorkspace:
+        if key not in sections and key not in workspace:
+            changes['metadata'][key] = None
+    for section, itemKey in WORKSPACE_ITEMS:
+        previousItems = {item[itemKey]: item for item in previousWorkspace.get(section, [])}
+        items = workspace.get(section, [])
+        itemKeys = set(item[itemKey] for item in items)
+        sectionChanges = {'create': [], 'update': [], 'delete': []}
+        for item in items:
+            if item[itemKey] not in previousItems:
+                sectionChanges['create'].append(item)
+            elif getContentHash(previousItems[item[itemKey]]) != getContentHash(item):
+                sectionChanges['update'].append((previousItems[item[itemKey]], item))
+        sectionChanges['delete'] = [key for key in previousItems if key not in itemKeys]
+        changes[section] = sectionChanges
+    return changes
+
+def countChanges(changes):
+    """Returns number of requests needed to deploy the changes"""
+    count = 1 if changes['metadata'] else 0
+    for section, itemKey in WORKSPACE_ITEMS:
+        count += sum(len(changes[section][operation]) for operation in ('create', 'update', 'delete'))
+    return count
+
+def _getItemUrl(workspaceUrl, section, key=None):
+    itemUrl = workspaceUrl + '/' + section
+    if key is not None:
+        itemUrl += '/' + urllib.quote(key.encode('utf8') if isinstance(key, unicode) else key, safe='')
+    return itemUrl
+
+def _getUpdateBody(section, previousItem, item):
+    """Returns body of the update request (updated fields have prefix 'new_', removed fields are set to null),
+    counterexamples are updated by their text without the prefix"""
+    if section == 'counterexamples':
+        return {'text': item['text']}
+    body = {'new_' + key: value for key, value in item.items()}
+    for key in previousItem:
+        if key not in item:
+            body['new_' + key] = None
+    return body
+
+def _sendItemRequest(client, version, request):
+    """Sends one (method, url, body) request, returns error message or None"""
+    method, url, body = request
+    response = client.request(method, url, params={'version': version}, headers={'Content-Type': 'application/json'},
+                                data=serializeWorkspace(body, True) if body is not None else None)
+    if method == 'DELETE' and response.status_code == 404: # already deleted (e.g. with the parent node)
+        return None
+    if response.status_code >= 400:
+        return '%s %s: %d %s' % (method, url, response.status_code, response.text)
+    return None
+
+def deployWorkspaceChanges(client, workspaceUrl, version, changes, jobs=DEPLOY_JOBS):
+    """Deploys the changes of the workspace item by item (independent requests are sent in parallel)
+    ends with an error if any request fails"""
+    phases = [] # list of (parallel, list of requests), phases are deployed one after another
+    if changes['metadata']:
+        phases.append((False, [('POST', workspaceUrl, changes['metadata'])]))
+    # dialog nodes reference intents, entities and other nodes, so they are created after them (and in the workspace order)
+    phases.append((True, [('POST', _getItemUrl(workspaceUrl, section), item) for section, itemKey in WORKSPACE_ITEMS[:-1] for item in changes[section]['create']] +
+                         [('POST', _getItemUrl(workspaceUrl, section, item[itemKey]), _getUpdateBody(section, previousItem, item)) for section, itemKey in WORKSPACE_ITEMS[:-1] for previousItem, item in changes[section]['update']]))
+    phases.append((False, [('POST', _getItemUrl(workspaceUrl, 'dialog_nodes'), item) for item in changes['dialog_nodes']['create']]))
+    phases.append((True, [('POST', _getItemUrl(workspaceUrl, 'dialog_nodes', item['dialog_node']), _getUpdateBody('dialog_nodes', previousItem, item)) for previousItem, item in changes['dialog_nodes']['update']]))
+    phases.append((True, [('DELETE', _getItemUrl(workspaceUrl, 'dialog_nodes', key), None) for key in changes['dialog_nodes']['delete']]))
+    phases.append((True, [('DELETE', _getItemUrl(workspaceUrl, section, key), None) for section, itemKey in WORKSPACE_ITEMS[:-1] for key in changes[section]['delete']]))
+
+    pool = ThreadPool(jobs)
+    try:
+        for parallel, phaseRequests in phases:
+            if not phaseRequests: continue
+            sendItemRequest = lambda request: _sendItemRequest(client, version, request)
+            errors = pool.map(sendItemRequest, phaseRequests) if parallel else [sendItemRequest(request) for request in phaseRequests]
+            errors = [error for error in errors if error]
+            if errors:
+                eprintf('ERROR: Cannot deploy workspace changes\n%s\n', '\n'.join(errors))
+                sys.exit(1)
+    finally:
+        pool.close()
+        pool.join()
+
+def waitForWorkspace(client, workspaceUrl, version, timeout=WAIT_TIME_MAX, initialDelay=WAIT_DELAY_INITIAL):
+    """Polls the workspace status until it is Available, returns the waiting time in seconds
+    the delay between polls is doubled each time (up to WAIT_DELAY_MAX) and randomized by up to a half,
+    ends with an error if the service returns an error or the workspace is not available before the timeout"""
+    startTime = time.time()
+    delay = initialDelay
+    while True:
+        response = client.get(workspaceUrl, params={'version': version})
+        responseJson = response.json()
+        if 'error' in responseJson:
+            eprintf('ERROR: %s\n', responseJson['error'])
+            sys.exit(1)
+        status = responseJson['status']
+        printf('WCS WORKSPACE STATUS: %s\n', status)
+        elapsedTime = time.time() - startTime
+        if status == 'Available':
+            return elapsedTime
+        if elapsedTime > timeout:
+            eprintf('ERROR: Workspace have not become available before timeout, timeout: %d, response:\n%s\n', timeout, json.dumps(responseJson, indent=4, sort_keys=True, ensure_ascii=False).encode('utf8'))
+            sys.exit(1)
+        time.sleep(min(random.uniform(delay / 2.0, delay), max(timeout - elapsedTime, 0)))
+        delay = min(delay * 2, WAIT_DELAY_MAX)
+
+def getWorkspaceCounts(workspace):
+    """Returns numbers of intents, examples, entities, entity values, dialog nodes and counterexamples in the workspace"""
+    return {'intents': len(workspace.get('intents', [])),
+            'examples': sum(len(intentJSON.get('examples', [])) for intentJSON in workspace.get('intents', [])),
+            'entities': len(workspace.get('entities', [])),
+            'values': sum(len(entityJSON.get('values', [])) for entityJSON in workspace.get('entities', [])),
+            'dialog_nodes': len(workspace.get('dialog_nodes', [])),
+            'counterexamples': len(workspace.get('counterexamples', []))}
+
+def writeTrainingMetrics(metricsFileName, workspaceId, trainingTime, workspace):
+    """Appends line with the training time and the workspace counts to the metrics file (one json per line)"""
+    metricsJSON = {'timestamp': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'), 'workspace_id': workspaceId,
+                   'training_time': round(trainingTime, 3)}
+    metricsJSON.update(getWorkspaceCounts(workspace))
+    try:
+        with open(metricsFileName, 'a') as metricsFile:
+            metricsFile.write(json.dumps(metricsJSON, sort_keys=True) + '\n')
+    except IOError:
+        eprintf('ERROR: Cannot write to %s\n', metricsFileName)
+        sys.exit(1)
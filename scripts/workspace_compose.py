@@ -13,11 +13,48 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import os, json, sys, argparse, codecs
+import os, json, sys, argparse, codecs, shutil
 from cfgCommons import Cfg
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
+
+# size of the chunks in which the fragments are copied to the workspace
+FRAGMENT_CHUNK_SIZE = 1024 * 1024
+
+def spliceFragment(outputFile, fragmentFileName):
+    """Copies already serialized json list from the fragment file to the output file without parsing it"""
+    try:
+        with open(fragmentFileName, 'rb') as fragmentFile:
+            chunk = fragmentFile.read(FRAGMENT_CHUNK_SIZE)
+            if chunk.startswith(codecs.BOM_UTF8):
+                chunk = chunk[len(codecs.BOM_UTF8):]
+            if not chunk.lstrip().startswith(b'['):
+                eprintf('ERROR: File %s does not contain json list\n', fragmentFileName)
+                sys.exit(1)
+            outputFile.write(chunk)
+            shutil.copyfileobj(fragmentFile, outputFile, FRAGMENT_CHUNK_SIZE)
+    except IOError:
+        eprintf('ERROR: Cannot load file %s\n', fragmentFileName)
+        sys.exit(1)
+
+def spliceWorkspace(outputFileName, workspace, fragmentFileNames):
+    """Writes workspace with metadata from the workspace dict and (key, file name) fragments spliced from files"""
+    with open(outputFileName, 'wb') as outputFile:
+        outputFile.write(b'{')
+        first = True
+        for key, value in workspace.items():
+            valueJSON = json.dumps(value, ensure_ascii=False, encoding='utf8')
+            if isinstance(valueJSON, unicode):
+                valueJSON = valueJSON.encode('utf8')
+            outputFile.write((b'' if first else b',') + b'\n    ' + json.dumps(key) + b': ' + valueJSON)
+            first = False
+        for key, fragmentFileName in fragmentFileNames:
+            outputFile.write((b'' if first else b',') + b'\n    ' + json.dumps(key) + b': ')
+            spliceFragment(outputFile, fragmentFileName)
+            first = False
+        outputFile.write(b'\n}\n')
 
 if __name__ == '__main__':
+    initStreams()
     printf('\nSTARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Concatenate intents, entities and dialogue jsons to Watson Conversation Service workspace .json format', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -31,6 +68,7 @@ if __name__ == '__main__':
     parser.add_argument('-wn','--conversation_workspace_name', required=False, help='name of this workspace')
     parser.add_argument('-wl','--conversation_language', required=False, help='language of generated workspace')
     parser.add_argument('-wd','--conversation_description', required=False, help='description')
+    parser.add_argument('-sp','--common_compose_splice', required=False, help='copy intents, entities and dialog json files to the workspace without parsing them (faster for big workspaces)', action='store_true')
     parser.add_argument('-v','--common_verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
     config = Cfg(args);
@@ -54,30 +92,45 @@ if __name__ == '__main__':
         print('outputs_directory is not defined!')
         exit(1)
 
+    SPLICE = hasattr(config, 'common_compose_splice')
+    fragmentFileNames = [] # (workspace key, file name) of json files to be copied to the workspace in splice mode
+
     # process intents
     intentsJSON = {}
     if hasattr(config, 'common_outputs_intents'):
-        with codecs.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_intents')), 'r', encoding='utf8') as intentsFile:
-            intentsJSON = json.load(intentsFile)
-        workspace['intents'] = intentsJSON
+        intentsFileName = os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_intents'))
+        if SPLICE:
+            fragmentFileNames.append(('intents', intentsFileName))
+        else:
+            with codecs.open(intentsFileName, 'r', encoding='utf8') as intentsFile:
+                intentsJSON = json.load(intentsFile)
+            workspace['intents'] = intentsJSON
     else:
         print('output_intents not specified, omitting intents.')
 
     # process entities
     entitiesJSON = {}
     if hasattr(config, 'common_outputs_entities'):
-        with codecs.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_entities')), 'r', encoding='utf8') as entitiesFile:
-            entitiesJSON = json.load(entitiesFile)
-        workspace['entities'] = entitiesJSON
+        entitiesFileName = os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_entities'))
+        if SPLICE:
+            fragmentFileNames.append(('entities', entitiesFileName))
+        else:
+            with codecs.open(entitiesFileName, 'r', encoding='utf8') as entitiesFile:
+                entitiesJSON = json.load(entitiesFile)
+            workspace['entities'] = entitiesJSON
     else:
         print('output_entities not specified, omitting entities.')
 
     # process dialog
     dialogJSON = {}
     if hasattr(config, 'common_outputs_dialogs'):
-        with codecs.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs')), 'r', encoding='utf8') as dialogFile:
-            dialogJSON = json.load(dialogFile)
-            workspace['dialog_nodes'] = dialogJSON
+        dialogFileName = os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs'))
+        if SPLICE:
+            fragmentFileNames.append(('dialog_nodes', dialogFileName))
+        else:
+            with codecs.open(dialogFileName, 'r', encoding='utf8') as dialogFile:
+                dialogJSON = json.load(dialogFile)
+                workspace['dialog_nodes'] = dialogJSON
     else:
         print('outputs_dialogs not specified, omitting dialog.')
 
@@ -93,7 +146,9 @@ if __name__ == '__main__':
     else:
         print('outputs_counterexamples not specified, omitting counterexamples.')
 
-    if hasattr(config, 'common_outputs_workspace'):
+    if hasattr(config, 'common_outputs_workspace') and SPLICE:
+        spliceWorkspace(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_workspace')), workspace, fragmentFileNames)
+    elif hasattr(config, 'common_outputs_workspace'):
         with codecs.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_workspace')), 'w', encoding='utf8') as outputFile:
             outputFile.write(json.dumps(workspace, indent=4, ensure_ascii=False, encoding='utf8'))
     else:
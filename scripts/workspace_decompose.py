@@ -14,9 +14,10 @@ limitations under the License.
 """
 
 import json, sys, argparse
-from wawCommons import printf, eprintf
+from wawCommons import printf, eprintf, initStreams
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Decompose Bluemix conversation service workspace in .json format to intents json, entities json and dialog json', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('workspace', help='workspace in .json format')
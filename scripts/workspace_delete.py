@@ -13,10 +13,12 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import sys, argparse, requests, configparser
-from wawCommons import printf, eprintf
+import sys, argparse, configparser
+from wawCommons import printf, eprintf, initStreams
+from httpCommons import HttpClient
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Deletes Bluemix conversation service workspace and deletes workspace id from config file.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('config', help='file containing section \'[conversation]\' with workspaces url=\'<url>\', conversation version=\'<version>\', username=\'<username>\', password=\'<password>\' and workspace_id=\'<workspace_id>\' ')
@@ -40,13 +42,14 @@ if __name__ == '__main__':
         workspaceId = config.get(conversationSection, 'workspace_id')
         printf('WCS WORKSPACE_ID: %s\n', workspaceId)
         workspacesUrl += '/' + workspaceId
+        client = HttpClient((username, password), config.get('http', 'timeout', fallback=None), config.get('http', 'retries', fallback=None))
     except IOError:
         eprintf('ERROR: Cannot load config file %s\n', args.config)
         sys.exit(1)
 
     # delete workspace
     workspacesUrl += '?version=' + version
-    response = requests.delete(workspacesUrl, auth=(username, password), headers={'Accept': 'text/html'})
+    response = client.delete(workspacesUrl, headers={'Accept': 'text/html'})
     responseJson = response.json()
 
     # check errors during upload
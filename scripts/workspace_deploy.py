@@ -13,12 +13,15 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import os, json, sys, argparse, requests, configparser
-from wawCommons import printf, eprintf
+import os, json, sys, argparse, configparser
+from wawCommons import printf, eprintf, initStreams
 from cfgCommons import Cfg
+from httpCommons import HttpClient, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+from workspaceCommons import minimizeWorkspace, serializeWorkspace, printMinimizationSummary, gzipData, loadSnapshot, saveSnapshot, deleteSnapshot, diffWorkspaces, countChanges, deployWorkspaceChanges, DEPLOY_JOBS, waitForWorkspace, writeTrainingMetrics, WAIT_TIME_MAX
 import datetime
 
 if __name__ == '__main__':
+    initStreams()
     print('STARTING: ' + os.path.basename(__file__) + '\n')
     parser = argparse.ArgumentParser(description='Deploys  workspace in json format to Watson Conversation Service.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-of', '--common_outputs_directory', required=False, help='directory where the otputs are stored')
@@ -31,6 +34,15 @@ if __name__ == '__main__':
     parser.add_argument('-cp','--conversation_password', required=False, help='password of the conversation service instance')
     parser.add_argument('-cid','--conversation_workspace_id', required=False, help='workspace_id of the application. If a workspace id is provided, previous workspace content is overwritten, otherwise a new workspace is created ')
     parser.add_argument('-wn','--conversation_workspace_name', required=False, help='name of the workspace')
+    parser.add_argument('-wm','--workspace_minimize', required=False, help='remove fields the service treats as defaults and send compact json', action='store_true')
+    parser.add_argument('-wz','--workspace_gzip', required=False, help='send gzip compressed workspace', action='store_true')
+    parser.add_argument('-ws','--workspace_snapshot_directory', required=False, help='directory with snapshots of the last deployed workspaces, if set, only changed intents, entities, counterexamples and dialog nodes are deployed')
+    parser.add_argument('-wj','--workspace_jobs', required=False, help='number of parallel requests when deploying changed items (default %d)' % DEPLOY_JOBS)
+    parser.add_argument('-ww','--workspace_wait', required=False, help='wait until the workspace is trained', action='store_true')
+    parser.add_argument('-wwt','--workspace_wait_timeout', required=False, help='maximal time to wait for the training in seconds (default %d)' % WAIT_TIME_MAX)
+    parser.add_argument('-wtm','--workspace_training_metrics', required=False, help='file where the training time and the workspace size are appended after waiting for the training')
+    parser.add_argument('-ht','--http_timeout', required=False, help='timeout of the requests to the service in seconds (default %d)' % DEFAULT_TIMEOUT)
+    parser.add_argument('-hr','--http_retries', required=False, help='number of retries of the requests which failed to connect or were rejected by the service as too many or unavailable (default %d)' % DEFAULT_RETRIES)
     parser.add_argument('-v','--common_verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
     config = Cfg(args);
@@ -64,43 +76,93 @@ if __name__ == '__main__':
         print('ERROR: con_password parameter not defined.')
         exit(1)
     password = getattr(config, 'conversation_password')
+    client = HttpClient((username, password), getattr(config, 'http_timeout', None), getattr(config, 'http_retries', None))
 
     if not hasattr(config, 'conversation_url') or not getattr(config, 'conversation_url'):
         print('ERROR: con_url parameter not defined.')
         exit(1)
     workspacesUrl = getattr(config, 'conversation_url')
-    if not hasattr(config, 'conversation_workspace_id') or not getattr(config, 'conversation_workspace_id'):
+    workspaceId = getattr(config, 'conversation_workspace_id') if hasattr(config, 'conversation_workspace_id') else None
+    if not workspaceId:
         print('INFO: converstion_workspace_id parameter not defined, creating new workspace')
     else:
-        workspacesUrl += '/' + getattr(config, 'conversation_workspace_id')
+        workspacesUrl += '/' + workspaceId
         print('INFO: conversation_workspace_id defined, updating existing workspace')
 
     if not hasattr(config, 'conversation_version') or not getattr(config, 'conversation_version'):
         print('ERROR: conversation_version parameter not defined.')
         exit(1)
     version = getattr(config, 'conversation_version')
-    workspacesUrl += '?version=' + version
-
-    # create/update workspace
-    response = requests.post(workspacesUrl, auth=(username, password), headers={'Content-Type': 'application/json'}, data=json.dumps(workspace, indent=4))
-    responseJson = response.json()
-
-    # check errors during upload
-    if 'error' in responseJson:
-        eprintf('Cannot upload conversation workspace\nERROR: %s\n', responseJson['error'])
-        if 'errors' in responseJson and len(responseJson['errors']) > 0:
-            eprintf('\t explanation: %s\n', responseJson['errors'][0])
-        if VERBOSE: eprintf("INFO: RESPONSE: %s\n", responseJson)
-#        if VERBOSE: eprintf("INFO: WORKSPACE: %s\n", json.dumps(workspace, indent=4))
-        sys.exit(1)
+
+    if hasattr(config, 'workspace_minimize'):
+        minimizedWorkspace = minimizeWorkspace(workspace)
+        if VERBOSE: printMinimizationSummary(workspace, minimizedWorkspace)
+        deployedWorkspace = minimizedWorkspace
     else:
-        printf('Workspace successfully uploaded\n')
+        deployedWorkspace = workspace
+
+    # deploy only changes against the last deployed workspace
+    snapshotDirectory = getattr(config, 'workspace_snapshot_directory') if hasattr(config, 'workspace_snapshot_directory') else None
+    previousWorkspace = loadSnapshot(snapshotDirectory, workspaceId) if snapshotDirectory and workspaceId else None
+    deployed = True
+    if previousWorkspace is not None:
+        changes = diffWorkspaces(previousWorkspace, deployedWorkspace)
+        changesCount = countChanges(changes)
+        if not changesCount:
+            printf('Workspace not changed since the last deploy, skipping upload\n')
+            deployed = False
+        else:
+            if VERBOSE: printf('Deploying %d changed workspace items\n', changesCount)
+            # the snapshot is not valid if the deploy fails in the middle, next deploy has to be complete
+            deleteSnapshot(snapshotDirectory, workspaceId)
+            jobs = int(getattr(config, 'workspace_jobs')) if hasattr(config, 'workspace_jobs') else DEPLOY_JOBS
+            deployWorkspaceChanges(client, workspacesUrl, version, changes, jobs)
+            saveSnapshot(snapshotDirectory, workspaceId, deployedWorkspace)
+            printf('Workspace changes successfully uploaded\n')
+    else:
+        workspacesUrl += '?version=' + version
+
+        # create/update workspace
+        headers = {'Content-Type': 'application/json'}
+        data = serializeWorkspace(deployedWorkspace, hasattr(config, 'workspace_minimize'))
+        if hasattr(config, 'workspace_gzip'):
+            dataSize = len(data)
+            data = gzipData(data)
+            headers['Content-Encoding'] = 'gzip'
+            if VERBOSE: printf('Workspace compressed from %d to %d bytes\n', dataSize, len(data))
+        response = client.post(workspacesUrl, headers=headers, data=data)
+        responseJson = response.json()
+
+        # check errors during upload
+        if 'error' in responseJson:
+            eprintf('Cannot upload conversation workspace\nERROR: %s\n', responseJson['error'])
+            if 'errors' in responseJson and len(responseJson['errors']) > 0:
+                eprintf('\t explanation: %s\n', responseJson['errors'][0])
+            if VERBOSE: eprintf("INFO: RESPONSE: %s\n", responseJson)
+#            if VERBOSE: eprintf("INFO: WORKSPACE: %s\n", json.dumps(workspace, indent=4))
+            sys.exit(1)
+        else:
+            printf('Workspace successfully uploaded\n')
+
+        if VERBOSE: printf("%s", responseJson)
+
+        if not hasattr(config, 'conversation_workspace_id') or not getattr(config, 'conversation_workspace_id'):
+            setattr(config, 'conversation_workspace_id', responseJson['workspace_id'])
+            printf('WCS WORKSPACE_ID: %s\n', responseJson['workspace_id'])
+        if snapshotDirectory:
+            saveSnapshot(snapshotDirectory, getattr(config, 'conversation_workspace_id'), deployedWorkspace)
+
+    # wait for the training
+    if hasattr(config, 'workspace_wait') and deployed:
+        timeout = float(getattr(config, 'workspace_wait_timeout')) if hasattr(config, 'workspace_wait_timeout') else WAIT_TIME_MAX
+        workspaceId = getattr(config, 'conversation_workspace_id')
+        trainingTime = waitForWorkspace(client, getattr(config, 'conversation_url') + '/' + workspaceId, version, timeout)
+        printf('Workspace trained in %.1f seconds\n', trainingTime)
+        if hasattr(config, 'workspace_training_metrics'):
+            writeTrainingMetrics(getattr(config, 'workspace_training_metrics'), workspaceId, trainingTime, deployedWorkspace)
 
-    if VERBOSE: printf("%s", responseJson)
+    if VERBOSE: client.printStatistics()
 
-    if not hasattr(config, 'conversation_workspace_id') or not getattr(config, 'conversation_workspace_id'):
-        setattr(config, 'conversation_workspace_id', responseJson['workspace_id'])
-        printf('WCS WORKSPACE_ID: %s\n', responseJson['workspace_id'])
     if hasattr(config, 'common_output_config'):
         config.saveConfiguration(getattr(config, 'common_output_config'))
 
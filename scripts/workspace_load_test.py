@@ -0,0 +1,250 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os, json, sys, time, datetime, argparse, threading, configparser
+from multiprocessing.pool import ThreadPool
+from wawCommons import printf, eprintf, initStreams
+from workspaceCommons import waitForWorkspace
+from httpCommons import HttpClient, DEFAULT_RETRIES
+from workspace_test import loadDialogs, sendMessage, CHECK_WORKSPACE_TIME_MAX
+from testCommons import getPercentile
+
+PERCENTILES = [50, 95, 99]
+# node of the turns without any visited node
+NO_NODE = '-'
+
+
+def getLatencySummary(latencies):
+    """Returns {'p50', 'p95', 'p99', 'mean', 'max'} of the latencies in milliseconds"""
+    latencies = sorted(latencies)
+    summary = {'p%d' % percentile: round(1000 * getPercentile(latencies, percentile), 1) for percentile in PERCENTILES}
+    summary['mean'] = round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0
+    summary['max'] = round(1000 * latencies[-1], 1) if latencies else 0
+    return summary
+
+
+def getFirstNode(outputJson):
+    nodesVisited = (outputJson or {}).get('output', {}).get('nodes_visited') or []
+    return nodesVisited[0] if nodesVisited else NO_NODE
+
+
+class LoadStatistics(object):
+    """ Results of the turns of all sessions of the load test (can be used from several threads).
+
+    Each turn is kept as (latency, status, first visited node), the turns answered with an error
+    are attributed to the first node of the expected output. """
+
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turns = []
+        self._startDelays = [] # delays of the session starts after their arrivals (all sessions busy)
+        self.dialogsStarted = 0
+        self.dialogsCompleted = 0
+        self.sessionErrors = [] # exceptions raised by the sessions (not answers of the service)
+
+
+    def addTurn(self, latency, status, node):
+        with self._lock:
+            self._turns.append((latency, status, node))
+
+
+    def startDialog(self, startDelay):
+        with self._lock:
+            self.dialogsStarted += 1
+            self._startDelays.append(startDelay)
+
+
+    def completeDialog(self):
+        with self._lock:
+            self.dialogsCompleted += 1
+
+
+    def failSession(self, error):
+        with self._lock:
+            self.sessionErrors.append(error)
+
+
+    def getReport(self, elapsed):
+        """Returns the report of the load test which took elapsed seconds"""
+        with self._lock:
+            turns = list(self._turns)
+            startDelays = list(self._startDelays)
+            sessionErrors = [str(error) for error in self.sessionErrors]
+        statusCodes = {}
+        errors = 0
+        nodes = {} # key: node, value: {'latencies', 'errors'}
+        for latency, status, node in turns:
+            statusCodes[str(status)] = statusCodes.get(str(status), 0) + 1
+            nodeTurns = nodes.setdefault(node, {'latencies': [], 'errors': 0})
+            nodeTurns['latencies'].append(latency)
+            if status is None or status >= 400:
+                errors += 1
+                nodeTurns['errors'] += 1
+        return {'duration': round(elapsed, 3),
+                'dialogs': {'started': self.dialogsStarted, 'completed': self.dialogsCompleted, 'failed': self.dialogsStarted - self.dialogsCompleted,
+                            'session_errors': len(sessionErrors)},
+                'turns': len(turns),
+                'throughput': round(len(turns) / elapsed, 2) if elapsed else 0,
+                'errors': errors,
+                'error_rate': round(float(errors) / len(turns), 4) if turns else 0,
+                'status_codes': statusCodes,
+                'latency': getLatencySummary([latency for latency, status, node in turns]),
+                'start_delay': getLatencySummary(startDelays),
+                'nodes': {node: {'turns': len(nodeTurns['latencies']), 'errors': nodeTurns['errors'], 'latency': getLatencySummary(nodeTurns['latencies'])}
+                          for node, nodeTurns in nodes.items()},
+                'session_errors': sorted(set(sessionErrors))}
+
+
+def runSession(client, url, dialog, statistics, arrivalTime):
+    """Sends the turns of the dialog one after another (with the context from the previous turn),
+    the session ends with the first turn answered with an error"""
+    import requests # imported when the sessions start, not needed for --help
+    statistics.startDialog(max(time.time() - arrivalTime, 0))
+    receivedOutputJson = None
+    for loadedJson in dialog:
+        inputJson = dict(loadedJson['input_message']) # dialogs are shared by the sessions
+        if receivedOutputJson and receivedOutputJson.get('context'):
+            inputJson['context'] = receivedOutputJson['context']
+        timings = []
+        startTime = time.time()
+        try:
+            receivedOutputJson = sendMessage(client, url, inputJson, None, timings)
+        except (requests.exceptions.RequestException, ValueError) as error:
+            response = getattr(error, 'response', None)
+            latency = timings[-1]['latency'] if timings else time.time() - startTime
+            statistics.addTurn(latency, response.status_code if response is not None else None, getFirstNode(loadedJson.get('output_message')))
+            return
+        if timings[-1]['status'] >= 400:
+            statistics.addTurn(timings[-1]['latency'], timings[-1]['status'], getFirstNode(loadedJson.get('output_message')))
+            return
+        statistics.addTurn(timings[-1]['latency'], timings[-1]['status'], getFirstNode(receivedOutputJson))
+    statistics.completeDialog()
+
+
+def runLoad(client, url, dialogs, arrivalRate, concurrency, duration, statistics):
+    """Starts sessions (dialogs taken in turn) with the arrival rate (per second) for duration seconds,
+    at most concurrency sessions run at once (arrived sessions wait for a free one), returns the elapsed time
+    (exceptions raised by the sessions are added to the statistics as session errors)"""
+    pool = ThreadPool(concurrency)
+    startTime = time.time()
+    arrivals = 0
+    sessions = []
+    try:
+        while True:
+            arrivalTime = startTime + arrivals / float(arrivalRate)
+            if arrivalTime >= startTime + duration:
+                break
+            delay = arrivalTime - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            sessions.append(pool.apply_async(runSession, (client, url, dialogs[arrivals % len(dialogs)], statistics, arrivalTime)))
+            arrivals += 1
+    finally:
+        pool.close()
+        pool.join()
+    elapsed = time.time() - startTime
+    for session in sessions:
+        try:
+            session.get()
+        except Exception as error:
+            statistics.failSession(error)
+    return elapsed
+
+
+def printReport(report):
+    printf('DIALOGS: %d started, %d completed, %d failed\n', report['dialogs']['started'], report['dialogs']['completed'], report['dialogs']['failed'])
+    if report['dialogs']['session_errors']:
+        eprintf('WARNING: %d session(s) ended with an exception: %s\n', report['dialogs']['session_errors'], '; '.join(report['session_errors']))
+    printf('TURNS: %d, THROUGHPUT: %.2f turns/s, ERRORS: %d (%.2f %%)\n', report['turns'], report['throughput'], report['errors'], 100 * report['error_rate'])
+    printf('LATENCY: p50 %.1f ms, p95 %.1f ms, p99 %.1f ms, max %.1f ms\n', report['latency']['p50'], report['latency']['p95'], report['latency']['p99'], report['latency']['max'])
+    printf('SESSION START DELAY: p95 %.1f ms, max %.1f ms\n', report['start_delay']['p95'], report['start_delay']['max'])
+    printf('%-32s %8s %8s %10s %10s %10s\n', 'FIRST NODE', 'TURNS', 'ERRORS', 'P50 [ms]', 'P95 [ms]', 'P99 [ms]')
+    for node, nodeReport in sorted(report['nodes'].items(), key=lambda item: -item[1]['latency']['p95']):
+        printf('%-32s %8d %8d %10.1f %10.1f %10.1f\n', node, nodeReport['turns'], nodeReport['errors'],
+               nodeReport['latency']['p50'], nodeReport['latency']['p95'], nodeReport['latency']['p99'])
+
+
+if __name__ == '__main__':
+    initStreams()
+    parser = argparse.ArgumentParser(description='Replays dialogs from given test files at the arrival rate for the duration and reports throughput, errors and latencies', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    # positional arguments
+    parser.add_argument('config', help='file containing section \'[conversation]\' with workspaces url=\'<url>\', conversation version=\'<version>\', username=\'<username>\', password=\'<password>\' and optionally workspace_id=\'<workspace_id>\' ')
+    parser.add_argument('inputFileNames', nargs='+', help='files with test jsons (dialogs are started in the order of the files and their lines)')
+    # optional arguments
+    parser.add_argument('-r','--arrival_rate', required=False, type=float, default=1, help='number of dialogs started per second')
+    parser.add_argument('-cc','--concurrency', required=False, type=int, default=10, help='maximal number of dialogs running at once')
+    parser.add_argument('-d','--duration', required=False, type=float, default=60, help='time in seconds during which the dialogs are started')
+    parser.add_argument('-o','--output', required=False, help='json file where the report is written')
+    parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
+    args = parser.parse_args(sys.argv[1:])
+
+    VERBOSE = args.verbose
+
+    # load config file
+    conversationSection = 'conversation'
+    try:
+        config = configparser.ConfigParser()
+        config.read(args.config)
+        workspacesUrl = config.get(conversationSection, 'url')
+        version = config.get(conversationSection, 'version')
+        username = config.get(conversationSection, 'username')
+        password = config.get(conversationSection, 'password')
+        workspaceId = config.get(conversationSection, 'workspace_id', fallback=None)
+        if workspaceId:
+            workspacesUrl += '/' + workspaceId
+        # failed requests are not sent again by default, the errors are part of the measured behavior
+        client = HttpClient((username, password), config.get('http', 'timeout', fallback=None), config.get('http', 'retries', fallback=0), poolSize=args.concurrency)
+        # the status of the workspace is not measured, its requests are sent again as by the other scripts
+        statusClient = HttpClient((username, password), config.get('http', 'timeout', fallback=None), DEFAULT_RETRIES)
+    except (IOError, configparser.Error) as error:
+        eprintf('ERROR: Cannot load config file %s: %s\n', args.config, error)
+        sys.exit(1)
+
+    dialogs = []
+    for inputFileName in args.inputFileNames:
+        try:
+            with open(inputFileName, 'r') as inputFile:
+                dialogs.extend(loadDialogs(inputFile)[0])
+        except IOError:
+            eprintf('ERROR: Cannot open test input file %s\n', inputFileName)
+            sys.exit(1)
+        except ValueError as error:
+            eprintf('ERROR: Invalid test input file %s: %s\n', inputFileName, error)
+            sys.exit(1)
+    if not dialogs:
+        eprintf('ERROR: No dialogs in the test input files\n')
+        sys.exit(1)
+
+    # wait until workspace is done with training
+    waitForWorkspace(statusClient, workspacesUrl, version, CHECK_WORKSPACE_TIME_MAX)
+
+    printf('Starting %.2f dialogs per second (at most %d at once) for %.0f s\n', args.arrival_rate, args.concurrency, args.duration)
+    statistics = LoadStatistics()
+    elapsed = runLoad(client, workspacesUrl + '/message?version=' + version, dialogs, args.arrival_rate, args.concurrency, args.duration, statistics)
+    report = statistics.getReport(elapsed)
+    report.update({'timestamp': '{0:%Y-%m-%d %H:%M:%S}'.format(datetime.datetime.now()), 'tests': [os.path.basename(inputFileName) for inputFileName in args.inputFileNames],
+                   'arrival_rate': args.arrival_rate, 'concurrency': args.concurrency})
+    printReport(report)
+
+    if args.output:
+        try:
+            with open(args.output, 'w') as outputFile:
+                outputFile.write(json.dumps(report, indent=4, sort_keys=True))
+        except IOError:
+            eprintf('ERROR: Cannot write report file %s\n', args.output)
+            sys.exit(1)
+
+    if VERBOSE: client.printStatistics()
@@ -13,22 +13,115 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import json, sys, time, argparse, requests, configparser
-from wawCommons import printf, eprintf
+import os, re, json, sys, time, argparse, configparser
+from multiprocessing.pool import ThreadPool
+from itertools import izip
+from wawCommons import printf, eprintf, initStreams
+from workspaceCommons import waitForWorkspace, getWorkspaceKey, getDeployedWorkspace
+from ResponseCache import ResponseCache, CacheMissError
+from testCommons import compareJson, compileMatchers, isTestLine, getTimingsFileName, printLatencyHistograms, createDialogResult, addLineResult, checkDialogBudget, getTurnBudget, getDialogBudget, CHECK_MESSAGES_TIME_MAX, ReportXMLWriter, printLineResult, printDialogResult, printSummary, SEPARATOR
+from httpCommons import HttpClient, RateLimiter, RETRY_STATUS_CODES
 
-CHECK_MESSAGES_TIME_MAX = 5 # in seconds
-CHECK_WORKSPACE_TIME_DELAY = 1 # in seconds
 CHECK_WORKSPACE_TIME_MAX = 5 * 60 # in seconds
+# number of the slowest dialogs and nodes in the latency summary (all with verbose)
+LATENCY_REPORT_ROWS = 10
+
+def loadDialogs(inputFile):
+    """Returns list of dialogs, each dialog is a list of consecutive test lines with the same dialog_id,
+    and the compiled matchers declared in the file (lines which are not turns of dialogs are not sent)"""
+    dialogs = []
+    dialogId = None
+    matchersJSON = {}
+    for inputLine in inputFile:
+        loadedJson = json.loads(inputLine)
+        if not isTestLine(loadedJson):
+            if 'matchers' in loadedJson:
+                if dialogs:
+                    raise ValueError('Matchers have to be declared before the first test line')
+                compileMatchers(loadedJson['matchers']) # validates the declaration before it is merged
+                matchersJSON.update(loadedJson['matchers'])
+            continue
+        if dialogs and dialogId == loadedJson['dialog_id']:
+            dialogs[-1].append(loadedJson)
+        else:
+            dialogs.append([loadedJson])
+        dialogId = loadedJson['dialog_id']
+    return dialogs, compileMatchers(matchersJSON) if matchersJSON else None
+
+def sendMessage(client, url, inputJson, cache=None, timings=None):
+    """Returns response of the service to the message, the recorded one if it is in the cache
+    (without client the response has to be recorded),
+    if timings list is given, {'latency' (in seconds), 'size' (in bytes), 'status'} of the sent request
+    (or {'latency': 0, 'cached': True}) is appended to it"""
+    if cache:
+        receivedOutputJson = cache.get(inputJson)
+        if receivedOutputJson is not None:
+            if timings is not None:
+                timings.append({'latency': 0, 'cached': True})
+            return receivedOutputJson
+        if not client:
+            raise CacheMissError('No recorded response to the message: ' + json.dumps(inputJson, ensure_ascii=False).encode('utf8'))
+    response = client.post(url, headers={'Content-Type': 'application/json'}, data=json.dumps(inputJson, indent=4, ensure_ascii=False).encode('utf8'))
+    if timings is not None:
+        timings.append({'latency': response.latency, 'size': len(response.content), 'status': response.status_code})
+    if response.status_code in RETRY_STATUS_CODES:
+        response.raise_for_status() # throttled or failed turn, its response is not an answer of the dialog
+    receivedOutputJson = response.json()
+    if cache and response.status_code < 400:
+        cache.put(inputJson, receivedOutputJson)
+    return receivedOutputJson
+
+def runDialog(client, url, dialog, cache=None, stopOnFailure=False, matchers=None):
+    """Sends all turns of the dialog one after another (each with the context from the previous turn),
+    returns list of received jsons and list of timings of the turns (see sendMessage)
+    (if stopOnFailure, the turns after the first turn with response different from the expected one (compared with matchers) are not sent)"""
+    receivedOutputJsons = []
+    timings = []
+    receivedOutputJson = None
+    for loadedJson in dialog:
+        inputJson = loadedJson['input_message'] # input json for tests
+        if receivedOutputJson and receivedOutputJson.get('context'):
+            inputJson['context'] = receivedOutputJson['context'] # use context from last dialog turn
+        receivedOutputJson = sendMessage(client, url, inputJson, cache, timings)
+        receivedOutputJsons.append(receivedOutputJson)
+        if stopOnFailure and compareJson(loadedJson['output_message'], receivedOutputJson, None, matchers):
+            break
+    return receivedOutputJsons, timings
+
+def runDialogs(client, url, dialogs, concurrency=1, cache=None, stopOnFailure=False, matchers=None):
+    """Runs the dialogs (up to concurrency dialogs in parallel), yields lists of received jsons and timings (see runDialog) in the order of the dialogs"""
+    if concurrency <= 1:
+        for dialog in dialogs:
+            yield runDialog(client, url, dialog, cache, stopOnFailure, matchers)
+        return
+    pool = ThreadPool(concurrency)
+    try:
+        for dialogResult in pool.imap(lambda dialog: runDialog(client, url, dialog, cache, stopOnFailure, matchers), dialogs):
+            yield dialogResult
+    finally:
+        pool.close()
+        pool.join()
 
 if __name__ == '__main__':
+    initStreams()
     parser = argparse.ArgumentParser(description='Tests all dialog flows from given file and save received responses to output file', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
     parser.add_argument('config', help='file containing section \'[conversation]\' with workspaces url=\'<url>\', conversation version=\'<version>\', username=\'<username>\', password=\'<password>\' and optionally workspace_id=\'<workspace_id>\' ')
     parser.add_argument('inputFileName', help='file with test jsons to be sent to conversation service. (One at each line at key \'input\'.)')
     parser.add_argument('outputFileName', help='file where to store received data from conversation service. (One response at each line.)')
     # optional arguments
+    parser.add_argument('-cc','--concurrency', required=False, type=int, default=1, help='number of dialogs (with different dialog_id) tested in parallel')
+    parser.add_argument('-rr','--rate', required=False, type=float, help='maximal number of requests per second sent to the service (slowed down when the service throttles requests)')
+    parser.add_argument('-rb','--burst', required=False, type=int, help='maximal number of requests sent at once when the rate is limited (default is one second of requests)')
+    parser.add_argument('-rc','--cache', required=False, help='file with responses recorded for the deployed workspace, unchanged messages are answered from it and new responses are recorded to it')
+    parser.add_argument('-rp','--replay', required=False, help='answer all messages from the cache file without connecting to the service', action='store_true')
+    parser.add_argument('-wf','--workspace', required=False, help='json file with the deployed workspace identifying the recorded responses (by default the workspace is exported from the service, in the replay mode the last recorded workspace is used)')
+    parser.add_argument('-e','--evaluate', required=False, help='name of the xml file where the received responses are compared with the expected ones (output_message) as they arrive')
+    parser.add_argument('-mm','--max_ms', required=False, type=float, default=CHECK_MESSAGES_TIME_MAX * 1000, help='latency budget in milliseconds of the turns without max_ms (0 for no budget, requires -e), it is not the timeout of the requests (timeout of the [http] section)')
+    parser.add_argument('-sf','--stop_on_failure', required=False, help='do not send the remaining turns of a dialog after its turn fails (they are reported as skipped, requires -e)', action='store_true')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     args = parser.parse_args(sys.argv[1:])
+    import requests # after the arguments are parsed, it is not needed for --help
 
     VERBOSE = args.verbose
 
@@ -47,56 +140,121 @@ if __name__ == '__main__':
         if workspaceId:
             printf('WCS WORKSPACE_ID: %s\n', workspaceId)
             workspacesUrl += '/' + workspaceId
+        rateLimiter = RateLimiter(args.rate, args.burst) if args.rate else None
+        client = HttpClient((username, password), config.get('http', 'timeout', fallback=None), config.get('http', 'retries', fallback=None), rateLimiter=rateLimiter)
     except IOError:
         eprintf('ERROR: Cannot load config file %s\n', args.config)
         sys.exit(1)
 
-    # wait until workspace is done with training
-    checkWorkspaceTime = 0
-    url = workspacesUrl + '?version=' + version
-    while True:
-        response = requests.get(url, auth=(username, password))
-        responseJson = response.json()
-        if 'error' in responseJson:
-            eprintf('ERROR: %s\n', responseJson['error'])
+    if args.replay:
+        if not args.cache:
+            eprintf('ERROR: Replay mode requires the cache file\n')
             sys.exit(1)
-        status = responseJson['status']
-        printf('WCS WORKSPACE STATUS: %s\n', status)
-        if status == 'Available':
-            break
-        else:
-            # sleep some time and check messages again
-            if checkWorkspaceTime > CHECK_WORKSPACE_TIME_MAX:
-                eprintf('ERROR: Workspace have not become available before timeout, timeout: %d, response:\n%s\n', CHECK_MESSAGES_TIME_MAX, json.dumps(responseJson, indent=4, sort_keys=True, ensure_ascii=False).encode('utf8'))
+        if not os.path.exists(args.cache):
+            eprintf('ERROR: Cache file %s does not exist\n', args.cache)
+            sys.exit(1)
+        client = None
+    else:
+        # wait until workspace is done with training
+        waitForWorkspace(client, workspacesUrl, version, CHECK_WORKSPACE_TIME_MAX)
+
+    # load recorded responses of the workspace
+    cache = None
+    if args.cache:
+        if args.workspace:
+            try:
+                with open(args.workspace, 'r') as workspaceFile:
+                    workspaceKey = getWorkspaceKey(json.load(workspaceFile))
+            except IOError:
+                eprintf('ERROR: Cannot load workspace file %s\n', args.workspace)
                 sys.exit(1)
-            time.sleep(CHECK_WORKSPACE_TIME_DELAY)
-            checkWorkspaceTime = checkWorkspaceTime + CHECK_WORKSPACE_TIME_DELAY
+        else:
+            workspaceKey = None if args.replay else getWorkspaceKey(getDeployedWorkspace(client, workspacesUrl, version))
+        cache = ResponseCache(args.cache, workspaceKey)
 
     # run tests
     url = workspacesUrl + '/message?version=' + version
     try:
         with open(args.inputFileName, "r") as inputFile:
-            try:
-                with open(args.outputFileName, "w") as outputFile:
-                    first = True
-                    dialogId = ""
-                    # for every input line
-                    for inputLine in inputFile:
-                        loadedJson = json.loads(inputLine)
-                        inputJson = loadedJson['input_message'] # input json for tests
-                        if dialogId and dialogId == loadedJson['dialog_id']:
-                            if receivedOutputJson and receivedOutputJson['context']:
-                                inputJson['context'] = receivedOutputJson['context'] # use context from last dialog turn
-                        dialogId = loadedJson['dialog_id']
-                        response = requests.post(url, auth=(username, password), headers={'Content-Type': 'application/json'}, data=json.dumps(inputJson, indent=4, ensure_ascii=False).encode('utf8'))
-                        receivedOutputJson = response.json()
-                        if not first:
-                            outputFile.write("\n")
-                        outputFile.write(json.dumps(receivedOutputJson, ensure_ascii=False).encode('utf8'))
-                        first = False
-            except IOError:
-                eprintf('ERROR: Cannot open test output file %s\n', args.outputFileName)
-                sys.exit(1)
+            dialogs, matchers = loadDialogs(inputFile)
     except IOError:
         eprintf('ERROR: Cannot open test input file %s\n', args.inputFileName)
         sys.exit(1)
+    except ValueError as error:
+        eprintf('ERROR: Invalid test input file %s: %s\n', args.inputFileName, error)
+        sys.exit(1)
+    if args.stop_on_failure and not args.evaluate:
+        eprintf('ERROR: Stopping dialogs on failure requires evaluation (-e)\n')
+        sys.exit(1)
+    if args.evaluate:
+        testName = re.sub(r"\.[^\.]*$", "", os.path.basename(args.inputFileName))
+        nDialogs = 0
+        nDialogsFailed = 0
+        try:
+            outputXmlWriter = ReportXMLWriter(args.evaluate, testName)
+        except IOError:
+            eprintf('ERROR: Cannot open xml report file %s\n', args.evaluate)
+            sys.exit(1)
+        printf(SEPARATOR)
+        printf('-- TEST: ' + testName + '\n')
+        printf(SEPARATOR)
+    dialogLatencies = {} # key: dialog id, value: list of latencies of the sent turns
+    nodeLatencies = {} # key: dialog node, value: list of latencies of the sent turns which visited the node
+    try:
+        # latency, size and status of each turn are written to a file next to the output file (read by evaluate_tests.py)
+        with open(args.outputFileName, "w") as outputFile, open(getTimingsFileName(args.outputFileName), "w") as timingsFile:
+            first = True
+            line = 0
+            for dialog, (receivedOutputJsons, timings) in izip(dialogs, runDialogs(client, url, dialogs, args.concurrency, cache, args.stop_on_failure, matchers)):
+                if args.evaluate:
+                    dialogResult = createDialogResult(dialog[0]['dialog_id'])
+                for i, loadedJson in enumerate(dialog):
+                    line += 1
+                    # skipped turns have empty responses to keep the lines of the output file aligned with the test file
+                    receivedOutputJson = receivedOutputJsons[i] if i < len(receivedOutputJsons) else {}
+                    timing = timings[i] if i < len(timings) else {'skipped': True}
+                    if not first:
+                        outputFile.write("\n")
+                    outputFile.write(json.dumps(receivedOutputJson, ensure_ascii=False).encode('utf8'))
+                    first = False
+                    timingsFile.write(json.dumps(timing) + '\n')
+                    if 'status' in timing:
+                        dialogLatencies.setdefault(unicode(loadedJson['dialog_id']), []).append(timing['latency'])
+                        for node in set(receivedOutputJson.get('output', {}).get('nodes_visited') or []):
+                            nodeLatencies.setdefault(node, []).append(timing['latency'])
+                    if args.evaluate:
+                        if i < len(receivedOutputJsons):
+                            difference = compareJson(loadedJson['output_message'], receivedOutputJson, None, matchers)
+                            differences = addLineResult(dialogResult, line, difference, timing['latency'], maxMs=getTurnBudget(loadedJson, args.max_ms or None))
+                            printLineResult(line, differences, loadedJson['output_message'], receivedOutputJson, VERBOSE)
+                        else:
+                            addLineResult(dialogResult, line, None, skipped=True)
+                if args.evaluate:
+                    checkDialogBudget(dialogResult, getDialogBudget(dialog))
+                    nDialogs += 1
+                    if dialogResult['failures']:
+                        nDialogsFailed += 1
+                    printDialogResult(dialogResult, VERBOSE)
+                    outputXmlWriter.writeDialog(dialogResult)
+    except IOError:
+        eprintf('ERROR: Cannot open test output file %s\n', args.outputFileName)
+        sys.exit(1)
+    except (requests.exceptions.RequestException, CacheMissError) as requestException:
+        eprintf('ERROR: Cannot test dialogs: %s\n', requestException)
+        sys.exit(1)
+
+    if args.evaluate:
+        outputXmlWriter.close()
+        printSummary(nDialogs, nDialogsFailed)
+
+    if dialogLatencies:
+        printf(SEPARATOR)
+        printLatencyHistograms('DIALOG', dialogLatencies, None if VERBOSE else LATENCY_REPORT_ROWS)
+        printf(SEPARATOR)
+        printLatencyHistograms('NODE', nodeLatencies, None if VERBOSE else LATENCY_REPORT_ROWS)
+
+    if cache:
+        if not args.replay: cache.save()
+        if VERBOSE: printf('CACHED RESPONSES: %d, SENT MESSAGES: %d\n', *cache.getStatistics())
+
+    if VERBOSE and client: client.printStatistics()
@@ -0,0 +1,165 @@
+# coding: utf-8
+import socket, threading, time, unittest
+import requests
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from scripts.httpCommons import HttpClient, RateLimiter
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """ Answers the throttled status (429 by default) with Retry-After (if given) until the given number of requests is reached, then 200.
+
+    If the failure is 'abort' or 'slow', the throttled requests are not answered, the connection is closed at once
+    or after a delay. """
+
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.requests <= self.server.throttledRequests and self.server.failure:
+            if self.server.failure == 'slow':
+                time.sleep(0.5)
+            self.close_connection = 1
+            return
+        if self.server.requests <= self.server.throttledRequests:
+            self.send_response(self.server.throttledStatus)
+            if self.server.retryAfter is not None:
+                self.send_header('Retry-After', self.server.retryAfter)
+            body = '{"error":"Rate limit exceeded"}'
+        else:
+            self.send_response(200)
+            body = '{"status":"Available"}'
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.getheader('Content-Length') or 0))
+        self.do_GET()
+
+
+    do_PUT = do_POST
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+        self.server.requests = 0
+        self.server.throttledRequests = 2
+        self.server.throttledStatus = 429
+        self.server.retryAfter = '0'
+        self.server.failure = None
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/ws' % self.server.server_port
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_retryAfter(self):
+        """ Verify that throttled requests are sent again and counted. """
+        client = HttpClient(('user', 'password'), timeout=5)
+        response = client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.attempts, 3)
+        statistics = client.getStatistics()
+        self.assertEquals((statistics['requests'], statistics['retries']), (3, 2))
+        self.assertEquals(statistics['received_bytes'], 2 * len('{"error":"Rate limit exceeded"}') + len('{"status":"Available"}'))
+
+
+    def test_negative_retriesExhausted(self):
+        """ Verify that the last throttled response is returned when no retries are left. """
+        client = HttpClient(('user', 'password'), retries=1)
+        response = client.get(self.url)
+        self.assertEquals(response.status_code, 429)
+        self.assertEquals(self.server.requests, 2)
+
+
+    def test_positive_serverErrorIdempotent(self):
+        """ Verify that requests which can be repeated (GET, PUT and messages) are sent again after server errors. """
+        self.server.throttledStatus = 500
+        client = HttpClient(('user', 'password'))
+        self.assertEquals(client.put(self.url, data='{}').attempts, 3)
+        self.server.requests = 0
+        self.assertEquals(client.post(self.url + '/message?version=2017-05-26', data='{}').attempts, 3)
+
+
+    def test_negative_serverErrorPost(self):
+        """ Verify that other POST requests are not sent again after server errors, only when throttled. """
+        client = HttpClient(('user', 'password'))
+        for status, retryAfter, attempts in [(500, '0', 1), (502, '0', 1), (503, None, 1), (503, '0', 3), (429, '0', 3)]:
+            self.server.requests = 0
+            self.server.throttledStatus = status
+            self.server.retryAfter = retryAfter
+            response = client.post(self.url, data='{}')
+            self.assertEquals((status, response.attempts), (status, attempts))
+            self.assertEquals(response.status_code, status if attempts == 1 else 200)
+
+
+    def test_positive_failedIdempotent(self):
+        """ Verify that idempotent requests are sent again after the connection is aborted or the response times out. """
+        self.server.throttledRequests = 1
+        client = HttpClient(('user', 'password'), timeout=0.2, retries=1)
+        for failure in ['abort', 'slow']:
+            self.server.requests = 0
+            self.server.failure = failure
+            self.assertEquals((failure, client.get(self.url).attempts), (failure, 2))
+            self.server.requests = 0
+            self.assertEquals((failure, client.post(self.url + '/message', data='{}').attempts), (failure, 2))
+
+
+    def test_negative_failedPost(self):
+        """ Verify that other POST requests are not sent again when the connection fails after they were sent. """
+        self.server.throttledRequests = 1
+        client = HttpClient(('user', 'password'), timeout=0.2, retries=1)
+        for failure, error in [('abort', requests.exceptions.ConnectionError), ('slow', requests.exceptions.ReadTimeout)]:
+            self.server.requests = 0
+            self.server.failure = failure
+            with self.assertRaises(error):
+                client.post(self.url, data='{}')
+            self.assertEquals((failure, self.server.requests), (failure, 1))
+
+
+    def test_positive_connectFailurePost(self):
+        """ Verify that POST requests are sent again when the connection cannot be established. """
+        closedSocket = socket.socket()
+        closedSocket.bind(('127.0.0.1', 0))
+        url = 'http://127.0.0.1:%d/ws' % closedSocket.getsockname()[1]
+        closedSocket.close()
+        client = HttpClient(('user', 'password'), retries=1)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post(url, data='{}')
+        self.assertEquals(client.getStatistics()['requests'], 2)
+
+
+    def test_positive_rateLimiter(self):
+        """ Verify that throttled requests are sent again without consuming retries and the rate is lowered. """
+        rateLimiter = RateLimiter(100, 1)
+        client = HttpClient(('user', 'password'), retries=0, rateLimiter=rateLimiter)
+        response = client.get(self.url)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.attempts, 3)
+        self.assertTrue(rateLimiter.getRate() < 100)
+
+
+    def test_positive_tokenBucket(self):
+        """ Verify that requests above the burst wait for the rate. """
+        rateLimiter = RateLimiter(50, 5)
+        startTime = time.time()
+        for _ in range(10):
+            rateLimiter.acquire()
+        self.assertTrue(0.08 < time.time() - startTime < 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
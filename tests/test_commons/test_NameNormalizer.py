@@ -0,0 +1,47 @@
+# coding: utf-8
+import unittest
+from scripts.wawCommons import NameNormalizer, IntentNameNormalizer, EntityNameNormalizer, CodeNormalizer, getNameNormalizer, toIntentName, toCode
+
+
+class NameNormalizerTest(unittest.TestCase):
+
+
+    def test_positive_normalizeIntentName(self):
+        """ Verify WA restrictions and user-defined replacements of intent names. """
+        normalizer = IntentNameNormalizer('soft', [['$special', '\U'], ['-', '_']])
+        self.assertEquals(normalizer.normalize(u'what is-your name?'), 'WHAT_IS_YOUR_NAME')
+        self.assertEquals(normalizer.normalize_many(['a b', u'čaj']), ['A_B', u'ČAJ'.encode('utf-8')])
+
+
+    def test_positive_normalizeEntityNameUnicode(self):
+        """ Verify that unicode letters are allowed in entity names. """
+        normalizer = EntityNameNormalizer('hard')
+        self.assertEquals(normalizer.normalize(u'名前'), u'名前'.encode('utf-8'))
+        self.assertEquals(normalizer.normalize('name'), 'name')
+
+
+    def test_positive_normalizeCode(self):
+        """ Verify that codes are uppercase without accents and special characters. """
+        self.assertEquals(toCode('soft', u'žluťoučký kůň!'), 'ZLUTOUCKY_KUN')
+        self.assertEquals(toCode('soft', 'txt1'), 'TXT1')
+        self.assertEquals(CodeNormalizer('soft').normalize_many(['a', 'b c']), ['A', 'B_C'])
+
+
+    def test_positive_normalizeBase(self):
+        """ Verify that the base normalizer only strips the name and applies the user replacements. """
+        normalizer = NameNormalizer('hard', [['$special', '\L'], ['-', '_']])
+        self.assertEquals(normalizer.normalize(u' My-Name? '), 'my_name?')
+        self.assertEquals(normalizer.normalize(u'Čaj'), u'čaj'.encode('utf-8'))
+
+
+    def test_positive_normalizerIsShared(self):
+        """ Verify that normalizers are created only once for the same rules and names are memoized. """
+        normalizer = getNameNormalizer(IntentNameNormalizer, 'soft', [['-', '_']])
+        self.assertTrue(normalizer is getNameNormalizer(IntentNameNormalizer, 'soft', [['-', '_']]))
+        self.assertFalse(normalizer is getNameNormalizer(IntentNameNormalizer, 'hard', [['-', '_']]))
+        self.assertEquals(toIntentName('soft', [['-', '_']], 'domain', None, 'my-intent'), 'domain_my_intent')
+        self.assertEquals(normalizer.normalize('my-intent'), 'my_intent')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# coding: utf-8
+import argparse, hashlib, os, shutil, tempfile, unittest
+from scripts.cfgCommons import Cfg
+
+
+class CfgTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory) # log.log is written to the current directory
+        with open('common.cfg', 'w') as configFile:
+            configFile.write('[common]\nintents = intents\noutputs_directory = outputs\n\n[conversation]\nworkspace_name = app\nlanguage = en,cs\n')
+        with open('private.cfg', 'w') as configFile:
+            configFile.write('[conversation]\nusername = user\npassword = password\n')
+
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+
+    def test_positive_resolvedConfig(self):
+        """ Verify that the resolved configuration has the merged options and command line overrides and loads into the same options. """
+        config = Cfg(argparse.Namespace(common_configFilePaths=['common.cfg', 'private.cfg'], common_resolved_config='resolved.json', conversation_username='other'))
+        self.assertEquals(config.getOptions(), {'common_intents': ['intents'], 'common_outputs_directory': 'outputs', 'conversation_workspace_name': 'app',
+                                                'conversation_language': ['en', 'cs'], 'conversation_username': 'other', 'conversation_password': 'password'})
+        with open('resolved.json', 'r') as resolvedFile:
+            self.assertEquals(hashlib.sha1(resolvedFile.read()).hexdigest(), config.getResolvedHash())
+
+        resolvedConfig = Cfg(argparse.Namespace(common_configFilePaths=['resolved.json']))
+        self.assertEquals(resolvedConfig.getOptions(), config.getOptions())
+        self.assertEquals(resolvedConfig.getResolvedHash(), config.getResolvedHash())
+        self.assertNotEquals(Cfg(argparse.Namespace(common_configFilePaths=['resolved.json'], conversation_password='new')).getResolvedHash(), config.getResolvedHash())
+
+
+    def test_positive_outputConfigNotRewritten(self):
+        """ Verify that the output config is saved when resolving and not again by the steps loading the resolved configuration. """
+        Cfg(argparse.Namespace(common_configFilePaths=['common.cfg', 'private.cfg'], common_resolved_config='resolved.json', common_output_config='output.cfg'))
+        os.remove('output.cfg')
+        Cfg(argparse.Namespace(common_configFilePaths=['resolved.json'], common_output_config='output.cfg'))
+        self.assertFalse(os.path.exists('output.cfg'))
+        Cfg(argparse.Namespace(common_configFilePaths=['resolved.json'], conversation_workspace_id='id'))
+        self.assertTrue(os.path.exists('output.cfg'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+# coding: utf-8
+import os, subprocess, sys, unittest
+
+SCRIPTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')
+
+
+class InitStreamsTest(unittest.TestCase):
+
+
+    def _run(self, code):
+        """Runs the code in a new interpreter with the scripts on the path, returns its output"""
+        return subprocess.check_output([sys.executable, '-c', 'import sys; sys.path.insert(0, %r)\n' % SCRIPTS_DIRECTORY + code])
+
+
+    def test_positive_importKeepsStreams(self):
+        """ Verify that importing the module does not replace the streams. """
+        self.assertEquals(self._run('stdout = sys.stdout\nimport wawCommons\nsys.stdout.write(str(sys.stdout is stdout))'), 'True')
+
+
+    def test_positive_initStreams(self):
+        """ Verify that unicode is written as utf-8 after the streams are wrapped (once). """
+        output = self._run('import wawCommons\nwawCommons.initStreams()\nstdout = sys.stdout\nwawCommons.initStreams()\n'
+                           'wawCommons.printf(u"%s %s", u"\\u0159", sys.stdout is stdout)')
+        self.assertEquals(output.decode('utf8'), u'ř True')
+
+
+if __name__ == "__main__":
+    unittest.main()
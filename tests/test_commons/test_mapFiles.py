@@ -0,0 +1,80 @@
+# coding: utf-8
+import os, shutil, subprocess, sys, tempfile, unittest
+from scripts.wawCommons import mapFiles
+
+SCRIPTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')
+EXAMPLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'example', 'en_app')
+
+
+def square(item):
+    return item * item
+
+
+def exitOnThree(item):
+    if item == 3:
+        sys.exit(3)
+    return item
+
+
+class MapFilesTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def _runScript(self, scriptName, arguments):
+        """Runs the script in the temporary directory, returns its exit code"""
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.call([sys.executable, os.path.join(SCRIPTS_DIRECTORY, scriptName)] + arguments, cwd=self.directory, stdout=devnull, stderr=devnull)
+
+
+    def _readOutput(self, fileName):
+        with open(os.path.join(self.directory, fileName), 'rb') as outputFile:
+            return outputFile.read()
+
+
+    def test_positive_orderKept(self):
+        """ Verify that the results of the processes are in the order of the items. """
+        self.assertEquals(mapFiles(square, range(10), 3), [square(item) for item in range(10)])
+        self.assertEquals(mapFiles(square, range(10), '3'), mapFiles(square, range(10)))
+
+
+    def test_negative_workerExit(self):
+        """ Verify that the exit of a function in a process ends the main process with the same code. """
+        with self.assertRaises(SystemExit) as context:
+            mapFiles(exitOnThree, [1, 2, 3, 4], 2)
+        self.assertEquals(context.exception.code, 3)
+
+
+    def test_positive_intentsParallel(self):
+        """ Verify that intents converted in parallel processes are the same as converted sequentially. """
+        for outputFileName, jobs in [('sequential.json', []), ('parallel.json', ['-j', '2'])]:
+            self.assertEquals(self._runScript('intents_csv2json.py', ['-ii', os.path.join(EXAMPLE_DIRECTORY, 'intents'), '-od', self.directory, '-oi', outputFileName] + jobs), 0)
+        self.assertEquals(self._readOutput('parallel.json'), self._readOutput('sequential.json'))
+
+
+    def test_positive_entitiesParallel(self):
+        """ Verify that entities converted in parallel processes are the same as converted sequentially. """
+        for outputFileName, jobs in [('sequential.json', []), ('parallel.json', ['-j', '2'])]:
+            self.assertEquals(self._runScript('entities_csv2json.py', ['-ie', os.path.join(EXAMPLE_DIRECTORY, 'entities'), '-od', self.directory, '-oe', outputFileName] + jobs), 0)
+        self.assertEquals(self._readOutput('parallel.json'), self._readOutput('sequential.json'))
+
+
+    def test_negative_intentsParallelExit(self):
+        """ Verify that an invalid intent file converted in a parallel process ends the script with its error. """
+        intentsDirectory = os.path.join(self.directory, 'intents')
+        os.makedirs(intentsDirectory)
+        for intentName in ['GOOD', 'BAD NAME!', 'OTHER']:
+            with open(os.path.join(intentsDirectory, intentName + '.csv'), 'w') as intentFile:
+                intentFile.write('hello\n')
+        self.assertEquals(self._runScript('intents_csv2json.py', ['-ii', intentsDirectory, '-od', self.directory, '-oi', 'intents.json', '-j', '2']), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'intents.json')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+# coding: utf-8
+import unittest
+from scripts.testCommons import compareJson
+
+
+class CompareJsonTest(unittest.TestCase):
+
+
+    def test_positive_same(self):
+        """ Verify that received json may contain more keys and null expected values are ignored. """
+        expectedJson = {'output': {'text': [u'Dobrý den'], 'nodes_visited': None}, 'context': {'count': 1}}
+        receivedJson = {'output': {'text': [u'Dobrý den'], 'nodes_visited': ['welcome']}, 'context': {'count': 1, 'system': {}}}
+        self.assertEquals(compareJson(expectedJson, receivedJson), None)
+
+
+    def test_negative_differentValue(self):
+        """ Verify that the difference has the path of the different element. """
+        difference = compareJson({'output': {'text': ['Hello', 'Bye']}}, {'output': {'text': ['Hello', 'Hi']}})
+        self.assertEquals(difference.getPathText(), 'output.text[1]')
+        self.assertEquals((difference.expectedElement, difference.receivedElement), ('Bye', 'Hi'))
+        self.assertEquals(difference.getFailureMessage(), 'Received output differs from expected output. (output.text[1])')
+
+
+    def test_negative_missingKeyAndType(self):
+        """ Verify that missing keys, different types and lengths are reported. """
+        self.assertEquals(compareJson({'context': {'a': 1}}, {'context': {}}).getPathText(), 'context.a')
+        self.assertEquals(compareJson({'a': 1}, {'a': '1'}).receivedElement, 'Element of the type str')
+        self.assertEquals(compareJson([1, 2], [1]).expectedElement, 'List of the length 2')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# coding: utf-8
+import random, time, unittest
+from scripts.testCommons import compareJson, compileMatchers
+
+
+class CompileMatchersTest(unittest.TestCase):
+
+
+    def test_positive_matchers(self):
+        """ Verify that ignored paths, regular expressions and numeric tolerance are applied. """
+        matchers = compileMatchers({'context.system.*': 'ignore', 'output.nodes_visited': 'ignore', 'output.text[*]': 'regex', 'intents[*].confidence': {'tolerance': 0.05}})
+        expectedJson = {'output': {'text': [u'Dobrý (den|večer)', u'It is \\d+:\\d+'], 'nodes_visited': ['welcome']},
+                        'intents': [{'intent': 'HELLO', 'confidence': 0.9}], 'context': {'system': {'dialog_turn_counter': 1}}}
+        receivedJson = {'output': {'text': [u'Dobrý večer', u'It is 10:15'], 'nodes_visited': ['hello']},
+                        'intents': [{'intent': 'HELLO', 'confidence': 0.87}], 'context': {'system': {'dialog_turn_counter': 2}}}
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers), None)
+        receivedJson['output']['text'][0] = u'Dobrý večer!'
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers).getPathText(), 'output.text[0]')
+        receivedJson['output']['text'][0] = u'Dobrý den'
+        receivedJson['intents'][0]['confidence'] = 0.8
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers).getPathText(), 'intents[0].confidence')
+
+
+    def test_positive_unordered(self):
+        """ Verify that unordered lists match in any order and the elements are compared with the nested matchers. """
+        matchers = compileMatchers({'entities': 'unordered', 'entities[*].confidence': {'tolerance': 0.1}, 'output.text': 'unordered'})
+        expectedJson = {'entities': [{'entity': 'city', 'value': 'Prague', 'confidence': 1}, {'entity': 'city', 'value': 'Brno', 'confidence': 0.9}],
+                        'output': {'text': ['a', 'b', 'a']}}
+        receivedJson = {'entities': [{'entity': 'city', 'value': 'Brno', 'confidence': 0.95, 'location': [0, 4]},
+                                     {'entity': 'city', 'value': 'Prague', 'confidence': 1, 'location': [9, 15]}],
+                        'output': {'text': ['a', 'a', 'b']}}
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers), None)
+        receivedJson['output']['text'] = ['a', 'b', 'b']
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers).getPathText(), 'output.text[2]')
+        receivedJson['output']['text'] = ['a', 'a', 'b']
+        receivedJson['entities'][0]['confidence'] = 0.5
+        difference = compareJson(expectedJson, receivedJson, None, matchers)
+        self.assertEquals(difference.getPathText(), 'entities[0].confidence')
+
+
+    def test_positive_unorderedLinearTime(self):
+        """ Verify that large unordered lists are compared by hash (not every element with every element). """
+        matchers = compileMatchers({'entities': 'unordered'})
+        expectedJson = {'entities': [{'entity': 'number', 'value': str(i)} for i in range(20000)]}
+        receivedJson = {'entities': [{'entity': 'number', 'value': str(i), 'location': [i, i + 1]} for i in range(20000)]}
+        random.Random(1).shuffle(receivedJson['entities'])
+        timeStart = time.time()
+        self.assertEquals(compareJson(expectedJson, receivedJson, None, matchers), None)
+        self.assertTrue(time.time() - timeStart < 5)
+
+
+    def test_negative_invalidMatchers(self):
+        """ Verify that invalid paths and matchers are rejected. """
+        for matchersJSON in [{'output..text': 'ignore'}, {'output.text[a]': 'ignore'}, {'output': 'sorted'}, {'output': {'tolerance': 'a'}}, ['output']]:
+            with self.assertRaises(ValueError):
+                compileMatchers(matchersJSON)
+
+
+if __name__ == "__main__":
+    unittest.main()
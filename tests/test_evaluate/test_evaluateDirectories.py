@@ -0,0 +1,113 @@
+# coding: utf-8
+import json, os, shutil, tempfile, unittest
+import lxml.etree as LET
+from scripts.evaluate_tests import evaluateDirectories
+from scripts.testCommons import TIMINGS_EXTENSION, CHECK_MESSAGES_TIME_MAX
+
+
+class EvaluateDirectoriesTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.expectedDirectory = os.path.join(self.directory, 'tests')
+        self.receivedDirectory = os.path.join(self.directory, 'outputs')
+        os.makedirs(self.expectedDirectory)
+        os.makedirs(self.receivedDirectory)
+        for testName, wrongLines in [('first', []), ('second', [3]), ('third', [1, 2])]:
+            with open(os.path.join(self.expectedDirectory, testName + '.test'), 'w') as expectedFile:
+                with open(os.path.join(self.receivedDirectory, testName + '.out'), 'w') as receivedFile:
+                    for line in range(1, 5):
+                        outputJson = {'output': {'text': ['line %d' % line]}}
+                        expectedFile.write(json.dumps({'dialog_id': (line + 1) / 2, 'input_message': {}, 'output_message': outputJson}) + '\n')
+                        receivedFile.write(json.dumps({'output': {'text': ['wrong']}} if line in wrongLines else outputJson) + '\n')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def test_positive_evaluateDirectories(self):
+        """ Verify that all test files are evaluated into one report with testsuite for each dialog of each file and the summary. """
+        outputFileName = os.path.join(self.directory, 'tests.junit.xml')
+        summaryFileName = os.path.join(self.directory, 'summary.json')
+        nDialogsFailed = evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', outputFileName, summaryFileName, 2)
+        self.assertEquals(nDialogsFailed, 2)
+
+        outputXml = LET.parse(outputFileName).getroot()
+        self.assertEquals([dialogXml.attrib['name'] for dialogXml in outputXml],
+                          ['first dialog 1', 'first dialog 2', 'second dialog 1', 'second dialog 2', 'third dialog 1', 'third dialog 2'])
+        self.assertEquals([dialogXml.attrib['failures'] for dialogXml in outputXml], ['0', '0', '0', '1', '2', '0'])
+
+        with open(summaryFileName, 'r') as summaryFile:
+            summaryJSON = json.load(summaryFile)
+        self.assertEquals([(fileJSON['name'], fileJSON['dialogs'], fileJSON['dialogs_failed'], fileJSON['lines_failed']) for fileJSON in summaryJSON],
+                          [('first', 2, 0, 0), ('second', 2, 1, 1), ('third', 2, 1, 2)])
+
+
+    def test_positive_latencies(self):
+        """ Verify that the times of the lines are latencies from the timings file of the received file. """
+        with open(os.path.join(self.receivedDirectory, 'second.out' + TIMINGS_EXTENSION), 'w') as timingsFile:
+            for latency in [0.25, 0.5, None, 2]:
+                timingsFile.write(json.dumps({'latency': latency}) + '\n')
+        outputFileName = os.path.join(self.directory, 'tests.junit.xml')
+        evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', outputFileName)
+        outputXml = LET.parse(outputFileName).getroot()
+        self.assertEquals([(dialogXml.attrib['time'], [lineXml.attrib['time'] for lineXml in dialogXml]) for dialogXml in outputXml[2:4]],
+                          [('0.75', ['0.25', '0.5']), ('2', ['0', '2'])])
+        self.assertEquals(outputXml[0].attrib['time'], '0')
+
+
+    def _writeBudgets(self):
+        with open(os.path.join(self.expectedDirectory, 'third.test'), 'w') as expectedFile:
+            for line, budgets in enumerate([{'dialog_max_ms': 1000}, {'max_ms': 300}, {}, {'max_ms': 3000, 'dialog_max_ms': 4000}], 1):
+                expectedJson = dict({'dialog_id': (line + 1) / 2, 'input_message': {}, 'output_message': {'output': {'text': ['line %d' % line]}}}, **budgets)
+                expectedFile.write(json.dumps(expectedJson) + '\n')
+        with open(os.path.join(self.receivedDirectory, 'third.out' + TIMINGS_EXTENSION), 'w') as timingsFile:
+            for latency in [0.5, 0.75, 6, 2]:
+                timingsFile.write(json.dumps({'latency': latency}) + '\n')
+
+
+    def test_negative_latencyBudgets(self):
+        """ Verify that turns and dialogs over their latency budgets fail next to the differences of the content. """
+        self._writeBudgets()
+        outputFileName = os.path.join(self.directory, 'tests.junit.xml')
+        evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', outputFileName)
+        outputXml = LET.parse(outputFileName).getroot()
+        self.assertEquals([(dialogXml.attrib['tests'], dialogXml.attrib['failures']) for dialogXml in outputXml[4:]], [('3', '3'), ('3', '1')])
+        self.assertEquals([[failureXml.attrib['message'] for failureXml in testcaseXml] for testcaseXml in outputXml[4]],
+                          [['Received output differs from expected output. (output.text[0])'], ['Received output differs from expected output. (output.text[0])', 'Latency of the turn exceeds the budget. (max_ms)'],
+                           ['Latency of the dialog exceeds the budget. (dialog_max_ms)']])
+        self.assertEquals([len(testcaseXml) for testcaseXml in outputXml[5]], [0, 0, 1])
+
+
+    def test_negative_defaultLatencyBudget(self):
+        """ Verify that turns without max_ms are checked against the default budget of the scripts. """
+        self._writeBudgets()
+        outputFileName = os.path.join(self.directory, 'tests.junit.xml')
+        evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', outputFileName, defaultMaxMs=CHECK_MESSAGES_TIME_MAX * 1000)
+        outputXml = LET.parse(outputFileName).getroot()
+        self.assertEquals([(dialogXml.attrib['tests'], dialogXml.attrib['failures']) for dialogXml in outputXml[4:]], [('3', '3'), ('3', '2')])
+        self.assertEquals([len(testcaseXml) for testcaseXml in outputXml[5]], [1, 0, 1])
+        self.assertEquals(outputXml[5][0][0].attrib['message'], 'Latency of the turn exceeds the budget. (max_ms)')
+
+
+    def test_negative_nonAsciiVerbose(self):
+        """ Verify that failed lines with non-ASCII outputs are printed in parallel evaluation with verbosity. """
+        with open(os.path.join(self.receivedDirectory, 'second.out'), 'w') as receivedFile:
+            for line in range(1, 5):
+                receivedFile.write(json.dumps({'output': {'text': [u'řádek %d' % line]}}, ensure_ascii=False).encode('utf8') + '\n')
+        outputFileName = os.path.join(self.directory, 'tests.junit.xml')
+        nDialogsFailed = evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', outputFileName, None, 2, True)
+        self.assertEquals(nDialogsFailed, 3)
+
+
+    def test_negative_missingReceivedFile(self):
+        """ Verify that the evaluation ends with an error when a received file is missing. """
+        os.remove(os.path.join(self.receivedDirectory, 'second.out'))
+        with self.assertRaises(SystemExit):
+            evaluateDirectories(self.expectedDirectory, self.receivedDirectory, '.out', os.path.join(self.directory, 'tests.junit.xml'), None, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# coding: utf-8
+import threading, unittest
+from scripts.httpCommons import HttpClient
+from scripts.service_stub import StubService, startServer
+from scripts.functions_deploy import getActionUrl, deployFunctions
+
+
+class InFlightService(StubService):
+    """ Stub service which records the peak number of requests in flight (from their arrival to their answer). """
+
+
+    def __init__(self, latency):
+        StubService.__init__(self, latency)
+        self._inFlightLock = threading.Lock()
+        self.inFlight = 0
+        self.maxInFlight = 0
+
+
+    def getDelay(self):
+        # called when the request arrives, before the delay of the response
+        with self._inFlightLock:
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        return StubService.getDelay(self)
+
+
+    def handle(self, method, path, query, body):
+        try:
+            return StubService.handle(self, method, path, query, body)
+        finally:
+            with self._inFlightLock:
+                self.inFlight -= 1
+
+
+class DeployFunctionsTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.service = InFlightService(latency=0.1)
+        self.server = startServer(self.service)
+        self.namespacesUrl = 'http://127.0.0.1:%d/api/v1/namespaces' % self.server.server_port
+        self.actions = [(getActionUrl(self.namespacesUrl, 'user@example.com', 'package', 'action%d.js' % i), {'exec': {'kind': 'nodejs:default', 'code': 'function main() {return {};}'}})
+                        for i in range(8)]
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_parallelUpload(self):
+        """ Verify that the actions are uploaded in parallel and recorded in the manifest. """
+        manifest = {}
+        uploaded, failed = deployFunctions(HttpClient(('user', 'password')), self.actions, manifest, 8)
+        self.assertTrue(self.service.maxInFlight > 1)
+        self.assertEquals((len(uploaded), failed), (8, []))
+        self.assertEquals(sorted(manifest.keys()), sorted(url for url, payload in self.actions))
+        self.assertEquals(sorted(self.service.functions.keys()), sorted(u'user@example.com/actions/package/action%d.js' % i for i in range(8)))
+
+
+    def test_positive_unchangedActionsSkipped(self):
+        """ Verify that only actions changed since the last deploy are uploaded. """
+        client = HttpClient(('user', 'password'))
+        manifest = {}
+        deployFunctions(client, self.actions, manifest)
+        self.assertEquals(deployFunctions(client, self.actions, manifest), ([], []))
+        self.actions[3][1]['exec']['code'] = 'function main() {return {changed: true};}'
+        uploaded, failed = deployFunctions(client, self.actions, manifest)
+        self.assertEquals(uploaded, [self.actions[3][0]])
+        self.assertEquals(self.service.statistics['requests'], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# coding: utf-8
+import unittest
+from scripts.NearDuplicates import MinHashLSH, getBands, getShingles, normalizeText
+
+
+class NearDuplicatesTest(unittest.TestCase):
+
+
+    def test_positive_normalizeText(self):
+        """ Verify that punctuation and case do not matter. """
+        self.assertEquals(normalizeText(u"What's  the weather?"), u'whats the weather')
+
+
+    def test_positive_getBands(self):
+        """ Verify that bands use all permutations. """
+        bands, rows = getBands(64, 0.8)
+        self.assertEquals(bands * rows, 64)
+        self.assertTrue(rows > 1)
+
+
+    def test_positive_getNearDuplicates(self):
+        """ Verify that near-duplicates are found and dissimilar texts or rejected pairs are not reported. """
+        index = MinHashLSH(0.8)
+        index.add(('WEATHER', 1), 'whats the weather')
+        index.add(('OTHER', 1), "what's the weather?")
+        index.add(('WEATHER', 2), 'what is the weather')
+        index.add(('OTHER', 2), 'play some music please')
+        nearDuplicates = index.getNearDuplicates(lambda key1, key2: key1[0] != key2[0])
+        self.assertEquals(len(nearDuplicates), 1)
+        self.assertEquals(set([nearDuplicates[0][0], nearDuplicates[0][1]]), set([('WEATHER', 1), ('OTHER', 1)]))
+        self.assertEquals(nearDuplicates[0][2], 1.0)
+
+
+
+    def test_positive_rejectedPairsNotCandidates(self):
+        """ Verify that isPair is asked while the candidates are collected and the rejected pairs are not compared. """
+        index = MinHashLSH(0.8)
+        for i in range(4):
+            index.add(('WEATHER', i), 'whats the weather')
+        askedPairs = []
+        self.assertEquals(index.getNearDuplicates(lambda key1, key2: askedPairs.append((key1, key2))), [])
+        self.assertEquals(set(askedPairs), set([(('WEATHER', i), ('WEATHER', j)) for i in range(4) for j in range(i + 1, 4)]))
+
+
+    def test_positive_characterShingles(self):
+        """ Verify that shingles are made of characters, not of bytes of the encoded text. """
+        self.assertEquals(len(getShingles(u'řečí', 3)), 2)
+        self.assertEquals(getShingles(u'řečí', 3), getShingles(u'řečí'.encode('utf-8'), 3))
+        self.assertEquals(len(getShingles(u'čí', 3)), 1)
+
+
+    def test_positive_sameTexts(self):
+        """ Verify that all pairs of keys of the same texts are reported and the rejected ones are not. """
+        index = MinHashLSH(0.8)
+        for key in [('WEATHER', 1), ('OTHER', 1), ('WEATHER', 2)]:
+            index.add(key, u'Jaké je počasí?')
+        index.add(('OTHER', 2), u'jake je pocasi')
+        nearDuplicates = index.getNearDuplicates(lambda key1, key2: key1[0] != key2[0])
+        self.assertEquals(sorted(nearDuplicates), [(('OTHER', 1), ('WEATHER', 2), 1.0), (('WEATHER', 1), ('OTHER', 1), 1.0)])
+
+
+    def test_negative_emptyTexts(self):
+        """ Verify that texts without any word character are not reported as duplicates of each other. """
+        index = MinHashLSH(0.8)
+        index.add(('WEATHER', 1), '?!')
+        index.add(('OTHER', 1), u'...')
+        index.add(('OTHER', 2), '  ')
+        self.assertEquals(index.getNearDuplicates(), [])
+
+
+    def test_negative_invalidThreshold(self):
+        """ Verify that the threshold has to be in (0, 1]. """
+        for threshold in [0, -0.5, 1.5]:
+            with self.assertRaises(ValueError):
+                MinHashLSH(threshold)
+        MinHashLSH(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
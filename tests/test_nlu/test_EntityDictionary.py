@@ -0,0 +1,62 @@
+# coding: utf-8
+import os, shutil, tempfile, unittest
+import scripts.EntityDictionary
+from scripts.EntityDictionary import EntityDictionary, getEntityNames
+
+
+class EntityDictionaryTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._entitiesDir = os.path.join(self._directory, 'entities')
+        os.makedirs(self._entitiesDir)
+        self._writeEntity('name', 'bob;bobby\npeter # comment\n~pattern;[0-9]+\n')
+        self._cacheFileName = os.path.join(self._directory, 'outputs', 'entities.cache.json')
+
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+
+    def _writeEntity(self, entityName, content):
+        with open(os.path.join(self._entitiesDir, entityName + '.csv'), 'w') as entityFile:
+            entityFile.write(content)
+
+
+    def test_positive_cacheIsCreatedAndLoaded(self):
+        """ Verify that the compiled dictionary is stored in the cache file and loaded from it. """
+        dictionary = EntityDictionary(self._entitiesDir, 'hard', None, self._cacheFileName)
+        self.assertTrue(os.path.exists(self._cacheFileName))
+        self.assertEquals(dictionary.getTagger().tag('bobby and peter'), '<name>bobby</name> and <name>peter</name>')
+
+        cachedDictionary = EntityDictionary(self._entitiesDir, 'hard', None, self._cacheFileName)
+        self.assertEquals(cachedDictionary.getEntityNames(), ['name'])
+        self.assertEquals(cachedDictionary.getTagger().tag('bobby and pattern'), '<name>bobby</name> and pattern')
+
+
+    def test_positive_cacheIsRebuiltOnChange(self):
+        """ Verify that the cache is rebuilt when an entity file is added. """
+        EntityDictionary(self._entitiesDir, 'hard', None, self._cacheFileName)
+        self._writeEntity('city', 'new york\n')
+
+        dictionary = EntityDictionary(self._entitiesDir, 'hard', None, self._cacheFileName)
+        self.assertEquals(sorted(dictionary.getEntityNames()), ['city', 'name'])
+        self.assertEquals(dictionary.getTagger().tag('bob in new york'), '<name>bob</name> in <city>new york</city>')
+
+
+
+    def test_positive_noCacheNoKey(self):
+        """ Verify that the entity files are not hashed when there is no cache file. """
+        getEntitiesKey = scripts.EntityDictionary.getEntitiesKey
+        scripts.EntityDictionary.getEntitiesKey = None # fails if called
+        try:
+            dictionary = EntityDictionary(self._entitiesDir, 'hard')
+        finally:
+            scripts.EntityDictionary.getEntitiesKey = getEntitiesKey
+        self.assertEquals(dictionary.getEntityNames(), getEntityNames(self._entitiesDir, 'hard'))
+        self.assertEquals(dictionary.getTagger().tag('bob'), '<name>bob</name>')
+
+
+if __name__ == "__main__":
+    unittest.main()
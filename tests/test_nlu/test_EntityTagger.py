@@ -0,0 +1,36 @@
+# coding: utf-8
+import unittest
+from scripts.EntityTagger import EntityTagger
+
+
+class EntityTaggerTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self._tagger = EntityTagger({'new york': 'city', 'york': 'town', 'bob': 'name', u'žluťoučký': 'color'})
+
+
+    def tearDown(self):
+        self._tagger = None
+
+
+    def test_positive_tagLongestMatch(self):
+        """ Verify that multi-word values are matched and the longest value wins. """
+        self.assertEquals(self._tagger.tag('Bob lives in New  York\n'), '<name>Bob</name> lives in <city>New  York</city>\n')
+        self.assertEquals(self._tagger.tag('york'), '<town>york</town>')
+
+
+    def test_positive_tagWholeWordsOnly(self):
+        """ Verify that values are not matched inside other words and the tagged text is not tagged again. """
+        self.assertEquals(self._tagger.tag('bobby and bob-bob'), 'bobby and bob-bob')
+        self.assertEquals(self._tagger.tag('bob bob'), '<name>bob</name> <name>bob</name>')
+
+
+    def test_positive_tagUnicode(self):
+        """ Verify that utf-8 encoded and unicode lines are both supported. """
+        self.assertEquals(self._tagger.tag(u'Žluťoučký kůň'), u'<color>Žluťoučký</color> kůň')
+        self.assertEquals(self._tagger.tag(u'Žluťoučký kůň'.encode('utf-8')), u'<color>Žluťoučký</color> kůň'.encode('utf-8'))
+
+
+if __name__ == "__main__":
+    unittest.main()
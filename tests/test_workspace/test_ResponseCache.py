@@ -0,0 +1,76 @@
+# coding: utf-8
+import io, json, os, tempfile, threading, unittest
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from scripts.httpCommons import HttpClient
+from scripts.ResponseCache import ResponseCache, CacheMissError
+from scripts.workspace_test import loadDialogs, runDialogs
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """ Answers with the input text and counts the received messages. """
+
+
+    def do_POST(self):
+        inputJson = json.loads(self.rfile.read(int(self.headers.getheader('Content-Length'))))
+        self.server.messages += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'output': {'text': [inputJson['input']['text']]}, 'context': {'turn': self.server.messages}}))
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), CountingHandler)
+        self.server.messages = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/ws/message' % self.server.server_port
+        self.cacheFileName = tempfile.mktemp()
+        self.testLines = '\n'.join(json.dumps({'dialog_id': dialogId, 'input_message': {'input': {'text': u'ahoj %d %d' % (dialogId, turn)}, 'context': {}}})
+                                   for dialogId in range(2) for turn in range(2))
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.exists(self.cacheFileName):
+            os.remove(self.cacheFileName)
+
+
+    def _run(self, client, cache):
+        return [receivedOutputJson for dialogOutputJsons, timings in runDialogs(client, self.url, loadDialogs(io.BytesIO(self.testLines))[0], 1, cache)
+                for receivedOutputJson in dialogOutputJsons]
+
+
+    def test_positive_recordAndReplay(self):
+        """ Verify that recorded responses are used for the same workspace and replayed without the service. """
+        cache = ResponseCache(self.cacheFileName, 'workspace1')
+        recordedOutputJsons = self._run(HttpClient(), cache)
+        cache.save()
+        self.assertEquals(self.server.messages, 4)
+        self.assertEquals(self._run(HttpClient(), ResponseCache(self.cacheFileName, 'workspace1')), recordedOutputJsons)
+        self.assertEquals(self.server.messages, 4)
+        self.assertEquals(self._run(None, ResponseCache(self.cacheFileName)), recordedOutputJsons)
+
+
+    def test_negative_changedWorkspace(self):
+        """ Verify that responses recorded for another workspace are not used. """
+        cache = ResponseCache(self.cacheFileName, 'workspace1')
+        self._run(HttpClient(), cache)
+        cache.save()
+        self._run(HttpClient(), ResponseCache(self.cacheFileName, 'workspace2'))
+        self.assertEquals(self.server.messages, 8)
+        with self.assertRaises(CacheMissError):
+            self._run(None, ResponseCache(self.cacheFileName, 'workspace2'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# coding: utf-8
+import json, shutil, tempfile, threading, unittest
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from scripts.httpCommons import HttpClient
+from scripts.workspaceCommons import diffWorkspaces, countChanges, deployWorkspaceChanges, saveSnapshot, loadSnapshot
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """ Records all requests and answers them with an empty json object. """
+
+
+    def _handle(self):
+        length = int(self.headers.getheader('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.requests.append((self.command, self.path.split('?')[0], body))
+        self.send_response(404 if self.command == 'DELETE' and self.path.startswith('/ws/intents/') else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write('{}')
+
+    do_POST = _handle
+    do_DELETE = _handle
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PartialDeployTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), RecordingHandler)
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.workspaceUrl = 'http://127.0.0.1:%d/ws' % self.server.server_port
+        self.previousWorkspace = {'name': 'app', 'language': 'en',
+                                  'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}]}, {'intent': 'BYE', 'examples': [{'text': 'bye'}]}],
+                                  'entities': [{'entity': 'color', 'values': [{'value': 'red'}]}],
+                                  'dialog_nodes': [{'dialog_node': 'welcome', 'conditions': '#HELLO', 'output': {'text': 'Hi'}}]}
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_noChanges(self):
+        """ Verify that the same workspace produces no requests. """
+        changes = diffWorkspaces(self.previousWorkspace, json.loads(json.dumps(self.previousWorkspace)))
+        self.assertEquals(countChanges(changes), 0)
+        deployWorkspaceChanges(HttpClient(('user', 'password')), self.workspaceUrl, '2017-05-26', changes)
+        self.assertEquals(self.server.requests, [])
+
+
+    def test_positive_deployChanges(self):
+        """ Verify that only changed items are sent to the item endpoints. """
+        workspace = json.loads(json.dumps(self.previousWorkspace))
+        workspace['intents'] = [{'intent': 'HELLO', 'examples': [{'text': 'hi'}, {'text': 'hello'}]}]
+        workspace['dialog_nodes'].append({'dialog_node': u'node ř', 'conditions': 'anything_else'})
+        del workspace['dialog_nodes'][0]['output']
+        changes = diffWorkspaces(self.previousWorkspace, workspace)
+        self.assertEquals(countChanges(changes), 4)
+        deployWorkspaceChanges(HttpClient(('user', 'password')), self.workspaceUrl, '2017-05-26', changes)
+        self.assertEquals(sorted(self.server.requests), sorted([
+            ('POST', '/ws/intents/HELLO', {'new_intent': 'HELLO', 'new_examples': [{'text': 'hi'}, {'text': 'hello'}]}),
+            ('POST', '/ws/dialog_nodes', {'dialog_node': u'node ř', 'conditions': 'anything_else'}),
+            ('POST', '/ws/dialog_nodes/welcome', {'new_dialog_node': 'welcome', 'new_conditions': '#HELLO', 'new_output': None}),
+            ('DELETE', '/ws/intents/BYE', None)]))
+
+
+    def test_positive_deployCounterexamples(self):
+        """ Verify that counterexamples are updated by the text without the prefix and renamed ones are deleted and created. """
+        self.previousWorkspace['counterexamples'] = [{'text': 'hi there', 'metadata': 'old'}, {'text': 'bye now'}]
+        workspace = json.loads(json.dumps(self.previousWorkspace))
+        workspace['counterexamples'] = [{'text': 'hi there'}, {'text': u'bye ř'}]
+        deployWorkspaceChanges(HttpClient(('user', 'password')), self.workspaceUrl, '2017-05-26', diffWorkspaces(self.previousWorkspace, workspace))
+        self.assertEquals(sorted(self.server.requests), sorted([
+            ('POST', '/ws/counterexamples/hi%20there', {'text': 'hi there'}),
+            ('POST', '/ws/counterexamples', {'text': u'bye ř'}),
+            ('DELETE', '/ws/counterexamples/bye%20now', None)]))
+
+
+    def test_positive_snapshot(self):
+        """ Verify that the snapshot is loaded as it was saved. """
+        snapshotDirectory = tempfile.mkdtemp()
+        try:
+            self.assertEquals(loadSnapshot(snapshotDirectory, 'id'), None)
+            saveSnapshot(snapshotDirectory, 'id', self.previousWorkspace)
+            self.assertEquals(loadSnapshot(snapshotDirectory, 'id'), self.previousWorkspace)
+        finally:
+            shutil.rmtree(snapshotDirectory)
+
+
+if __name__ == "__main__":
+    unittest.main()
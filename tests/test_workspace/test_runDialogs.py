@@ -0,0 +1,83 @@
+# coding: utf-8
+import io, json, random, threading, time, unittest
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from scripts.httpCommons import HttpClient
+from scripts.workspace_test import loadDialogs, runDialogs
+from scripts.testCommons import getLatencyHistogram
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MessageHandler(BaseHTTPRequestHandler):
+    """ Answers after a random delay with the input text and the number of turns counted in the context. """
+
+
+    def do_POST(self):
+        inputJson = json.loads(self.rfile.read(int(self.headers.getheader('Content-Length'))))
+        time.sleep(random.uniform(0, 0.02))
+        context = inputJson.get('context', {})
+        context['turns'] = context.get('turns', 0) + 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'input': inputJson['input'], 'context': context}))
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RunDialogsTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), MessageHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/ws/message' % self.server.server_port
+        lines = []
+        for dialogId in range(10):
+            for turn in range(3):
+                lines.append(json.dumps({'dialog_id': dialogId, 'input_message': {'input': {'text': '%d-%d' % (dialogId, turn)}, 'context': {}}}))
+        self.dialogs, _ = loadDialogs(io.BytesIO('\n'.join(lines)))
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_runDialogsConcurrently(self):
+        """ Verify that parallel dialogs are returned in the input order and turns keep the context of their dialog. """
+        self.assertEquals(len(self.dialogs), 10)
+        receivedOutputJsons = [receivedOutputJson for dialogOutputJsons, timings in runDialogs(HttpClient(('user', 'password')), self.url, self.dialogs, 4) for receivedOutputJson in dialogOutputJsons]
+        self.assertEquals([receivedOutputJson['input']['text'] for receivedOutputJson in receivedOutputJsons],
+                          ['%d-%d' % (dialogId, turn) for dialogId in range(10) for turn in range(3)])
+        self.assertEquals([receivedOutputJson['context']['turns'] for receivedOutputJson in receivedOutputJsons], [1, 2, 3] * 10)
+
+
+    def test_positive_stopOnFailure(self):
+        """ Verify that the turns after the failed turn of the dialog are not sent. """
+        for dialog in self.dialogs:
+            for loadedJson in dialog:
+                loadedJson['output_message'] = {'input': loadedJson['input_message']['input']}
+        self.dialogs[1][1]['output_message'] = {'input': {'text': 'wrong'}}
+        receivedOutputJsons = [dialogOutputJsons for dialogOutputJsons, timings in runDialogs(HttpClient(), self.url, self.dialogs, 4, stopOnFailure=True)]
+        self.assertEquals([len(dialogOutputJsons) for dialogOutputJsons in receivedOutputJsons], [3, 2] + [3] * 8)
+
+
+    def test_positive_timings(self):
+        """ Verify that latency, size and status of each sent turn are returned. """
+        for receivedOutputJsons, timings in runDialogs(HttpClient(), self.url, self.dialogs[:2]):
+            self.assertEquals([timing['status'] for timing in timings], [200] * 3)
+            self.assertEquals([timing['size'] for timing in timings], [len(json.dumps(receivedOutputJson)) for receivedOutputJson in receivedOutputJsons])
+            self.assertTrue(all(0 < timing['latency'] < 5 for timing in timings))
+        self.assertEquals(getLatencyHistogram([0.01, 0.05, 0.099, 0.3, 10]), [1, 2, 0, 1, 0, 0, 0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# coding: utf-8
+import json, os, tempfile, unittest
+from scripts.httpCommons import HttpClient
+from scripts.service_stub import StubService, startServer
+from scripts.workspaceCommons import diffWorkspaces, deployWorkspaceChanges, waitForWorkspace, getDeployedWorkspace, gzipData
+
+
+class ServiceStubTest(unittest.TestCase):
+
+
+    def _start(self, service):
+        self.server = startServer(service)
+        self.workspacesUrl = 'http://127.0.0.1:%d/v1/workspaces' % self.server.server_port
+        return service
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_workspaceLifecycle(self):
+        """ Verify that a workspace can be created, changed item by item, exported and deleted. """
+        service = self._start(StubService())
+        client = HttpClient(('user', 'password'))
+        workspace = {'name': 'app', 'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}]}], 'dialog_nodes': []}
+        response = client.post(self.workspacesUrl, params={'version': '2017-05-26'}, data=json.dumps(workspace))
+        self.assertEquals(response.status_code, 201)
+        workspaceUrl = self.workspacesUrl + '/' + response.json()['workspace_id']
+        waitForWorkspace(client, workspaceUrl, '2017-05-26', 1, 0.01)
+
+        changedWorkspace = {'name': 'app', 'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hello'}]}], 'dialog_nodes': [{'dialog_node': u'uvítání'}]}
+        deployWorkspaceChanges(client, workspaceUrl, '2017-05-26', diffWorkspaces(workspace, changedWorkspace))
+        exportedWorkspace = getDeployedWorkspace(client, workspaceUrl, '2017-05-26')
+        self.assertEquals((exportedWorkspace['intents'], exportedWorkspace['dialog_nodes']), (changedWorkspace['intents'], changedWorkspace['dialog_nodes']))
+
+        self.assertEquals(client.delete(workspaceUrl, params={'version': '2017-05-26'}).status_code, 200)
+        self.assertEquals(service.workspaces, {})
+
+
+    def test_positive_recordedMessages(self):
+        """ Verify that messages are answered with the responses from the test file. """
+        testFileName = tempfile.mktemp()
+        try:
+            with open(testFileName, 'w') as testFile:
+                testFile.write(json.dumps({'dialog_id': 1, 'input_message': {'input': {'text': 'hi'}, 'context': {}},
+                                           'output_message': {'output': {'text': ['Hello']}, 'context': {'turn': 1}}}) + '\n')
+            service = StubService()
+            service.loadTests(testFileName)
+        finally:
+            os.remove(testFileName)
+        self._start(service)
+        client = HttpClient()
+        workspaceId = client.post(self.workspacesUrl, data='{}').json()['workspace_id']
+        messageUrl = self.workspacesUrl + '/' + workspaceId + '/message'
+        self.assertEquals(client.post(messageUrl, data=json.dumps({'input': {'text': 'hi'}, 'context': {}})).json()['output']['text'], ['Hello'])
+        self.assertEquals(client.post(messageUrl, data=json.dumps({'input': {'text': 'hi'}, 'context': {'other': 1}})).json()['output']['text'], ['Hello'])
+        self.assertEquals(client.post(messageUrl, data=json.dumps({'input': {'text': 'bye'}, 'context': {'a': 1}})).json()['context'], {'a': 1})
+
+
+    def test_positive_recordedMessageWithoutContext(self):
+        """ Verify that the context of the message is returned when the recorded response has none. """
+        testFileName = tempfile.mktemp()
+        try:
+            with open(testFileName, 'w') as testFile:
+                testFile.write(json.dumps({'dialog_id': 1, 'input_message': {'input': {'text': 'hi'}},
+                                           'output_message': {'output': {'text': ['Hello']}}}) + '\n')
+            service = StubService()
+            service.loadTests(testFileName)
+        finally:
+            os.remove(testFileName)
+        self._start(service)
+        client = HttpClient()
+        workspaceId = client.post(self.workspacesUrl, data='{}').json()['workspace_id']
+        outputJson = client.post(self.workspacesUrl + '/' + workspaceId + '/message', data=json.dumps({'input': {'text': 'hi'}, 'context': {'a': 1}})).json()
+        self.assertEquals((outputJson['output']['text'], outputJson['context']), (['Hello'], {'a': 1}))
+
+
+    def test_positive_gzipRequest(self):
+        """ Verify that gzip compressed request bodies are decompressed. """
+        service = self._start(StubService())
+        client = HttpClient()
+        workspace = {'name': u'aplikace č', 'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}]}]}
+        response = client.post(self.workspacesUrl, headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+                               data=gzipData(json.dumps(workspace, ensure_ascii=False).encode('utf8')))
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(service.workspaces[response.json()['workspace_id']]['name'], workspace['name'])
+
+
+    def test_positive_injectedErrors(self):
+        """ Verify that the given fractions of requests are throttled and failed. """
+        service = self._start(StubService(errorRate=0.2, throttleRate=0.3, seed=1))
+        statuses = [service.handle('POST', '/v1/workspaces', {}, {})[0] for _ in range(1000)]
+        self.assertTrue(250 < statuses.count(429) < 350)
+        self.assertTrue(150 < statuses.count(500) < 250)
+        self.assertEquals(statuses.count(429) + statuses.count(500) + statuses.count(201), 1000)
+        self.assertEquals(service.statistics['throttled'], statuses.count(429))
+
+
+if __name__ == "__main__":
+    unittest.main()
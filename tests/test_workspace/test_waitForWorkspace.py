@@ -0,0 +1,73 @@
+# coding: utf-8
+import json, os, tempfile, threading, unittest
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from scripts.httpCommons import HttpClient
+from scripts.workspaceCommons import waitForWorkspace, writeTrainingMetrics
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """ Returns status Training until the given number of polls is reached, then Available. """
+
+
+    def do_GET(self):
+        self.server.polls += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'status': 'Available' if self.server.polls >= self.server.trainingPolls else 'Training'}))
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WaitForWorkspaceTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), StatusHandler)
+        self.server.polls = 0
+        self.server.trainingPolls = 3
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.workspaceUrl = 'http://127.0.0.1:%d/ws' % self.server.server_port
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_waitForWorkspace(self):
+        """ Verify that the workspace is polled until it is available. """
+        trainingTime = waitForWorkspace(HttpClient(('user', 'password')), self.workspaceUrl, '2017-05-26', 10, 0.01)
+        self.assertEquals(self.server.polls, 3)
+        self.assertTrue(0 < trainingTime < 10)
+
+
+    def test_negative_waitForWorkspace(self):
+        """ Verify that the waiting ends with an error after the timeout. """
+        self.server.trainingPolls = 1000
+        with self.assertRaises(SystemExit):
+            waitForWorkspace(HttpClient(('user', 'password')), self.workspaceUrl, '2017-05-26', 0.1, 0.01)
+
+
+    def test_positive_writeTrainingMetrics(self):
+        """ Verify that the metrics line contains the training time and the workspace counts. """
+        metricsFileName = tempfile.mktemp()
+        try:
+            workspace = {'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}, {'text': 'hello'}]}], 'dialog_nodes': [{'dialog_node': 'welcome'}]}
+            writeTrainingMetrics(metricsFileName, 'id', 1.23456, workspace)
+            writeTrainingMetrics(metricsFileName, 'id', 2, workspace)
+            with open(metricsFileName, 'r') as metricsFile:
+                metrics = [json.loads(line) for line in metricsFile]
+            self.assertEquals(len(metrics), 2)
+            self.assertEquals(metrics[0]['training_time'], 1.235)
+            self.assertEquals((metrics[0]['intents'], metrics[0]['examples'], metrics[0]['entities'], metrics[0]['dialog_nodes']), (1, 2, 0, 1))
+        finally:
+            os.remove(metricsFileName)
+
+
+if __name__ == "__main__":
+    unittest.main()
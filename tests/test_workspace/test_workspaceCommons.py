@@ -0,0 +1,57 @@
+# coding: utf-8
+import gzip, io, json, unittest
+from scripts.workspaceCommons import minimizeWorkspace, serializeWorkspace, getSectionSizes, gzipData, getWorkspaceKey
+
+
+class WorkspaceCommonsTest(unittest.TestCase):
+
+
+    def test_positive_minimizeWorkspace(self):
+        """ Verify that empty and default fields of the items are removed, but null context values and top level fields are kept. """
+        workspace = {'name': u'Můj', 'description': '', 'metadata': None,
+                     'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}], 'description': None}],
+                     'dialog_nodes': [{'dialog_node': 'welcome', 'type': 'standard', 'output': {}, 'context': {'clear': None},
+                                       'go_to': {'dialog_node': 'next', 'selector': 'user_input'}}]}
+        minimizedWorkspace = minimizeWorkspace(workspace)
+        self.assertEquals(minimizedWorkspace, {'name': u'Můj', 'description': '', 'metadata': None,
+                                               'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}]}],
+                                               'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'clear': None}, 'go_to': {'dialog_node': 'next'}}]})
+        self.assertEquals(workspace['dialog_nodes'][0]['type'], 'standard')
+        self.assertTrue(getSectionSizes(minimizedWorkspace, True)['dialog_nodes'] < getSectionSizes(workspace)['dialog_nodes'])
+
+
+    def test_positive_emptySectionsKept(self):
+        """ Verify that empty sections are sent, so the update of the workspace clears them. """
+        workspace = {'name': 'app', 'intents': [], 'entities': [], 'counterexamples': [], 'dialog_nodes': []}
+        self.assertEquals(minimizeWorkspace(workspace), workspace)
+
+
+    def test_positive_gzipData(self):
+        """ Verify that the serialized workspace can be decompressed. """
+        data = serializeWorkspace({'name': u'Můj'}, True)
+        self.assertEquals(data, u'{"name":"Můj"}'.encode('utf8'))
+        self.assertEquals(gzip.GzipFile(fileobj=io.BytesIO(gzipData(data))).read(), data)
+
+
+
+    def test_positive_workspaceKeyServiceFields(self):
+        """ Verify that the fields set by the service do not change the key of the workspace. """
+        workspace = {'name': 'app', 'intents': [{'intent': 'HELLO', 'examples': [{'text': 'hi'}]}],
+                     'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'status': 'new'}}]}
+        exportedWorkspace = {'name': 'app', 'workspace_id': 'ws', 'status': 'Available', 'created': '2018-01-01', 'updated': '2018-01-02',
+                             'intents': [{'intent': 'HELLO', 'created': '2018-01-01', 'examples': [{'text': 'hi', 'updated': '2018-01-02'}]}],
+                             'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'status': 'new'}, 'updated': '2018-01-02'}]}
+        self.assertEquals(getWorkspaceKey(exportedWorkspace), getWorkspaceKey(workspace))
+
+
+    def test_negative_workspaceKeyUserContent(self):
+        """ Verify that the user content with the names of the service fields changes the key of the workspace. """
+        workspace = {'name': 'app', 'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'status': 'new'}, 'output': {'text': 'Hi'}}]}
+        changedContextWorkspace = {'name': 'app', 'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'status': 'old'}, 'output': {'text': 'Hi'}}]}
+        changedOutputWorkspace = {'name': 'app', 'dialog_nodes': [{'dialog_node': 'welcome', 'context': {'status': 'new'}, 'output': {'text': 'Hi', 'status': 1}}]}
+        self.assertNotEquals(getWorkspaceKey(changedContextWorkspace), getWorkspaceKey(workspace))
+        self.assertNotEquals(getWorkspaceKey(changedOutputWorkspace), getWorkspaceKey(workspace))
+
+
+if __name__ == "__main__":
+    unittest.main()
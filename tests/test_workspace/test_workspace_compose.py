@@ -0,0 +1,62 @@
+# coding: utf-8
+import codecs, json, os, shutil, subprocess, sys, tempfile, unittest
+
+SCRIPTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')
+EXAMPLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'example', 'en_app')
+
+
+class WorkspaceComposeTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def _runScript(self, scriptName, arguments):
+        """Runs the script in the temporary directory, returns its exit code"""
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.call([sys.executable, os.path.join(SCRIPTS_DIRECTORY, scriptName)] + arguments, cwd=self.directory, stdout=devnull, stderr=devnull)
+
+
+    def _writeFragment(self, fileName, fragmentJSON):
+        with codecs.open(os.path.join(self.directory, fileName), 'w', encoding='utf8') as fragmentFile:
+            fragmentFile.write(json.dumps(fragmentJSON, indent=4, ensure_ascii=False))
+
+
+    def _compose(self, arguments):
+        """Returns workspaces composed normally and with splicing of the fragments"""
+        workspaces = []
+        for workspaceFileName, splice in [('workspace.json', []), ('spliced_workspace.json', ['-sp'])]:
+            self.assertEquals(self._runScript('workspace_compose.py', ['-of', self.directory, '-oi', 'intents.json', '-oe', 'entities.json', '-od', 'dialog.json',
+                                                                        '-ow', workspaceFileName] + arguments + splice), 0)
+            with open(os.path.join(self.directory, workspaceFileName), 'rb') as workspaceFile:
+                workspaces.append(json.loads(workspaceFile.read().decode('utf8')))
+        return workspaces
+
+
+    def test_positive_spliceExample(self):
+        """ Verify that the workspace of the example application composed with splicing is the same as composed normally. """
+        self.assertEquals(self._runScript('intents_csv2json.py', ['-ii', os.path.join(EXAMPLE_DIRECTORY, 'intents'), '-od', self.directory, '-oi', 'intents.json']), 0)
+        self.assertEquals(self._runScript('entities_csv2json.py', ['-ie', os.path.join(EXAMPLE_DIRECTORY, 'entities'), '-od', self.directory, '-oe', 'entities.json']), 0)
+        self._writeFragment('dialog.json', [{'dialog_node': 'welcome', 'conditions': 'welcome', 'output': {'text': 'Hello.'}}])
+        workspace, splicedWorkspace = self._compose(['-wn', 'waw_en_app_example_en', '-wl', 'en'])
+        self.assertEquals(splicedWorkspace, workspace)
+        self.assertTrue(workspace['intents'] and workspace['entities'])
+
+
+    def test_positive_spliceNonAscii(self):
+        """ Verify that fragments and metadata with non-ASCII text are spliced without changes. """
+        self._writeFragment('intents.json', [{'intent': u'POČASÍ', 'examples': [{'text': u'jaké bude počasí?'}, {'text': u'předpověď'}]}])
+        self._writeFragment('entities.json', [{'entity': u'město', 'values': [{'value': u'Plzeň', 'synonyms': [u'Пльзень', u'ピルゼン']}]}])
+        self._writeFragment('dialog.json', [{'dialog_node': u'uvítání', 'conditions': u'#POČASÍ', 'output': {'text': u'Dobrý den ☀'}}])
+        workspace, splicedWorkspace = self._compose(['-wn', u'aplikace č'.encode('utf8'), '-wd', u'popis ž'.encode('utf8')])
+        self.assertEquals(splicedWorkspace, workspace)
+        self.assertEquals((workspace['name'], workspace['intents'][0]['intent'], workspace['dialog_nodes'][0]['output']['text']), (u'aplikace č', u'POČASÍ', u'Dobrý den ☀'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# coding: utf-8
+import unittest
+from scripts.httpCommons import HttpClient
+from scripts.service_stub import StubService, startServer
+from scripts.workspace_load_test import LoadStatistics, runLoad
+from scripts.testCommons import getPercentile
+
+
+class LoadTestTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.service = StubService(latency=0.01, errorRate=0.2, seed=1)
+        self.server = startServer(self.service)
+        self.service.workspaces['ws'] = {'workspace_id': 'ws'}
+        self.url = 'http://127.0.0.1:%d/v1/workspaces/ws/message?version=2017-05-26' % self.server.server_port
+        self.dialogs = [[{'dialog_id': 1, 'input_message': {'input': {'text': 'hi'}}, 'output_message': {'output': {'nodes_visited': ['welcome']}}},
+                         {'dialog_id': 1, 'input_message': {'input': {'text': 'bye'}}, 'output_message': {'output': {'nodes_visited': ['goodbye']}}}]]
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_positive_runLoad(self):
+        """ Verify that the dialogs are started with the arrival rate and all turns and errors are reported. """
+        statistics = LoadStatistics()
+        elapsed = runLoad(HttpClient(('user', 'password'), retries=0), self.url, self.dialogs, 50, 4, 0.4, statistics)
+        report = statistics.getReport(elapsed)
+        self.assertEquals(report['dialogs']['started'], 20)
+        self.assertEquals(report['turns'], self.service.statistics['requests'])
+        self.assertEquals(report['errors'], self.service.statistics['errors'])
+        self.assertEquals(report['status_codes'].get('500', 0), self.service.statistics['errors'])
+        self.assertEquals(report['dialogs']['failed'], report['errors'])
+        self.assertEquals(sum(nodeReport['turns'] for nodeReport in report['nodes'].values()), report['turns'])
+        self.assertTrue(report['latency']['p50'] >= 10)
+
+
+    def test_negative_sessionException(self):
+        """ Verify that exceptions raised by the sessions are not lost but reported as session errors. """
+        statistics = LoadStatistics()
+        dialogs = [[{'dialog_id': 1, 'output_message': {}}]] # turn without input message
+        elapsed = runLoad(HttpClient(retries=0), self.url, dialogs, 50, 2, 0.1, statistics)
+        report = statistics.getReport(elapsed)
+        self.assertEquals((report['dialogs']['started'], report['dialogs']['failed'], report['dialogs']['session_errors']), (5, 5, 5))
+        self.assertEquals(report['session_errors'], ["'input_message'"])
+        self.assertEquals(report['turns'], 0)
+
+
+    def test_positive_percentile(self):
+        """ Verify the nearest-rank percentiles. """
+        values = range(1, 101)
+        self.assertEquals([getPercentile(values, percentile) for percentile in [50, 95, 99, 100]], [50, 95, 99, 100])
+        self.assertEquals(getPercentile([7], 99), 7)
+        self.assertEquals(getPercentile([], 50), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()